@@ -4,10 +4,8 @@ import sys
 import platform
 import time
 import traceback
-import cairo
 import definitions
 import mido
-import numpy
 import push2_python
 import asyncio
 import jack
@@ -24,11 +22,38 @@ from modes.osc_mode import OSCMode
 from modes.preset_selection_mode import PresetSelectionMode
 from modes.ddrm_tone_selector_mode import DDRMToneSelectorMode
 from modes.menu_mode import MenuMode
-from user_interface.display_utils import show_notification
+from user_interface.display_utils import show_notification, show_debug_overlay
+from user_interface.display_renderer import DisplayRenderer
+from user_interface.frame_buffers import FrameBufferPool, FrameRing
+from user_interface.frame_profiler import FrameProfiler
+from user_interface.headless_push import HeadlessPush
+from scheduling.frame_clock import FrameClock
+from scheduling.wakeups import Wakeups, notify_wakeups
+from controllers.input_bus import InputBus, sum_last_arg
+from controllers.dispatch_table import InputDispatchTable
+from controllers.encoder_accumulator import EncoderAccumulator, DEFAULT_SEND_WINDOW
+from controllers.encoder_acceleration import EncoderAcceleration
+from controllers.led_cache import ButtonLedCache, PadLedCache
+from controllers.note_output import NoteOutput
+from osc.batcher import OSCBatcher
+from osc.message_encoder import get_encoder_stats
+from osc.query_scheduler import QueryScheduler, DEFAULT_QUERY_RATE
+from scheduling.task_scheduler import TaskScheduler, PRIORITY_ROUTING, PRIORITY_HOUSEKEEPING
+from user_interface.frame_rate_governor import FrameRateGovernor, IDLE_FRAME_RATE, IDLE_TIMEOUT
+from user_interface.render_worker import RenderRequest, RenderWorker, DisplaySender
+from user_interface.display_list import DisplayList
 from modes.external_instrument import ExternalInstrument
 # logging.basicConfig(level=logging.DEBUG)
 # logging.getLogger().setLevel(level=logging.DEBUG)
 
+# Push input events after which the display is redrawn
+INPUT_EVENTS_THAT_CHANGE_DISPLAY = {
+    "on_encoder_rotated",
+    "on_encoder_touched",
+    "on_button_pressed",
+    "on_button_released",
+}
+
 
 class PyshaApp(object):
 
@@ -56,6 +81,8 @@ class PyshaApp(object):
     push = None
     use_push2_display = None
     target_frame_rate = None
+    render_worker = None
+    display_sender = None
 
     # frame rate measurements
     actual_frame_rate = 0
@@ -63,10 +90,11 @@ class PyshaApp(object):
     current_frame_rate_measurement_second = 0
 
     # other state vars
-    active_modes = []
+    _active_modes = []
+    input_dispatch_table = None
     previously_active_mode_for_xor_group = {}
-    pads_need_update = True
-    buttons_need_update = True
+    _pads_need_update = True
+    _buttons_need_update = True
 
     # notifications
     notification_text = None
@@ -77,8 +105,7 @@ class PyshaApp(object):
     last_cp_value_recevied_time = 0
 
     # client = SimpleUDPClient("127.0.0.1", 1032)
-    tasks = set()
-    queue = []
+    task_scheduler = None
 
     # Pipewire-related
     external_instruments = []
@@ -86,7 +113,9 @@ class PyshaApp(object):
     volumes = [ 1,1,1,1,1,1,1,1,1,1,1,1,1,1,1,1]
     volume_node = None
 
-    def __init__(self):
+    def __init__(self, headless=False):
+        # In headless mode no Push is needed, frames are kept in memory by HeadlessPush (see benchmarks/)
+        self.headless = headless
         if os.path.exists("settings.json"):
             settings = json.load(open("settings.json"))
         else:
@@ -95,7 +124,10 @@ class PyshaApp(object):
         self.set_midi_in_channel(settings.get("midi_in_default_channel", 0))
         self.set_midi_out_channel(settings.get("midi_out_default_channel", 0))
         self.target_frame_rate = settings.get("target_frame_rate", 60)
+        self.idle_frame_rate = settings.get("idle_frame_rate", IDLE_FRAME_RATE)
+        self.idle_timeout = settings.get("idle_timeout", IDLE_TIMEOUT)
         self.use_push2_display = settings.get("use_push2_display", True)
+        self.use_render_worker = settings.get("use_render_worker", False)
 
         self.init_midi_in(device_name=settings.get("default_midi_in_device_name", None))
         self.init_midi_out(
@@ -104,10 +136,39 @@ class PyshaApp(object):
         self.init_notes_midi_in(
             device_name=settings.get("default_notes_midi_in_device_name", None)
         )
-        self.tasks = set()
-        self.queue = []
+        self.task_scheduler = TaskScheduler()
+        self.wakeups = Wakeups()
+        self.input_dispatch_table = InputDispatchTable(definitions.PyshaMode)
+        self.input_bus = InputBus(self.on_input_event, after_flush=self.flush_output)
+        self.encoder_accumulator = EncoderAccumulator(
+            self.wakeups.call_later,
+            window=settings.get("encoder_send_window", DEFAULT_SEND_WINDOW),
+        )
+        self.encoder_acceleration = EncoderAcceleration()
+        self.note_output = NoteOutput(self)
+        self.osc_batcher = OSCBatcher()
+        self.query_scheduler = QueryScheduler(
+            self.wakeups.call_later,
+            rate=settings.get("osc_query_rate", DEFAULT_QUERY_RATE),
+        )
+        self.frame_clock = FrameClock()
+        self.display_renderer = DisplayRenderer()
+        self.frame_profiler = FrameProfiler(
+            enabled=settings.get("frame_profiler_enabled", False)
+        )
+        self.frame_rate_governor = FrameRateGovernor(
+            max_frame_rate=self.target_frame_rate,
+            idle_frame_rate=self.idle_frame_rate,
+            idle_timeout=self.idle_timeout,
+        )
+        self.frame_buffers = FrameBufferPool(
+            push2_python.constants.DISPLAY_LINE_PIXELS,
+            push2_python.constants.DISPLAY_N_LINES,
+        )
         self.init_push()
         self.init_modes(settings)
+        if self.use_render_worker:
+            self.init_render_worker()
 
 
     def init_modes(self, settings):
@@ -117,7 +178,7 @@ class PyshaApp(object):
 
 
         self.main_controls_mode = MainControlsMode(self, settings=settings)
-        self.active_modes.append(self.main_controls_mode)
+        self.active_modes = self.active_modes + [self.main_controls_mode]
 
         self.melodic_mode = MelodicMode(
             self, settings=settings, send_osc_func=self.send_osc
@@ -152,6 +213,18 @@ class PyshaApp(object):
             }
         self.external_instruments = [ExternalInstrument(self, 'Overwitch', overwitch_def)]
 
+    # Assign a new list (rather than changing it in place) when activating/deactivating modes, so that the input
+    # dispatch table gets recompiled
+    @property
+    def active_modes(self):
+        return self._active_modes
+
+    @active_modes.setter
+    def active_modes(self, modes):
+        self._active_modes = modes
+        if self.input_dispatch_table is not None:
+            self.input_dispatch_table.invalidate()
+
     def get_all_modes(self):
         return [
             getattr(self, element)
@@ -171,7 +244,7 @@ class PyshaApp(object):
                 ]
                 self.settings_mode.deactivate()
         else:
-            self.active_modes.append(self.settings_mode)
+            self.active_modes = self.active_modes + [self.settings_mode]
             self.settings_mode.activate()
 
     def toggle_menu_mode(self):
@@ -273,10 +346,10 @@ class PyshaApp(object):
                     )
                 else:
                     new_active_modes.append(mode)
-            self.active_modes = new_active_modes
 
             # Now add the mode to set to the active modes list and activate it
             new_active_modes.append(mode_to_set)
+            self.active_modes = new_active_modes
             mode_to_set.activate()
 
     def unset_mode_for_xor_group(self, mode_to_unset):
@@ -353,6 +426,12 @@ class PyshaApp(object):
             ),
             "use_push2_display": self.use_push2_display,
             "target_frame_rate": self.target_frame_rate,
+            "idle_frame_rate": self.idle_frame_rate,
+            "idle_timeout": self.idle_timeout,
+            "frame_profiler_enabled": self.frame_profiler.enabled,
+            "use_render_worker": self.use_render_worker,
+            "encoder_send_window": self.encoder_accumulator.window,
+            "osc_query_rate": self.query_scheduler.rate,
         }
         for mode in self.get_all_modes():
             mode_settings = mode.get_settings_to_save()
@@ -578,7 +657,9 @@ class PyshaApp(object):
         if self.midi_out is not None:
             self.midi_out.send(msg)
 
-    def send_osc(self, address, value, instrument_short_name=None):
+    def send_osc(self, address, value, instrument_short_name=None, immediate=False):
+        # immediate=True skips the OSC batching (see osc.batcher), for messages that must not wait for the end of
+        # the tick (sequencer notes)
         # print(
         #     instrument_short_name,
         #     self.instrument_selection_mode.get_current_instrument_short_name(),
@@ -590,7 +671,7 @@ class PyshaApp(object):
                 "client", None
             )
             if client:
-                client.send_message(address, value)
+                client.send_message(address, value, immediate=immediate)
         else:
             # This is for wiggling knobs
             client = self.osc_mode.instruments[
@@ -598,7 +679,7 @@ class PyshaApp(object):
             ].get("client", None)
 
             if client:
-                client.send_message(address, value)
+                client.send_message(address, value, immediate=immediate)
             # print("adress", address, value)
 
     def send_osc_multi(self, commands, instrument_short_name=None):
@@ -654,6 +735,7 @@ class PyshaApp(object):
                 ]
             )
             if msg.channel == instrument_midi_channel - 1:  # msg.channel is 0-indexed
+                self.frame_rate_governor.notify_activity()  # Pads light up with these notes
                 for mode in self.active_modes:
                     if mode == self.melodic_mode or mode == self.rhythmic_mode:
                         mode.on_midi_in(msg, source=self.notes_midi_in.name)
@@ -662,6 +744,7 @@ class PyshaApp(object):
     def add_display_notification(self, text):
         self.notification_text = text
         self.notification_time = time.time()
+        self.display_renderer.mark_dirty()
 
     async def init_jack_server(self):
 
@@ -735,7 +818,12 @@ class PyshaApp(object):
 
     def init_push(self):
         print("Configuring Push...")
+        if self.headless:
+            self.push = HeadlessPush()
+            self.init_led_caches()
+            return
         self.push = push2_python.Push2()
+        self.init_led_caches()
         if platform.system() == "Linux":
             # When this app runs in Linux is because it is running on the Raspberrypi
             #  I've overved problems trying to reconnect many times withotu success on the Raspberrypi, resulting in
@@ -746,50 +834,180 @@ class PyshaApp(object):
         #     for x in range(0, 8):
         #         self.push.pads.set_pad_color((x, y), color=definitions.OFF_BTN_COLOR)
 
+    def init_led_caches(self):
+        # Button and pad colours set by modes go through a shadow state and are sent once per frame, only if changed
+        self.push.buttons = ButtonLedCache(self.push.buttons)
+        self.push.pads = PadLedCache(self.push.pads)
+
+    def init_render_worker(self):
+        # Frames are drawn in one thread and sent over USB in another, sharing a ring of frame buffers
+        self.frame_ring = FrameRing(
+            push2_python.constants.DISPLAY_LINE_PIXELS,
+            push2_python.constants.DISPLAY_N_LINES,
+        )
+        self.render_worker = RenderWorker(self.frame_ring)
+        self.display_sender = DisplaySender(self, self.frame_ring)
+        self.render_worker.start()
+        self.display_sender.start()
+
+    # Setting these flags wakes the main loop up, the update itself happens in check_for_delayed_actions
+    @property
+    def pads_need_update(self):
+        return self._pads_need_update
+
+    @pads_need_update.setter
+    def pads_need_update(self, value):
+        self._pads_need_update = value
+        if value:
+            notify_wakeups()
+
+    @property
+    def buttons_need_update(self):
+        return self._buttons_need_update
+
+    @buttons_need_update.setter
+    def buttons_need_update(self, value):
+        self._buttons_need_update = value
+        if value:
+            notify_wakeups()
+
+    def on_input_event(self, name, args):
+        # Push input (encoders, pads, buttons...) posted to the input bus, handled here in the loop thread
+        self.frame_rate_governor.notify_activity()
+        if name in ("on_button_pressed", "on_button_released") and args[0] == push2_python.constants.BUTTON_SHIFT:
+            # Encoders edit parameters in fine steps while shift is held
+            self.encoder_acceleration.set_fine_mode(name == "on_button_pressed")
+        if name in INPUT_EVENTS_THAT_CHANGE_DISPLAY:
+            self.display_renderer.mark_dirty()
+        self.input_dispatch_table.dispatch(name, args, self.active_modes)
+
+    def get_loop_stats(self):
+        # Counters of the main loop helpers, saved along with the frame profile
+        stats = {
+            "frame_clock": self.frame_clock.get_stats(),
+            "task_scheduler": self.task_scheduler.get_stats(),
+            "input_bus": self.input_bus.get_stats(),
+            "encoder_accumulator": self.encoder_accumulator.get_stats(),
+            "note_output": self.note_output.get_stats(),
+            "osc_batcher": self.osc_batcher.get_stats(),
+            "osc_encoder": get_encoder_stats(),
+            "query_scheduler": self.query_scheduler.get_stats(),
+            "osc_dispatchers": {
+                name: instrument.osc["dispatcher"].get_stats()
+                for name, instrument in self.osc_mode.instruments.items()
+            },
+            "parameter_stores": {
+                name: instrument.parameters.get_stats()
+                for name, instrument in self.osc_mode.instruments.items()
+            },
+            "button_leds": self.push.buttons.get_stats(),
+            "pad_leds": self.push.pads.get_stats(),
+        }
+        if self.render_worker is not None:
+            stats["render_worker"] = self.render_worker.get_stats()
+            stats["display_sender"] = self.display_sender.get_stats()
+        return stats
+
+    def flush_leds(self):
+        # Send the button and pad colours that changed since the last flush
+        self.push.buttons.flush()
+        self.push.pads.flush()
+
+    def flush_output(self):
+        # Send what modes changed during this tick: LEDs and batched OSC messages
+        self.flush_leds()
+        self.osc_batcher.flush()
+
     def update_push2_pads(self):
         for mode in self.active_modes:
+            start_time = self.frame_profiler.start()
             mode.update_pads()
+            self.frame_profiler.record(mode.__class__.__name__ + ".update_pads", start_time)
 
     def update_push2_buttons(self):
         for mode in self.active_modes:
+            start_time = self.frame_profiler.start()
             mode.update_buttons()
+            self.frame_profiler.record(mode.__class__.__name__ + ".update_buttons", start_time)
 
     def update_push2_display(self):
         if self.use_push2_display:
-            # Prepare cairo canvas
-            w, h = (
-                push2_python.constants.DISPLAY_LINE_PIXELS,
-                push2_python.constants.DISPLAY_N_LINES,
-            )
-            surface = cairo.ImageSurface(cairo.FORMAT_RGB16_565, w, h)
-            ctx = cairo.Context(surface)
-
-            # Call all active modes to write to context
-            for mode in self.active_modes:
-                mode.update_display(ctx, w, h)
-
-            # Show any notifications that should be shown
-            if self.notification_text is not None:
-                time_since_notification_started = time.time() - self.notification_time
-                if time_since_notification_started < definitions.NOTIFICATION_TIME:
-                    show_notification(
-                        ctx,
-                        self.notification_text,
-                        opacity=1
-                        - time_since_notification_started
-                        / definitions.NOTIFICATION_TIME,
+            # Only redraw if some mode/control flagged the display as dirty or a notification is fading out
+            if not self.display_renderer.needs_render(
+                self.active_modes, force=self.notification_text is not None
+            ):
+                self.display_renderer.skip_frame()
+                if self.display_renderer.needs_keepalive():
+                    self.push.display.send_to_display(
+                        self.display_renderer.last_prepared_frame
                     )
-                else:
-                    self.notification_text = None
-
-            # Convert cairo data to numpy array and send to push
-            buf = surface.get_data()
-            frame = numpy.ndarray(
-                shape=(h, w), dtype=numpy.uint16, buffer=buf
-            ).transpose()
-            self.push.display.display_frame(
+                    self.display_renderer.frame_resent()
+                return
+
+            request = self.make_render_request()
+            self.display_renderer.begin_frame()
+            if self.render_worker is not None:
+                # Modes draw into a display list (a snapshot of this frame), rasterising and sending it happen in
+                # the worker threads
+                display_list = DisplayList()
+                self.draw_display_frame(
+                    display_list,
+                    push2_python.constants.DISPLAY_LINE_PIXELS,
+                    push2_python.constants.DISPLAY_N_LINES,
+                    request,
+                )
+                self.display_renderer.end_frame()
+                self.render_worker.submit(display_list)
+                return
+
+            # Prepare cairo canvas (surfaces are persistent and swapped every frame)
+            frame_buffer = self.frame_buffers.next_buffer()
+            ctx = frame_buffer.begin()
+            self.draw_display_frame(ctx, frame_buffer.w, frame_buffer.h, request)
+
+            # Hand the pre-built numpy view of the surface to push
+            frame = frame_buffer.end()
+            prepared_frame = self.push.display.prepare_frame(
                 frame, input_format=push2_python.constants.FRAME_FORMAT_RGB565
             )
+            self.push.display.send_to_display(prepared_frame)
+            self.display_renderer.end_frame(prepared_frame)
+
+    def make_render_request(self):
+        # Snapshot of what the next frame should show, decided in the main loop
+        notification_text = None
+        notification_opacity = 0.0
+        if self.notification_text is not None:
+            time_since_notification_started = time.time() - self.notification_time
+            if time_since_notification_started < definitions.NOTIFICATION_TIME:
+                notification_text = self.notification_text
+                notification_opacity = (
+                    1 - time_since_notification_started / definitions.NOTIFICATION_TIME
+                )
+            else:
+                self.notification_text = None
+                self.display_renderer.mark_dirty()  # One more frame to remove the notification
+        return RenderRequest(
+            tuple(self.active_modes), notification_text, notification_opacity
+        )
+
+    def draw_display_frame(self, ctx, w, h, request):
+        # Call all active modes to write to context
+        for mode in request.active_modes:
+            start_time = self.frame_profiler.start()
+            mode.update_display(ctx, w, h)
+            self.frame_profiler.record(mode.__class__.__name__ + ".update_display", start_time)
+
+        # Show any notifications that should be shown
+        if request.notification_text is not None:
+            start_time = self.frame_profiler.start()
+            show_notification(
+                ctx, request.notification_text, opacity=request.notification_opacity
+            )
+            self.frame_profiler.record("notification", start_time)
+
+        if self.frame_profiler.enabled:
+            show_debug_overlay(ctx, self.frame_profiler.get_overlay_lines())
 
     def check_for_delayed_actions(self):
         # If MIDI not configured, make sure we try sending messages so it gets configured
@@ -798,7 +1016,11 @@ class PyshaApp(object):
 
         # Call dalyed actions in active modes
         for mode in self.active_modes:
+            start_time = self.frame_profiler.start()
             mode.check_for_delayed_actions()
+            self.frame_profiler.record(
+                mode.__class__.__name__ + ".check_for_delayed_actions", start_time
+            )
 
         if self.pads_need_update:
             self.update_push2_pads()
@@ -807,53 +1029,66 @@ class PyshaApp(object):
         if self.buttons_need_update:
             self.update_push2_buttons()
             self.buttons_need_update = False
-    
-    async def queue_tasks(self):
-        for task in self.queue:
-            if task:
-                t = asyncio.create_task(task)
-                self.tasks.add(t)
-                t.add_done_callback(self.tasks.discard)
-            
-            self.queue.remove(task)
 
+    def has_pending_frame_work(self):
+        # True if the next iteration of the main loop has something to draw or update
+        return (
+            self.display_renderer.needs_render(
+                self.active_modes, force=self.notification_text is not None
+            )
+            or self.pads_need_update
+            or self.buttons_need_update
+            or not self.push.midi_is_configured()
+        )
 
     async def run_loop(self):
         print("Pysha is running...")
+        loop = asyncio.get_running_loop()
+        self.current_frame_rate_measurement_second = loop.time()
+        self.frame_clock.start(loop.time())
+        self.input_bus.attach(loop)
 
         while True:
-            before_draw_time = time.time()
+            # Run one-shot timers registered by modes (delayed actions) that are due
+            self.wakeups.run_due()
 
             # Draw ui
             self.update_push2_display()
 
             # Frame rate measurement
-            now = time.time()
+            now = loop.time()
             self.current_frame_rate_measurement += 1
-            if time.time() - self.current_frame_rate_measurement_second > 1.0:
+            if now - self.current_frame_rate_measurement_second > 1.0:
                 self.actual_frame_rate = self.current_frame_rate_measurement
                 self.current_frame_rate_measurement = 0
                 self.current_frame_rate_measurement_second = now
+                self.display_renderer.update_frame_rate_measurement()
+                self.frame_clock.update_measurement()
+                self.input_bus.update_measurement()
+                if self.frame_profiler.enabled:
+                    self.display_renderer.mark_dirty()  # Refresh profiler overlay
                 # Uncomment to display FPS in terminal
                 # print('{0} fps'.format(self.actual_frame_rate))
 
             # Check if any delayed actions need to be applied
             self.check_for_delayed_actions()
 
-            # Schedule tasks from queue
-            await self.queue_tasks()
+            # Send LED changes and OSC messages from this frame
+            self.flush_output()
 
-            after_draw_time = time.time()
+            # Start pending tasks (pipewire commands, device selection...) that fit the scheduler's limits
+            self.task_scheduler.dispatch()
 
-            # Calculate sleep time to aproximate the target frame rate
-            sleep_time = (1.0 / self.target_frame_rate) - (
-                after_draw_time - before_draw_time
-            )
-
-            if sleep_time > 0:
-                await asyncio.sleep(sleep_time)
+            if self.has_pending_frame_work():
+                # Sleep until the next frame deadline. The frame rate is lowered by the governor when the user is idle.
+                await self.frame_clock.wait_for_next_frame(
+                    loop,
+                    self.frame_rate_governor.get_frame_rate(),
+                    sleep=self.frame_rate_governor.sleep,
+                )
             else:
-                await asyncio.sleep(0)
+                # Nothing to draw, sleep until something is marked dirty, a timer is due or the keepalive is needed
+                await self.frame_clock.wait_for_event(loop, self.wakeups.wait)
 
     def on_midi_push_connection_established(self):
         # Do initial configuration of Push
@@ -880,6 +1115,7 @@ class PyshaApp(object):
         # Iterate over modes and (re-)activate them
         for mode in self.active_modes:
             mode.activate()
+        self.display_renderer.mark_dirty()
 
         # Update buttons and pads (just in case something was missing!)
         app.update_push2_buttons()
@@ -913,17 +1149,19 @@ class PyshaApp(object):
     def send_message_cli(self, *args):
         volume_node_id = self.volume_node["id"]
         cli_string = f"pw-cli s {volume_node_id} Props '{{monitorVolumes: {self.volumes}}}'"
-        self.queue.append(asyncio.create_subprocess_shell(cli_string, stdout=asyncio.subprocess.PIPE))
+        self.task_scheduler.submit(
+            asyncio.create_subprocess_shell(cli_string, stdout=asyncio.subprocess.PIPE),
+            priority=PRIORITY_ROUTING,
+            key=("monitorVolumes", volume_node_id),  # Only the latest volumes need to be set
+        )
   
 
-# Bind push action handlers with class methods
+# Bind push action handlers with class methods. These run in push2_python's MIDI thread, so they only post the
+# event to the input bus which hands it over to the asyncio loop (see PyshaApp.on_input_event)
 @push2_python.on_encoder_rotated()
 def on_encoder_rotated(_, encoder_name, increment):
     try:
-        for mode in app.active_modes[::-1]:
-            action_performed = mode.on_encoder_rotated(encoder_name, increment)
-            if action_performed:
-                break  # If mode took action, stop event propagation
+        app.input_bus.post("on_encoder_rotated", (encoder_name, increment), coalesce_key=encoder_name, merge=sum_last_arg)
     except NameError as e:
         print("Error:  {}".format(str(e)))
         traceback.print_exc()
@@ -932,10 +1170,7 @@ def on_encoder_rotated(_, encoder_name, increment):
 @push2_python.on_encoder_touched()
 def on_encoder_touched(_, encoder_name):
     try:
-        for mode in app.active_modes[::-1]:
-            action_performed = mode.on_encoder_touched(encoder_name)
-            if action_performed:
-                break  # If mode took action, stop event propagation
+        app.input_bus.post("on_encoder_touched", (encoder_name,))
     except NameError as e:
         print("Error:  {}".format(str(e)))
         traceback.print_exc()
@@ -944,10 +1179,7 @@ def on_encoder_touched(_, encoder_name):
 @push2_python.on_pad_pressed()
 def on_pad_pressed(_, pad_n, pad_ij, velocity):
     try:
-        for mode in app.active_modes[::-1]:
-            action_performed = mode.on_pad_pressed(pad_n, pad_ij, velocity)
-            if action_performed:
-                break  # If mode took action, stop event propagation
+        app.input_bus.post("on_pad_pressed", (pad_n, pad_ij, velocity))
     except NameError as e:
         print("Error:  {}".format(str(e)))
         traceback.print_exc()
@@ -956,10 +1188,7 @@ def on_pad_pressed(_, pad_n, pad_ij, velocity):
 @push2_python.on_pad_released()
 def on_pad_released(_, pad_n, pad_ij, velocity):
     try:
-        for mode in app.active_modes[::-1]:
-            action_performed = mode.on_pad_released(pad_n, pad_ij, velocity)
-            if action_performed:
-                break  # If mode took action, stop event propagation
+        app.input_bus.post("on_pad_released", (pad_n, pad_ij, velocity))
     except NameError as e:
         print("Error:  {}".format(str(e)))
         traceback.print_exc()
@@ -968,10 +1197,7 @@ def on_pad_released(_, pad_n, pad_ij, velocity):
 @push2_python.on_pad_aftertouch()
 def on_pad_aftertouch(_, pad_n, pad_ij, velocity):
     try:
-        for mode in app.active_modes[::-1]:
-            action_performed = mode.on_pad_aftertouch(pad_n, pad_ij, velocity)
-            if action_performed:
-                break  # If mode took action, stop event propagation
+        app.input_bus.post("on_pad_aftertouch", (pad_n, pad_ij, velocity), coalesce_key=pad_n)
     except NameError as e:
         print("Error:  {}".format(str(e)))
         traceback.print_exc()
@@ -980,10 +1206,7 @@ def on_pad_aftertouch(_, pad_n, pad_ij, velocity):
 @push2_python.on_button_pressed()
 def on_button_pressed(_, name):
     try:
-        for mode in app.active_modes[::-1]:
-            action_performed = mode.on_button_pressed(name)
-            if action_performed:
-                break  # If mode took action, stop event propagation
+        app.input_bus.post("on_button_pressed", (name,))
     except NameError as e:
         print("Error:  {}".format(str(e)))
         traceback.print_exc()
@@ -992,10 +1215,7 @@ def on_button_pressed(_, name):
 @push2_python.on_button_released()
 def on_button_released(_, name):
     try:
-        for mode in app.active_modes[::-1]:
-            action_performed = mode.on_button_released(name)
-            if action_performed:
-                break  # If mode took action, stop event propagation
+        app.input_bus.post("on_button_released", (name,))
     except NameError as e:
         print("Error:  {}".format(str(e)))
         traceback.print_exc()
@@ -1004,10 +1224,7 @@ def on_button_released(_, name):
 @push2_python.on_touchstrip()
 def on_touchstrip(_, value):
     try:
-        for mode in app.active_modes[::-1]:
-            action_performed = mode.on_touchstrip(value)
-            if action_performed:
-                break  # If mode took action, stop event propagation
+        app.input_bus.post("on_touchstrip", (value,), coalesce_key="touchstrip")
     except NameError as e:
         print("Error:  {}".format(str(e)))
         traceback.print_exc()
@@ -1016,10 +1233,7 @@ def on_touchstrip(_, value):
 @push2_python.on_sustain_pedal()
 def on_sustain_pedal(_, sustain_on):
     try:
-        for mode in app.active_modes[::-1]:
-            action_performed = mode.on_sustain_pedal(sustain_on)
-            if action_performed:
-                break  # If mode took action, stop event propagation
+        app.input_bus.post("on_sustain_pedal", (sustain_on,))
     except NameError as e:
         print("Error:  {}".format(str(e)))
         traceback.print_exc()
@@ -1064,7 +1278,10 @@ async def main():
         app.osc_mode.instruments[instrument].query_all_controls()
         app.osc_mode.instruments[instrument].query_devices()
         
-        app.queue.append(app.osc_mode.instruments[instrument].init_devices())
+        app.task_scheduler.submit(
+            app.osc_mode.instruments[instrument].init_devices(),
+            priority=PRIORITY_HOUSEKEEPING,
+        )
         
 
     for instrument in app.external_instruments:
@@ -1076,7 +1293,7 @@ async def main():
 # Run app main loop
 if __name__ == "__main__":
     try:
-        app = PyshaApp()
+        app = PyshaApp(headless="--headless" in sys.argv)
         if midi_connected_received_before_app:
             # App received the "on_midi_connected" call before it was initialized. Do it now!
             print("Missed MIDI initialization call, doing it now...")
@@ -0,0 +1,88 @@
+"""
+Micro-benchmark comparing the old per-frame surface allocation with the persistent FrameBufferPool.
+Run from the repository root with:
+
+    python -m benchmarks.bench_frame_buffers
+"""
+
+import gc
+import time
+import tracemalloc
+import cairo
+import numpy
+import push2_python
+
+from user_interface.frame_buffers import FrameBufferPool
+
+N_FRAMES = 2000
+W = push2_python.constants.DISPLAY_LINE_PIXELS
+H = push2_python.constants.DISPLAY_N_LINES
+
+
+def draw(ctx):
+    ctx.set_source_rgb(1, 1, 1)
+    ctx.rectangle(10, 10, 100, 20)
+    ctx.fill()
+
+
+def frame_with_new_surface():
+    surface = cairo.ImageSurface(cairo.FORMAT_RGB16_565, W, H)
+    ctx = cairo.Context(surface)
+    draw(ctx)
+    buf = surface.get_data()
+    return numpy.ndarray(shape=(H, W), dtype=numpy.uint16, buffer=buf).transpose()
+
+
+def make_frame_with_pool(pool):
+    def frame_with_pool():
+        frame_buffer = pool.next_buffer()
+        draw(frame_buffer.begin())
+        return frame_buffer.end()
+
+    return frame_with_pool
+
+
+def measure_time(frame_func):
+    frame_func()  # Warm up
+    start = time.perf_counter()
+    for _ in range(N_FRAMES):
+        frame_func()
+    return (time.perf_counter() - start) / N_FRAMES
+
+
+def measure_allocations(frame_func):
+    # Returns python objects created and bytes allocated (as seen by tracemalloc) per frame. Note that pixel
+    # memory of new cairo surfaces is allocated by cairo itself and is not included in the bytes count.
+    frame_func()  # Warm up
+    gc.collect()
+    gc.disable()
+    n_objects_before = len(gc.get_objects())
+    tracemalloc.start()
+    allocated = 0
+    frames = []
+    for _ in range(100):
+        tracemalloc.reset_peak()
+        current_before, _ = tracemalloc.get_traced_memory()
+        frames.append(frame_func())  # Keep frames alive so created objects can be counted
+        _, peak = tracemalloc.get_traced_memory()
+        allocated += peak - current_before
+    tracemalloc.stop()
+    n_objects = len(gc.get_objects()) - n_objects_before
+    gc.enable()
+    return n_objects / 100, allocated / 100
+
+
+if __name__ == "__main__":
+    pool = FrameBufferPool(W, H)
+    print("Rendering {0} frames of {1}x{2} pixels".format(N_FRAMES, W, H))
+    for name, frame_func in [
+        ("new surface", frame_with_new_surface),
+        ("buffer pool", make_frame_with_pool(pool)),
+    ]:
+        frame_time = measure_time(frame_func)
+        objects_per_frame, bytes_per_frame = measure_allocations(frame_func)
+        print(
+            "{0:<12} {1:8.1f} us/frame {2:6.1f} objects/frame {3:10.0f} bytes/frame".format(
+                name, frame_time * 1e6, objects_per_frame, bytes_per_frame
+            )
+        )
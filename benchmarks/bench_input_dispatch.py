@@ -0,0 +1,86 @@
+"""
+Input dispatch benchmark: time to handle Push input events with the precompiled dispatch table versus walking
+the active modes like the push2_python callbacks used to (copying app.active_modes[::-1] and calling every mode
+until one takes action). Also compares the encoder index lookup used by modes (dict lookup versus building the
+eight track encoder names list and calling .index on it). Runs against a headless Push, from the repository root:
+
+    python -m benchmarks.bench_input_dispatch [--events N]
+"""
+
+import argparse
+import time
+import push2_python
+
+from app import PyshaApp
+from controllers.dispatch_table import TRACK_ENCODER_INDEX, TRACK_ENCODER_NAMES
+
+EVENTS = [
+    ("on_encoder_rotated", (push2_python.constants.ENCODER_TRACK1_ENCODER, 1)),
+    ("on_encoder_rotated", (push2_python.constants.ENCODER_TRACK1_ENCODER, -1)),
+    ("on_encoder_touched", (push2_python.constants.ENCODER_TRACK5_ENCODER,)),
+    ("on_pad_aftertouch", (36, (7, 0), 64)),
+    ("on_touchstrip", (64,)),
+    ("on_button_released", (push2_python.constants.BUTTON_UPPER_ROW_8,)),
+]
+
+
+def legacy_dispatch(app, name, args):
+    for mode in app.active_modes[::-1]:
+        action_performed = getattr(mode, name)(*args)
+        if action_performed:
+            break
+
+
+def table_dispatch(app, name, args):
+    app.input_dispatch_table.dispatch(name, args, app.active_modes)
+
+
+def time_dispatch(app, dispatch, n_events):
+    start = time.perf_counter()
+    for event_n in range(n_events):
+        name, args = EVENTS[event_n % len(EVENTS)]
+        dispatch(app, name, args)
+    return (time.perf_counter() - start) / n_events
+
+
+def legacy_encoder_index(encoder_name):
+    return [
+        push2_python.constants.ENCODER_TRACK1_ENCODER,
+        push2_python.constants.ENCODER_TRACK2_ENCODER,
+        push2_python.constants.ENCODER_TRACK3_ENCODER,
+        push2_python.constants.ENCODER_TRACK4_ENCODER,
+        push2_python.constants.ENCODER_TRACK5_ENCODER,
+        push2_python.constants.ENCODER_TRACK6_ENCODER,
+        push2_python.constants.ENCODER_TRACK7_ENCODER,
+        push2_python.constants.ENCODER_TRACK8_ENCODER,
+    ].index(encoder_name)
+
+
+def time_encoder_index(lookup, n_events):
+    start = time.perf_counter()
+    for event_n in range(n_events):
+        lookup(TRACK_ENCODER_NAMES[event_n % 8])
+    return (time.perf_counter() - start) / n_events
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--events", type=int, default=100000)
+    args = parser.parse_args()
+
+    app = PyshaApp(headless=True)
+
+    # Warm up (compiles the dispatch table)
+    time_dispatch(app, table_dispatch, len(EVENTS))
+    time_dispatch(app, legacy_dispatch, len(EVENTS))
+
+    results = [
+        ("dispatch: walk modes", time_dispatch(app, legacy_dispatch, args.events)),
+        ("dispatch: table", time_dispatch(app, table_dispatch, args.events)),
+        ("encoder idx: list.index", time_encoder_index(legacy_encoder_index, args.events)),
+        ("encoder idx: dict", time_encoder_index(TRACK_ENCODER_INDEX.get, args.events)),
+    ]
+    print("{0} active modes".format(len(app.active_modes)))
+    print("{0:<26} {1:>10}".format("", "us/event"))
+    for name, seconds_per_event in results:
+        print("{0:<26} {1:10.3f}".format(name, seconds_per_event * 1e6))
@@ -0,0 +1,74 @@
+"""
+OSC receive benchmark: messages per second handled by pythonosc's Dispatcher versus osc.dispatcher.OSCDispatcher
+when thousands of addresses are mapped, as happens once all devices of all instruments are loaded. Feeds encoded
+Surge-like replies to call_handlers_for_packet (what the OSC server does for every datagram received), so the
+numbers include packet parsing and handler calls. Does not need the app, from the repository root:
+
+    python -m benchmarks.bench_osc_dispatch [--addresses N] [--messages N]
+"""
+
+import argparse
+import random
+import time
+
+from pythonosc.dispatcher import Dispatcher
+from pythonosc.osc_message_builder import OscMessageBuilder
+
+from osc.dispatcher import OSCDispatcher
+
+CLIENT_ADDRESS = ("127.0.0.1", 0)
+
+
+def build_addresses(n_addresses):
+    # Surge XT style parameter addresses
+    addresses = []
+    while len(addresses) < n_addresses:
+        n = len(addresses)
+        addresses.append("/param/{0}/osc/{1}/param{2}".format("abcd"[n % 4], (n // 4) % 3 + 1, n))
+    return addresses
+
+
+def build_dgrams(addresses, n_messages):
+    dgrams = []
+    for _ in range(n_messages):
+        builder = OscMessageBuilder(address=random.choice(addresses))
+        builder.add_arg(random.random())
+        builder.add_arg("value")
+        dgrams.append(builder.build().dgram)
+    return dgrams
+
+
+def time_dispatcher(dispatcher, addresses, dgrams):
+    n_handled = [0]
+
+    def set_state(*message):
+        n_handled[0] += 1
+
+    for address in addresses:
+        dispatcher.map(address, set_state)
+    start = time.perf_counter()
+    for dgram in dgrams:
+        dispatcher.call_handlers_for_packet(dgram, CLIENT_ADDRESS)
+    elapsed = time.perf_counter() - start
+    assert n_handled[0] == len(dgrams)
+    return len(dgrams) / elapsed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--addresses", type=int, default=3000)
+    parser.add_argument("--messages", type=int, default=2000)
+    args = parser.parse_args()
+
+    random.seed(0)
+    addresses = build_addresses(args.addresses)
+    dgrams = build_dgrams(addresses, args.messages)
+
+    results = [
+        ("pythonosc Dispatcher", time_dispatcher(Dispatcher(), addresses, dgrams)),
+        ("OSCDispatcher", time_dispatcher(OSCDispatcher(), addresses, dgrams)),
+    ]
+    print("{0} addresses mapped, {1} messages".format(args.addresses, args.messages))
+    print("{0:<22} {1:>12}".format("", "messages/s"))
+    for name, messages_per_second in results:
+        print("{0:<22} {1:12.0f}".format(name, messages_per_second))
@@ -0,0 +1,52 @@
+"""
+OSC send benchmark: time to encode the messages of a parameter sweep with pythonosc's OscMessageBuilder (what
+SimpleUDPClient.send_message does) versus osc.message_encoder.MessageEncoder, which reuses the encoded address and
+type tags of messages sent before. Checks both give the same bytes. Does not need the app, from the repository
+root:
+
+    python -m benchmarks.bench_osc_encode [--addresses N] [--messages N]
+"""
+
+import argparse
+import random
+import time
+
+from osc.message_encoder import MessageEncoder, build_message_dgram
+
+
+def build_messages(n_addresses, n_messages):
+    # Surge XT style parameter changes (encoder turns) mixed with notes
+    addresses = ["/param/{0}/osc/{1}/param{2}".format("abcd"[n % 4], (n // 4) % 3 + 1, n) for n in range(n_addresses)]
+    messages = []
+    for _ in range(n_messages):
+        if random.random() < 0.2:
+            messages.append(("/mnote", [random.randint(36, 96), random.randint(0, 127)]))
+        else:
+            messages.append((random.choice(addresses), random.random()))
+    return messages
+
+
+def time_encode(encode, messages):
+    start = time.perf_counter()
+    dgrams = [encode(address, value) for address, value in messages]
+    elapsed = time.perf_counter() - start
+    return dgrams, len(messages) / elapsed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--addresses", type=int, default=200)
+    parser.add_argument("--messages", type=int, default=50000)
+    args = parser.parse_args()
+
+    random.seed(0)
+    messages = build_messages(args.addresses, args.messages)
+
+    pythonosc_dgrams, pythonosc_rate = time_encode(build_message_dgram, messages)
+    encoder_dgrams, encoder_rate = time_encode(MessageEncoder().encode, messages)
+    assert encoder_dgrams == pythonosc_dgrams
+
+    print("{0} addresses, {1} messages".format(args.addresses, args.messages))
+    print("{0:<22} {1:>12}".format("", "messages/s"))
+    print("{0:<22} {1:12.0f}".format("pythonosc builder", pythonosc_rate))
+    print("{0:<22} {1:12.0f}".format("MessageEncoder", encoder_rate))
@@ -0,0 +1,107 @@
+"""
+Pad latency benchmark: time from a pad press being posted to the input bus (as push2_python's callback does) to
+the /mnote OSC datagram arriving at a local UDP socket standing in for the instrument. Compares the note fast path
+(app.note_output, cached instrument transport and precomputed pad -> note table) with the previous path (building
+the note from pad_ij_to_midi_note and sending it with app.send_midi and app.send_osc), calling the melodic mode
+directly for the latter. Reports latency percentiles. Runs against a headless Push, from the repository root:
+
+    python -m benchmarks.bench_pad_latency [--presses N]
+"""
+
+import argparse
+import socket
+import time
+import mido
+
+from osc.batcher import BatchingUDPClient
+
+from app import PyshaApp
+
+PAD_IJ = (4, 2)
+VELOCITY = 100
+
+
+def legacy_pad_pressed(app, mode, pad_n, pad_ij, velocity):
+    # What MelodicMode.on_pad_pressed did before the fast path (pad feedback included)
+    midi_note = mode.pad_ij_to_midi_note(pad_ij)
+    if app.instrument_selection_mode.get_current_instrument_info().get("illuminate_local_notes", True):
+        mode.add_note_being_played(midi_note, "push")
+    app.send_midi(mido.Message("note_on", note=midi_note, velocity=velocity))
+    instrument = app.instrument_selection_mode.get_current_instrument_short_name()
+    app.send_osc("/mnote", [float(midi_note), float(velocity)], instrument)
+    mode.update_pads_for_note(midi_note)
+    app.flush_output()
+
+
+def legacy_pad_released(app, mode, pad_n, pad_ij, velocity):
+    midi_note = mode.pad_ij_to_midi_note(pad_ij)
+    mode.remove_note_being_played(midi_note, "push")
+    app.send_midi(mido.Message("note_off", note=midi_note, velocity=velocity))
+    instrument = app.instrument_selection_mode.get_current_instrument_short_name()
+    app.send_osc("/mnote/rel", [float(midi_note), float(velocity)], instrument)
+    mode.update_pads_for_note(midi_note)
+    app.flush_output()
+
+
+def fast_pad_pressed(app, mode, pad_n, pad_ij, velocity):
+    # The input bus handles events synchronously when it is not attached to a loop
+    app.input_bus.post("on_pad_pressed", (pad_n, pad_ij, velocity))
+
+
+def fast_pad_released(app, mode, pad_n, pad_ij, velocity):
+    app.input_bus.post("on_pad_released", (pad_n, pad_ij, velocity))
+
+
+def measure(app, mode, sock, pressed, released, n_presses):
+    latencies = []
+    for _ in range(n_presses):
+        start = time.perf_counter()
+        pressed(app, mode, 0, PAD_IJ, VELOCITY)
+        sock.recv(1024)
+        latencies.append(time.perf_counter() - start)
+        released(app, mode, 0, PAD_IJ, 0)
+        sock.recv(1024)
+    latencies.sort()
+    n = len(latencies)
+    return {
+        "p50": latencies[int(0.50 * (n - 1))],
+        "p95": latencies[int(0.95 * (n - 1))],
+        "p99": latencies[int(0.99 * (n - 1))],
+        "max": latencies[-1],
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--presses", type=int, default=5000)
+    args = parser.parse_args()
+
+    app = PyshaApp(headless=True)
+    app.set_melodic_mode()
+    mode = app.melodic_mode
+
+    # Point the OSC client of the current instrument to a local socket
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.bind(("127.0.0.1", 0))
+    sock.settimeout(1.0)
+    instrument = app.instrument_selection_mode.get_current_instrument_short_name()
+    app.osc_mode.instruments[instrument].osc["client"] = BatchingUDPClient("127.0.0.1", sock.getsockname()[1])
+    app.note_output.invalidate()
+
+    # Warm up
+    measure(app, mode, sock, legacy_pad_pressed, legacy_pad_released, 100)
+    measure(app, mode, sock, fast_pad_pressed, fast_pad_released, 100)
+
+    results = [
+        ("send_midi + send_osc", measure(app, mode, sock, legacy_pad_pressed, legacy_pad_released, args.presses)),
+        ("input bus + note_output", measure(app, mode, sock, fast_pad_pressed, fast_pad_released, args.presses)),
+    ]
+    print("Pad press to datagram latency, {0} presses, instrument {1}".format(args.presses, instrument))
+    print("{0:<26} {1:>8} {2:>8} {3:>8} {4:>8}".format("us", "p50", "p95", "p99", "max"))
+    for name, stats in results:
+        print(
+            "{0:<26} {1:8.1f} {2:8.1f} {3:8.1f} {4:8.1f}".format(
+                name, stats["p50"] * 1e6, stats["p95"] * 1e6, stats["p99"] * 1e6, stats["max"] * 1e6
+            )
+        )
+    print(app.note_output.get_stats())
@@ -0,0 +1,181 @@
+"""
+Rendering benchmark that runs the real modes against a headless Push (no hardware needed). Each scenario
+activates a mode, changes its state every frame the way a user would (rotating encoders, switching devices or
+pages) and renders the result. Reports frames per second and allocations per frame. Run from the repository root
+(instrument definitions are loaded from ./definitions) with:
+
+    python -m benchmarks.bench_rendering [--frames N] [--png OUTPUT_DIR]
+
+With --png, the last frame of every scenario is saved to OUTPUT_DIR for visual inspection.
+"""
+
+import argparse
+import gc
+import os
+import time
+import tracemalloc
+import push2_python
+
+from app import PyshaApp
+from user_interface.headless_push import save_frame_as_png
+
+TRACK_ENCODERS = [
+    push2_python.constants.ENCODER_TRACK1_ENCODER,
+    push2_python.constants.ENCODER_TRACK2_ENCODER,
+    push2_python.constants.ENCODER_TRACK3_ENCODER,
+    push2_python.constants.ENCODER_TRACK4_ENCODER,
+    push2_python.constants.ENCODER_TRACK5_ENCODER,
+    push2_python.constants.ENCODER_TRACK6_ENCODER,
+    push2_python.constants.ENCODER_TRACK7_ENCODER,
+    push2_python.constants.ENCODER_TRACK8_ENCODER,
+]
+
+
+def encoder_sweep(mode, frame_n):
+    # Rotate one encoder at a time, back and forth, like a user tweaking parameters
+    encoder_name = TRACK_ENCODERS[(frame_n // 20) % len(TRACK_ENCODERS)]
+    increment = 1 if (frame_n // 10) % 2 == 0 else -1
+    mode.on_encoder_rotated(encoder_name, increment)
+
+
+def select_device(app, device_label=None, instrument_page=0):
+    app.osc_mode.instrument_page = instrument_page
+    devices = app.osc_mode.get_current_instrument_page_devices()
+    for idx, device in enumerate(devices):
+        if device_label is None or device.label == device_label:
+            app.osc_mode.current_device_index_and_page = [idx, 0]
+            return device
+    return None
+
+
+def setup_osc_mode(app):
+    select_device(app)
+
+    def step(frame_n):
+        if frame_n % 50 == 0:
+            # Switch to the next device every now and then
+            n_devices = len(app.osc_mode.get_current_instrument_page_devices())
+            app.osc_mode.current_device_index_and_page = [(frame_n // 50) % n_devices, 0]
+        encoder_sweep(app.osc_mode, frame_n)
+
+    return step, None
+
+
+def setup_mod_matrix(app):
+    for instrument_page in [0, 1]:
+        if select_device(app, "Mod Matrix", instrument_page=instrument_page) is not None:
+            break
+    else:
+        return None
+
+    def step(frame_n):
+        encoder_sweep(app.osc_mode, frame_n)
+
+    def teardown():
+        select_device(app)
+
+    return step, teardown
+
+
+def setup_preset_selection_mode(app):
+    app.toggle_preset_selection_mode()
+
+    def step(frame_n):
+        # Browse through the first levels of the patch tree
+        encoder_sweep_levels = TRACK_ENCODERS[:3]
+        encoder_name = encoder_sweep_levels[(frame_n // 30) % len(encoder_sweep_levels)]
+        app.preset_selection_mode.on_encoder_rotated(encoder_name, 1 if frame_n % 60 < 30 else -1)
+
+    def teardown():
+        app.toggle_preset_selection_mode()
+
+    return step, teardown
+
+
+def setup_settings_mode(app):
+    app.toggle_and_rotate_settings_mode()
+
+    def step(frame_n):
+        if frame_n % 50 == 0:
+            app.settings_mode.current_page = (frame_n // 50) % 3
+
+    def teardown():
+        app.active_modes = [mode for mode in app.active_modes if mode != app.settings_mode]
+
+    return step, teardown
+
+
+SCENARIOS = [
+    ("OSCMode", setup_osc_mode),
+    ("ModMatrixDevice", setup_mod_matrix),
+    ("PresetSelectionMode", setup_preset_selection_mode),
+    ("SettingsMode", setup_settings_mode),
+]
+
+
+def render_frame(app, step, frame_n):
+    step(frame_n)
+    app.display_renderer.mark_dirty()  # Measure full redraws, even if the step did not change anything
+    app.update_push2_display()
+
+
+def run_scenario(app, step, n_frames):
+    # Warm up caches (text tiles, slider sprites) so that steady state is measured
+    for frame_n in range(n_frames // 10):
+        render_frame(app, step, frame_n)
+
+    start = time.perf_counter()
+    for frame_n in range(n_frames):
+        render_frame(app, step, frame_n)
+    fps = n_frames / (time.perf_counter() - start)
+
+    # Bytes allocated while rendering each frame (as seen by tracemalloc, pixel memory allocated by cairo itself
+    # is not included) and python objects that survive each frame
+    gc.collect()
+    n_objects_before = len(gc.get_objects())
+    tracemalloc.start()
+    allocated = 0
+    n_alloc_frames = min(n_frames, 100)
+    for frame_n in range(n_alloc_frames):
+        tracemalloc.reset_peak()
+        current_before, _ = tracemalloc.get_traced_memory()
+        render_frame(app, step, frame_n)
+        _, peak = tracemalloc.get_traced_memory()
+        allocated += peak - current_before
+    tracemalloc.stop()
+    gc.collect()
+    n_objects_retained = len(gc.get_objects()) - n_objects_before
+    return fps, allocated / n_alloc_frames, n_objects_retained / n_alloc_frames
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--frames", type=int, default=500)
+    parser.add_argument("--png", default=None, help="Directory where to save last frame of each scenario")
+    args = parser.parse_args()
+
+    app = PyshaApp(headless=True)
+    app.use_push2_display = True
+
+    results = []
+    for name, setup in SCENARIOS:
+        setup_result = setup(app)
+        if setup_result is None:
+            print("Skipping {0}: not available with current instrument definitions".format(name))
+            continue
+        step, teardown = setup_result
+
+        fps, bytes_per_frame, objects_per_frame = run_scenario(app, step, args.frames)
+        results.append((name, fps, bytes_per_frame, objects_per_frame))
+
+        if args.png is not None:
+            os.makedirs(args.png, exist_ok=True)
+            save_frame_as_png(app.push.display.last_frame, os.path.join(args.png, name + ".png"))
+        if teardown is not None:
+            teardown()
+
+    print("{0:<20} {1:>8} {2:>14} {3:>16}".format("scenario", "fps", "peak B/frame", "objects/frame"))
+    for name, fps, bytes_per_frame, objects_per_frame in results:
+        print(
+            "{0:<20} {1:8.1f} {2:14.0f} {3:16.2f}".format(name, fps, bytes_per_frame, objects_per_frame)
+        )
@@ -0,0 +1,65 @@
+from controllers import push2_constants
+
+# Push input callbacks implemented by modes (see definitions.PyshaMode)
+INPUT_HANDLER_NAMES = (
+    "on_encoder_rotated",
+    "on_encoder_touched",
+    "on_button_pressed",
+    "on_button_released",
+    "on_pad_pressed",
+    "on_pad_released",
+    "on_pad_aftertouch",
+    "on_touchstrip",
+    "on_sustain_pedal",
+)
+
+TRACK_ENCODER_NAMES = (
+    push2_constants.ENCODER_TRACK1_ENCODER,
+    push2_constants.ENCODER_TRACK2_ENCODER,
+    push2_constants.ENCODER_TRACK3_ENCODER,
+    push2_constants.ENCODER_TRACK4_ENCODER,
+    push2_constants.ENCODER_TRACK5_ENCODER,
+    push2_constants.ENCODER_TRACK6_ENCODER,
+    push2_constants.ENCODER_TRACK7_ENCODER,
+    push2_constants.ENCODER_TRACK8_ENCODER,
+)
+
+# Encoder name -> column index (0-7) of the encoders above the display, other encoders are not included
+TRACK_ENCODER_INDEX = {name: idx for idx, name in enumerate(TRACK_ENCODER_NAMES)}
+
+
+class InputDispatchTable(object):
+    """For each input callback, the chain of bound handlers of the active modes that implement it, topmost
+    (last activated) mode first. Modes that do not override the no-op handler of base_class are left out of the
+    chain as they can never take action. The table is compiled on first use after invalidate() is called, which
+    the app does whenever the active modes change, so dispatching an event does not copy or walk the mode list."""
+
+    def __init__(self, base_class):
+        self.base_class = base_class
+        self.chains = None
+        self.rebuilds = 0
+
+    def invalidate(self):
+        self.chains = None
+
+    def rebuild(self, active_modes):
+        chains = {}
+        for name in INPUT_HANDLER_NAMES:
+            base_handler = getattr(self.base_class, name)
+            chains[name] = tuple(
+                getattr(mode, name)
+                for mode in reversed(active_modes)
+                if getattr(type(mode), name, base_handler) is not base_handler
+            )
+        self.chains = chains
+        self.rebuilds += 1
+
+    def dispatch(self, name, args, active_modes):
+        """Calls the handlers in the chain of the given callback until one takes action. Returns True if a mode
+        took action."""
+        if self.chains is None:
+            self.rebuild(active_modes)
+        for handler in self.chains[name]:
+            if handler(*args):
+                return True  # If mode took action, stop event propagation
+        return False
@@ -0,0 +1,104 @@
+import json
+import os
+import time
+
+ACCELERATION_DEFINITIONS_FILE = "./definitions/encoder_acceleration.json"
+
+# Settings used for control types (and keys) not present in the definitions file
+DEFAULT_ACCELERATION = {
+    "threshold": 10.0,  # Speed (detents per second) above which increments start being multiplied
+    "saturation": 50.0,  # Speed at which max_multiplier is reached
+    "max_multiplier": 1.0,  # 1.0 means no acceleration
+    "curve": 1.0,  # Shape of the ramp between threshold and saturation (1 linear, >1 gentler at low speeds)
+    "fine_divisor": 1.0,  # Increments are divided by this while shift is held
+}
+
+# Decimal places used to round scaled increments in fine mode (see osc_controls.scale_value)
+FINE_DECIMAL_PLACES = 4
+
+# Events of the same control closer than this are considered simultaneous when measuring speed (seconds)
+MIN_EVENT_INTERVAL = 0.005
+
+_current_acceleration = None
+
+
+def load_acceleration_definitions(filename=ACCELERATION_DEFINITIONS_FILE):
+    if not os.path.exists(filename):
+        return {}
+    return json.load(open(filename))
+
+
+_acceleration_definitions = load_acceleration_definitions()
+
+
+class AccelerationCurve(object):
+    """Increment multiplier as a function of encoder speed, compiled once per control from its settings"""
+
+    def __init__(self, threshold, saturation, max_multiplier, curve, fine_divisor):
+        self.threshold = float(threshold)
+        self.speed_range = max(float(saturation) - self.threshold, 1e-6)
+        self.extra_multiplier = float(max_multiplier) - 1.0
+        self.curve = float(curve)
+        self.fine_divisor = float(fine_divisor)
+
+    def multiplier(self, speed):
+        if self.extra_multiplier <= 0 or speed <= self.threshold:
+            return 1.0
+        position = min((speed - self.threshold) / self.speed_range, 1.0)
+        return 1.0 + self.extra_multiplier * position**self.curve
+
+
+def get_acceleration_curve(config):
+    """Builds the acceleration curve of a control from its definition. Settings are taken from the defaults,
+    then the "default" and control type ("control-range", "control-menu"...) entries of the acceleration
+    definitions file and finally from the "acceleration" entry of the control definition itself."""
+    settings = dict(DEFAULT_ACCELERATION)
+    settings.update(_acceleration_definitions.get("default", {}))
+    settings.update(_acceleration_definitions.get(config.get("$type"), {}))
+    settings.update(config.get("acceleration", {}))
+    return AccelerationCurve(**{key: settings[key] for key in DEFAULT_ACCELERATION})
+
+
+def accelerate_increment(curve, key, increment):
+    """Applies the current encoder acceleration (if any) to an increment of the control identified by key"""
+    if _current_acceleration is None:
+        return increment
+    return _current_acceleration.accelerate(curve, key, increment)
+
+
+def fine_mode_active():
+    return _current_acceleration is not None and _current_acceleration.fine_mode
+
+
+class EncoderAcceleration(object):
+    """Turns encoder increments into parameter increments. Speed is measured per control from the time between
+    consecutive events (increments already include detents summed by the input bus), and increments are
+    multiplied according to the control's acceleration curve, so big sweeps take fewer turns and messages. While
+    shift is held (fine mode) increments are divided instead, for precise edits."""
+
+    def __init__(self, clock=time.monotonic):
+        global _current_acceleration
+        _current_acceleration = self
+
+        self.clock = clock
+        self.last_event_time = {}
+        self.fine_mode = False
+        self.fine_mode_used = False  # Some control was edited since fine mode was last enabled
+
+    def set_fine_mode(self, enabled):
+        if enabled and not self.fine_mode:
+            self.fine_mode_used = False
+        self.fine_mode = enabled
+
+    def accelerate(self, curve, key, increment):
+        now = self.clock()
+        last_event_time = self.last_event_time.get(key)
+        self.last_event_time[key] = now
+
+        if self.fine_mode:
+            self.fine_mode_used = True
+            return increment / curve.fine_divisor
+        if last_event_time is None:
+            return increment
+        speed = abs(increment) / max(now - last_event_time, MIN_EVENT_INTERVAL)
+        return increment * curve.multiplier(speed)
@@ -0,0 +1,86 @@
+import traceback
+
+# Min time between two messages sent for the same control while an encoder is being turned (seconds)
+DEFAULT_SEND_WINDOW = 0.05
+
+_current_accumulator = None
+
+
+def send_accumulated(send_func, *args, key=None):
+    """Sends a control value with send_func(*args) through the current encoder accumulator (or straight away if
+    there is none). Messages with the same key (by default send_func and the first argument, normally the OSC
+    address) are coalesced."""
+    if _current_accumulator is None:
+        return send_func(*args)
+    if key is None:
+        key = (send_func, args[0] if args else None)
+    _current_accumulator.send(key, send_func, args)
+
+
+class EncoderAccumulator(object):
+    """Limits the messages sent while encoders are being turned without ever dropping the final value. The first
+    message for a control is sent straight away and opens a window of `window` seconds for that control. Messages
+    sent while the window is open replace each other and only the latest one is sent, when the window closes
+    (trailing edge), which opens a new window. A fast sweep therefore sends at most one message per window and
+    always ends with the last value. Increments of the same encoder within a main loop tick are already summed by
+    the input bus, here values are coalesced across ticks.
+
+    call_later(delay, callback, key=None) schedules the end of the windows, normally Wakeups.call_later."""
+
+    def __init__(self, call_later, window=DEFAULT_SEND_WINDOW):
+        global _current_accumulator
+        _current_accumulator = self
+
+        self.call_later = call_later
+        self.window = window
+        self.open_windows = {}  # key -> (send_func, args) waiting for the end of the window, or None
+
+        # Counters
+        self.messages_requested = 0
+        self.messages_sent = 0
+        self.messages_saved = 0  # Messages replaced by a newer value for the same control before being sent
+
+    def send(self, key, send_func, args):
+        self.messages_requested += 1
+        if self.window <= 0:
+            self._send(send_func, args)
+            return
+        if key in self.open_windows:
+            if self.open_windows[key] is not None:
+                self.messages_saved += 1
+            self.open_windows[key] = (send_func, args)
+            return
+        self.open_windows[key] = None
+        self._send(send_func, args)
+        self._schedule_window_end(key)
+
+    def _schedule_window_end(self, key):
+        self.call_later(
+            self.window,
+            lambda: self.close_window(key),
+            key=("encoder_accumulator", key),
+        )
+
+    def _send(self, send_func, args):
+        self.messages_sent += 1
+        send_func(*args)
+
+    def close_window(self, key):
+        pending = self.open_windows.pop(key, None)
+        if pending is None:
+            return
+        # Trailing edge, send the latest value and keep pacing in case the encoder is still being turned
+        self.open_windows[key] = None
+        self._schedule_window_end(key)
+        try:
+            self._send(*pending)
+        except Exception:
+            traceback.print_exc()
+
+    def get_stats(self):
+        return {
+            "window": self.window,
+            "messages_requested": self.messages_requested,
+            "messages_sent": self.messages_sent,
+            "messages_saved": self.messages_saved,
+        }
@@ -0,0 +1,132 @@
+import threading
+import time
+import traceback
+from collections import deque
+
+LATENCY_WINDOW_SIZE = 300
+
+
+def sum_last_arg(old_args, new_args):
+    # Encoder rotations: add up increments
+    return new_args[:-1] + (old_args[-1] + new_args[-1],)
+
+
+def keep_latest(old_args, new_args):
+    # Aftertouch, touchstrip...: only the most recent value matters
+    return new_args
+
+
+class InputBus(object):
+    """Hands input events received in push2_python's MIDI thread over to the asyncio loop. post() timestamps the
+    event and queues it, and the first event of a batch schedules a flush in the loop with call_soon_threadsafe.
+    All events queued by the time the flush runs are handled in one go, in arrival order, by calling
+    handler(name, args) in the loop thread. This way modes never see input in the middle of drawing a frame.
+
+    Events posted with a coalesce_key are merged with a queued event with the same key (using merge(old_args,
+    new_args)), e.g. several rotations of the same encoder become a single rotation with the summed increment.
+    Events without a key (button/pad presses) act as barriers: nothing posted after them is merged into an event
+    queued before them, so the relative order of presses and rotations is preserved.
+
+    The time from an event being posted (the first one, for merged events) to it being handled is kept in a
+    rolling window and summarised once per second by update_measurement().
+
+    after_flush() (if given) is called once after each batch of events has been handled, e.g. to send the LED
+    changes the handlers made without waiting for the next frame."""
+
+    def __init__(self, handler, window_size=LATENCY_WINDOW_SIZE, after_flush=None):
+        self.handler = handler
+        self.after_flush = after_flush
+        self.loop = None
+        self.lock = threading.Lock()
+        self.queued = []  # [name, args, post_time]
+        self.coalescible = {}  # (name, coalesce_key) -> queued event that can still be merged into
+        self.flush_scheduled = False
+        self.latency_samples = deque(maxlen=window_size)
+
+        # Counters
+        self.events_posted = 0
+        self.events_coalesced = 0
+        self.events_handled = 0
+        self.max_latency = 0.0
+        self.latency_stats = {"p50": 0.0, "p95": 0.0, "max": 0.0}
+
+    def attach(self, loop):
+        # Until a loop is attached events are handled synchronously in the thread that posts them
+        self.loop = loop
+
+    def post(self, name, args, coalesce_key=None, merge=keep_latest):
+        post_time = time.perf_counter()
+        if self.loop is None:
+            self.events_posted += 1
+            self.handle(name, args, post_time)
+            self.call_after_flush()
+            return
+
+        with self.lock:
+            self.events_posted += 1
+            if coalesce_key is None:
+                self.queued.append([name, args, post_time])
+                self.coalescible.clear()
+            else:
+                key = (name, coalesce_key)
+                event = self.coalescible.get(key)
+                if event is not None:
+                    event[1] = merge(event[1], args)
+                    self.events_coalesced += 1
+                else:
+                    event = [name, args, post_time]
+                    self.queued.append(event)
+                    self.coalescible[key] = event
+            if self.flush_scheduled:
+                return
+            self.flush_scheduled = True
+        self.loop.call_soon_threadsafe(self.flush)
+
+    def flush(self):
+        with self.lock:
+            queued = self.queued
+            self.queued = []
+            self.coalescible.clear()
+            self.flush_scheduled = False
+        for name, args, post_time in queued:
+            self.handle(name, args, post_time)
+        self.call_after_flush()
+
+    def call_after_flush(self):
+        if self.after_flush is None:
+            return
+        try:
+            self.after_flush()
+        except Exception:
+            traceback.print_exc()
+
+    def handle(self, name, args, post_time):
+        latency = time.perf_counter() - post_time
+        self.latency_samples.append(latency)
+        self.max_latency = max(self.max_latency, latency)
+        self.events_handled += 1
+        try:
+            self.handler(name, args)
+        except Exception:
+            traceback.print_exc()
+
+    def update_measurement(self):
+        # Called once per second by the main loop
+        sorted_samples = sorted(self.latency_samples)
+        n = len(sorted_samples)
+        if n == 0:
+            return
+        self.latency_stats = {
+            "p50": sorted_samples[int(0.50 * (n - 1))],
+            "p95": sorted_samples[int(0.95 * (n - 1))],
+            "max": sorted_samples[-1],
+        }
+
+    def get_stats(self):
+        return dict(
+            self.latency_stats,
+            events_posted=self.events_posted,
+            events_coalesced=self.events_coalesced,
+            events_handled=self.events_handled,
+            max_latency_ever=self.max_latency,
+        )
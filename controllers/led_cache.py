@@ -0,0 +1,142 @@
+import threading
+
+from controllers.pad_colors import PadColorModel
+from scheduling.wakeups import notify_wakeups
+
+
+def led_state(color, args, kwargs):
+    # What an LED shows: its colour plus the animation arguments it was set with
+    return (color, args, tuple(sorted(kwargs.items())))
+
+
+class ButtonColorModel(object):
+    """Colours of the button LEDs as last sent to Push, by button name. Same interface as
+    controllers.pad_colors.PadColorModel. Buttons not set since fill() are known to show the filled colour."""
+
+    def __init__(self):
+        self.colors = {}
+        self.default_color = None  # Colour of buttons not in self.colors (None = unknown)
+
+    def invalidate(self):
+        self.colors = {}
+        self.default_color = None
+
+    def fill(self, color):
+        self.colors = {}
+        self.default_color = color
+
+    def set_color(self, button_name, color):
+        if self.colors.get(button_name, self.default_color) == color:
+            return False
+        self.colors[button_name] = color
+        return True
+
+
+class LedCache(object):
+    """Shadow state of a section of Push LEDs (buttons or pads) placed between the modes and push2_python. Modes
+    keep calling the usual push2_python methods, which only record the wanted state of each LED. flush(), called
+    once per frame by the main loop (and after each batch of input events), sends the LEDs whose wanted state
+    differs from what the hardware shows. Setting an LED to what it already shows, or setting it several times
+    before a flush, costs no MIDI messages. Methods that are not cached are forwarded to the wrapped section.
+
+    Setting all LEDs at once (e.g. when Push connects) is sent straight away and becomes the known state of every
+    LED. Until then the state of LEDs is unknown and the first update of each one is always sent.
+
+    What the hardware shows is kept in `model` (a ButtonColorModel or PadColorModel). send_led(key, color, *args,
+    **kwargs) sends one LED (section.set_button_color or set_pad_color). The model is updated and the LEDs are
+    sent while holding the lock, so the model always records what was last sent, whichever thread flushes or
+    sets all LEDs."""
+
+    def __init__(self, section, model, send_led):
+        self._section = section
+        self._lock = threading.Lock()  # The sequencer updates pads from its own thread
+        self.model = model
+        self.send_led = send_led
+        self.pending = {}  # key -> state wanted at the next flush
+
+        # Counters
+        self.messages_sent = 0
+        self.messages_suppressed = 0  # Updates that did not need a MIDI message
+
+    def __getattr__(self, name):
+        return getattr(self._section, name)
+
+    def set_led(self, key, state):
+        with self._lock:
+            if key in self.pending:
+                self.messages_suppressed += 1
+            first_pending = not self.pending
+            self.pending[key] = state
+        if first_pending:
+            notify_wakeups()
+
+    def set_all_leds(self, state, send_all):
+        with self._lock:
+            self.messages_suppressed += len(self.pending)
+            self.pending = {}
+            self.model.fill(state)
+            send_all()
+            self.messages_sent += 1
+
+    def invalidate(self):
+        # Hardware state unknown (e.g. Push reconnected), next updates are all sent
+        with self._lock:
+            self.model.invalidate()
+
+    def flush(self):
+        with self._lock:
+            pending = self.pending
+            self.pending = {}
+            n_sent = 0
+            for key, state in pending.items():
+                if not self.model.set_color(key, state):
+                    self.messages_suppressed += 1
+                    continue
+                color, args, kwargs = state
+                self.send_led(key, color, *args, **dict(kwargs))
+                n_sent += 1
+            self.messages_sent += n_sent
+        return n_sent
+
+    def get_stats(self):
+        return {
+            "messages_sent": self.messages_sent,
+            "messages_suppressed": self.messages_suppressed,
+        }
+
+
+class ButtonLedCache(LedCache):
+    """LedCache for push.buttons"""
+
+    def __init__(self, section):
+        super().__init__(section, ButtonColorModel(), section.set_button_color)
+
+    def set_button_color(self, button_name, color="white", *args, **kwargs):
+        self.set_led(button_name, led_state(color, args, kwargs))
+
+    def set_all_buttons_color(self, color="white", *args, **kwargs):
+        self.set_all_leds(
+            led_state(color, args, kwargs),
+            lambda: self._section.set_all_buttons_color(color, *args, **kwargs),
+        )
+
+
+class PadLedCache(LedCache):
+    """LedCache for push.pads, pads are identified by their (i, j) position"""
+
+    def __init__(self, section):
+        super().__init__(section, PadColorModel(), section.set_pad_color)
+
+    def set_pad_color(self, pad_ij, color="white", *args, **kwargs):
+        self.set_led(tuple(pad_ij), led_state(color, args, kwargs))
+
+    def set_pads_color(self, color_matrix, *args, **kwargs):
+        for i, row_colors in enumerate(color_matrix):
+            for j, color in enumerate(row_colors):
+                self.set_led((i, j), led_state(color, args, kwargs))
+
+    def set_all_pads_to_color(self, color="white", *args, **kwargs):
+        self.set_all_leds(
+            led_state(color, args, kwargs),
+            lambda: self._section.set_all_pads_to_color(color, *args, **kwargs),
+        )
@@ -0,0 +1,87 @@
+import mido
+
+
+class NoteTransport(object):
+    """Where the notes of an instrument go, resolved once when the instrument (or MIDI out channel) changes"""
+
+    __slots__ = ("instrument_short_name", "midi_channel", "send_osc", "illuminate_local_notes")
+
+    def __init__(self, instrument_short_name, midi_channel, send_osc, illuminate_local_notes):
+        self.instrument_short_name = instrument_short_name
+        self.midi_channel = midi_channel  # 0-15
+        self.send_osc = send_osc  # None if the instrument has no OSC client
+        self.illuminate_local_notes = illuminate_local_notes
+
+
+class NoteOutput(object):
+    """Fast path from pad presses to note messages. Sends a note as a MIDI message built directly on the right
+    channel (instead of app.send_midi copying it) and as an /mnote OSC message, to the current instrument. The
+    instrument's channel and OSC client are resolved once and cached as a NoteTransport, which is only resolved
+    again when the selected instrument or the MIDI out channel setting change (or after invalidate())."""
+
+    def __init__(self, app):
+        self.app = app
+        self.transport = None
+        self.transport_key = None
+
+        # Counters
+        self.notes_sent = 0
+        self.transports_resolved = 0
+
+    def invalidate(self):
+        self.transport_key = None
+
+    def get_transport(self):
+        transport_key = (self.app.instrument_selection_mode.selected_instrument, self.app.midi_out_channel)
+        if transport_key != self.transport_key:
+            self.transport = self.resolve_transport()
+            self.transport_key = transport_key
+        return self.transport
+
+    def resolve_transport(self):
+        self.transports_resolved += 1
+        instrument_info = self.app.instrument_selection_mode.get_current_instrument_info()
+        instrument_short_name = instrument_info["instrument_short_name"]
+
+        # Same channel rules as app.send_midi
+        midi_channel = self.app.midi_out_channel
+        if midi_channel == -1:
+            instrument_midi_channel = instrument_info["midi_channel"]
+            midi_channel = 0 if instrument_midi_channel == -1 else instrument_midi_channel - 1
+
+        # Same client as app.send_osc with an instrument name. Notes skip the OSC batching (see osc.batcher).
+        osc_client = self.app.osc_mode.instruments[instrument_short_name].osc.get("client", None)
+        send_osc = None
+        if osc_client is not None:
+            send_osc = getattr(osc_client, "send_message_now", osc_client.send_message)
+
+        return NoteTransport(
+            instrument_short_name,
+            midi_channel,
+            send_osc,
+            instrument_info.get("illuminate_local_notes", True),
+        )
+
+    def send_note(self, note_type, osc_address, midi_note, velocity, osc_velocity=None):
+        transport = self.get_transport()
+        midi_out = self.app.midi_out
+        if midi_out is not None:
+            midi_out.send(mido.Message(note_type, channel=transport.midi_channel, note=midi_note, velocity=velocity))
+        if transport.send_osc is not None:
+            transport.send_osc(
+                osc_address,
+                [float(midi_note), float(velocity if osc_velocity is None else osc_velocity)],
+            )
+        self.notes_sent += 1
+
+    def note_on(self, midi_note, velocity, osc_velocity=None):
+        self.send_note("note_on", "/mnote", midi_note, velocity, osc_velocity)
+
+    def note_off(self, midi_note, velocity):
+        self.send_note("note_off", "/mnote/rel", midi_note, velocity)
+
+    def get_stats(self):
+        return {
+            "notes_sent": self.notes_sent,
+            "transports_resolved": self.transports_resolved,
+        }
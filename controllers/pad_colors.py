@@ -0,0 +1,29 @@
+N_PAD_ROWS = 8
+N_PAD_COLUMNS = 8
+
+
+class PadColorModel(object):
+    """Colours of the 8x8 pads as last sent to Push. set_color() records the colour of a pad and tells whether it
+    changed (i.e. whether the pad has to be sent). invalidate() must be called when the pads may have been changed
+    by other means (e.g. Push reconnected), the next colour of every pad then counts as a change. fill() records
+    that all pads were set to a colour.
+
+    Colours are compared with ==, controllers.led_cache.PadLedCache stores colours with their animation
+    arguments here."""
+
+    def __init__(self):
+        self.colors = [[None] * N_PAD_COLUMNS for _ in range(N_PAD_ROWS)]
+
+    def invalidate(self):
+        self.colors = [[None] * N_PAD_COLUMNS for _ in range(N_PAD_ROWS)]
+
+    def fill(self, color):
+        self.colors = [[color] * N_PAD_COLUMNS for _ in range(N_PAD_ROWS)]
+
+    def set_color(self, pad_ij, color):
+        i, j = pad_ij
+        row = self.colors[i]
+        if row[j] == color:
+            return False
+        row[j] = color
+        return True
@@ -7,12 +7,16 @@ from osc_controls import (
 import push2_python
 import logging
 import asyncio
+from scheduling.task_scheduler import PRIORITY_ROUTING
+from controllers.dispatch_table import TRACK_ENCODER_INDEX
+from controllers.encoder_accumulator import send_accumulated
+from osc.query_scheduler import send_query
 from definitions import PyshaMode
+from user_interface.display_renderer import mark_display_dirty
 from engine import connectPipewireSourceToPipewireDest
 from engine import disconnectPipewireSourceFromPipewireDest
 logger = logging.getLogger("osc_device")
 # logger.setLevel(level=logging.DEBUG)
-from ratelimit import limits
 
 
 class AudioInDevice(PyshaMode):
@@ -75,6 +79,7 @@ class AudioInDevice(PyshaMode):
         self.osc = osc
         self.label = config.get("name", "Device")
         self.dispatcher = osc.get("dispatcher", None)
+        self.parameters = osc.get("parameters", None)  # Only for controls of actual OSC parameters
         self.instrument_ports = []
         self.slot = config.get("slot", None)
         self.log_in = logger.getChild(f"in-{kwargs['osc_in_port']}")
@@ -97,6 +102,7 @@ class AudioInDevice(PyshaMode):
             },
             self.get_color,
             self.send_message,
+            parameters=self.parameters,
         )
         self.dispatcher.map(
             audio_channel_control.address, audio_channel_control.set_state
@@ -113,6 +119,7 @@ class AudioInDevice(PyshaMode):
             },
             self.get_color,
             self.send_message,
+            parameters=self.parameters,
         )
         self.dispatcher.map(audio_gain_control.address, audio_gain_control.set_state)
         self.controls.append(audio_gain_control)
@@ -179,6 +186,7 @@ class AudioInDevice(PyshaMode):
             },
             self.get_color,
             self.send_message,
+            parameters=self.parameters,
         )
         self.dispatcher.map(low_cut_control.address, low_cut_control.set_state)
         self.controls.append(low_cut_control)
@@ -193,6 +201,7 @@ class AudioInDevice(PyshaMode):
             },
             self.get_color,
             self.send_message,
+            parameters=self.parameters,
         )
         self.dispatcher.map(high_cut_control.address, high_cut_control.set_state)
         self.controls.append(high_cut_control)
@@ -202,6 +211,7 @@ class AudioInDevice(PyshaMode):
         # self.update()
 
     def update(self):
+        mark_display_dirty()  # Menu items below are rebuilt with the current engine PIDs
         name = self.engine.instrument["instrument_name"]
         control_def = {
             "$type": "control-switch",
@@ -327,7 +337,6 @@ class AudioInDevice(PyshaMode):
         return self.osc["client"].send_message(*args)
     
     
-    @limits(calls=1, period=0.1)
     def send_message_cli(self, *args):
         duplex_node = self.engine.duplex_node
         channel_volumes = []
@@ -337,7 +346,11 @@ class AudioInDevice(PyshaMode):
             channel_volumes.extend([val, val])
         device_id = duplex_node["id"]
         cli_string = f"pw-cli s {device_id} Props '{{monitorVolumes: {channel_volumes}}}'"
-        self.app.queue.append(asyncio.create_subprocess_shell(cli_string, stdout=asyncio.subprocess.PIPE))
+        self.app.task_scheduler.submit(
+            asyncio.create_subprocess_shell(cli_string, stdout=asyncio.subprocess.PIPE),
+            priority=PRIORITY_ROUTING,
+            key=("monitorVolumes", device_id),  # Only the latest volumes need to be set
+        )
 
 
     def update_input_gains(self):
@@ -455,6 +468,14 @@ class AudioInDevice(PyshaMode):
     #         # connectPipewireSourceToPipewireDest()
 
 
+    def queue_link(self, link_func, source_id, dest_id):
+        # Link and unlink commands for the same pair of ports share a key, so only the latest one pending runs
+        self.app.task_scheduler.submit(
+            link_func(source_id, dest_id),
+            priority=PRIORITY_ROUTING,
+            key=("pw-link", source_id, dest_id),
+        )
+
     def connect_ports_duplex(self, *args):
 
         [addr, val] = args
@@ -487,10 +508,10 @@ class AudioInDevice(PyshaMode):
                     elif port['info']['props']['audio.channel'] == "FR":
                         dest_R = port['id']
                 if (disconnect_L != None) and (disconnect_R != None):
-                        self.app.queue.append(disconnectPipewireSourceFromPipewireDest(disconnect_L, duplex_in_L))
-                        self.app.queue.append(disconnectPipewireSourceFromPipewireDest(disconnect_R, duplex_in_R))
-                        self.app.queue.append(disconnectPipewireSourceFromPipewireDest(duplex_out_L, dest_L))
-                        self.app.queue.append(disconnectPipewireSourceFromPipewireDest(duplex_out_R, dest_R))
+                        self.queue_link(disconnectPipewireSourceFromPipewireDest, disconnect_L, duplex_in_L)
+                        self.queue_link(disconnectPipewireSourceFromPipewireDest, disconnect_R, duplex_in_R)
+                        self.queue_link(disconnectPipewireSourceFromPipewireDest, duplex_out_L, dest_L)
+                        self.queue_link(disconnectPipewireSourceFromPipewireDest, duplex_out_R, dest_R)
                 self.engine.connections[column_index]["L"] = None
                 self.engine.connections[column_index]["R"] = None
                 return
@@ -536,20 +557,20 @@ class AudioInDevice(PyshaMode):
                     disconnect_L = self.engine.connections[column_index]["L"]
                     disconnect_R = self.engine.connections[column_index]["R"]
                     if disconnect_L and disconnect_R is not None:
-                        self.app.queue.append(disconnectPipewireSourceFromPipewireDest(disconnect_L, duplex_in_L))
-                        self.app.queue.append(disconnectPipewireSourceFromPipewireDest(disconnect_R, duplex_in_R))
-                        self.app.queue.append(disconnectPipewireSourceFromPipewireDest(duplex_out_L, dest_L))
-                        self.app.queue.append(disconnectPipewireSourceFromPipewireDest(duplex_out_R, dest_R))
+                        self.queue_link(disconnectPipewireSourceFromPipewireDest, disconnect_L, duplex_in_L)
+                        self.queue_link(disconnectPipewireSourceFromPipewireDest, disconnect_R, duplex_in_R)
+                        self.queue_link(disconnectPipewireSourceFromPipewireDest, duplex_out_L, dest_L)
+                        self.queue_link(disconnectPipewireSourceFromPipewireDest, duplex_out_R, dest_R)
 
                 # Connects to currently selected instance, assigns the port IDs for later reference
                 for index, connection in enumerate(self.engine.connections):
                     if index == column_index:
                         connection["L"] = source_L
                         connection["R"] = source_R
-                self.app.queue.append(connectPipewireSourceToPipewireDest(source_L, duplex_in_L))
-                self.app.queue.append(connectPipewireSourceToPipewireDest(source_R, duplex_in_R))
-                self.app.queue.append(connectPipewireSourceToPipewireDest(duplex_out_L, dest_L))
-                self.app.queue.append(connectPipewireSourceToPipewireDest(duplex_out_R, dest_R))
+                self.queue_link(connectPipewireSourceToPipewireDest, source_L, duplex_in_L)
+                self.queue_link(connectPipewireSourceToPipewireDest, source_R, duplex_in_R)
+                self.queue_link(connectPipewireSourceToPipewireDest, duplex_out_L, dest_L)
+                self.queue_link(connectPipewireSourceToPipewireDest, duplex_out_R, dest_R)
                 print("end of try ")
             except Exception as e:
                 print("Error in connect_ports_duplex")
@@ -606,14 +627,16 @@ class AudioInDevice(PyshaMode):
         visible_controls = self.get_visible_controls()
         for control in visible_controls:
             if hasattr(control, "address") and control.address is not None:
-                self.send_message("/q" + control.address, None)
+                send_query(self.osc["client"], control.address, visible=True)
 
     def query_all_controls(self):
+        # Controls of the current page are queried first (see osc.query_scheduler)
+        visible_controls = {id(control) for control in self.get_visible_controls()}
         all_controls = self.get_all_controls()
         self.update()
         for control in all_controls:
             if hasattr(control, "address") and control.address is not None:
-                self.send_message("/q" + control.address, None)
+                send_query(self.osc["client"], control.address, visible=id(control) in visible_controls)
 
     def get_pipewire_config(self):
         for item in self.clients:
@@ -665,27 +688,16 @@ class AudioInDevice(PyshaMode):
             all_volumes[instrument_idx*2] = track_L_volume
             all_volumes[instrument_idx*2 +1] = track_R_volume
             self.app.volumes = all_volumes
-            self.app.send_message_cli()
+            send_accumulated(self.app.send_message_cli)
 
-        try:
-            encoder_idx = [
-                push2_python.constants.ENCODER_TRACK1_ENCODER,
-                push2_python.constants.ENCODER_TRACK2_ENCODER,
-                push2_python.constants.ENCODER_TRACK3_ENCODER,
-                push2_python.constants.ENCODER_TRACK4_ENCODER,
-                push2_python.constants.ENCODER_TRACK5_ENCODER,
-                push2_python.constants.ENCODER_TRACK6_ENCODER,
-                push2_python.constants.ENCODER_TRACK7_ENCODER,
-                push2_python.constants.ENCODER_TRACK8_ENCODER,
-            ].index(encoder_name)
-            visible_controls = self.get_visible_controls()
-            control = visible_controls[encoder_idx]
-            control.update_value(increment)
-            self.last_knob_turned = encoder_idx
-            match encoder_idx:
-                case 2 | 3 | 4 | 5:
-                    self.update_input_gains()
+        encoder_idx = TRACK_ENCODER_INDEX.get(encoder_name)
+        if encoder_idx is None:
+            return  # Encoder not in list
 
-        
-        except ValueError:
-            pass  # Encoder not in list
+        visible_controls = self.get_visible_controls()
+        control = visible_controls[encoder_idx]
+        control.update_value(increment)
+        self.last_knob_turned = encoder_idx
+        match encoder_idx:
+            case 2 | 3 | 4 | 5:
+                self.update_input_gains()
@@ -4,6 +4,7 @@ import os
 import json
 
 from user_interface.display_utils import show_text
+from user_interface.display_renderer import mark_display_dirty
 
 
 class InstrumentSelectionMode(definitions.PyshaMode):
@@ -156,6 +157,7 @@ class InstrumentSelectionMode(definitions.PyshaMode):
         # Note that if this is called from a mode form the same xor group with melodic/rhythmic modes,
         # that other mode will be deactivated.
         self.selected_instrument = instrument_idx
+        mark_display_dirty()
         self.load_current_default_layout()
         self.clean_currently_notes_being_played()
 
@@ -1,7 +1,9 @@
 import definitions
 import mido
+from user_interface.display_renderer import mark_display_dirty
 import push2_python.constants
 import time
+from modes.note_state import NoteState
 
 
 from pythonosc.udp_client import SimpleUDPClient
@@ -11,7 +13,8 @@ class MelodicMode(definitions.PyshaMode):
 
     xor_group = "pads"
 
-    notes_being_played = []
+    note_state = None
+    pad_layout_key = None
     root_midi_note = 0  # default redefined in initialize
     scale_pattern = [
         True,
@@ -44,6 +47,7 @@ class MelodicMode(definitions.PyshaMode):
     def __init__(self, app, settings=None, send_osc_func=None):
         self.app = app
         self.send_osc_func = send_osc_func
+        self.note_state = NoteState()
         self.initialize(settings=settings)
 
     def initialize(self, settings=None):
@@ -72,7 +76,7 @@ class MelodicMode(definitions.PyshaMode):
         elif value >= self.channel_at_range_end:
             value = self.channel_at_range_end - 1
         self.channel_at_range_start = value
-        self.last_time_at_params_edited = time.time()
+        self.at_params_edited()
 
     def set_channel_at_range_end(self, value):
         # Parameter in range [channel_at_range_start + 1, 2000]
@@ -81,7 +85,7 @@ class MelodicMode(definitions.PyshaMode):
         elif value > 2000:
             value = 2000
         self.channel_at_range_end = value
-        self.last_time_at_params_edited = time.time()
+        self.at_params_edited()
 
     def set_poly_at_max_range(self, value):
         # Parameter in range [0, 127]
@@ -90,7 +94,7 @@ class MelodicMode(definitions.PyshaMode):
         elif value > 127:
             value = 127
         self.poly_at_max_range = value
-        self.last_time_at_params_edited = time.time()
+        self.at_params_edited()
 
     def set_poly_at_curve_bending(self, value):
         # Parameter in range [0, 100]
@@ -99,7 +103,7 @@ class MelodicMode(definitions.PyshaMode):
         elif value > 100:
             value = 100
         self.poly_at_curve_bending = value
-        self.last_time_at_params_edited = time.time()
+        self.at_params_edited()
 
     def get_poly_at_curve(self):
         pow_curve = [
@@ -113,18 +117,15 @@ class MelodicMode(definitions.PyshaMode):
             for i in range(0, 128)
         ]
 
+    # These return True if the note went on/off for the pads (the same note might be played by several sources)
     def add_note_being_played(self, midi_note, source):
-        self.notes_being_played.append({"note": midi_note, "source": source})
+        return self.note_state.add(midi_note, source)
 
     def remove_note_being_played(self, midi_note, source):
-        self.notes_being_played = [
-            note
-            for note in self.notes_being_played
-            if note["note"] != midi_note or note["source"] != source
-        ]
+        return self.note_state.remove(midi_note, source)
 
     def remove_all_notes_being_played(self):
-        self.notes_being_played = []
+        self.note_state.clear()
 
     def pad_ij_to_midi_note(self, pad_ij):
         return self.root_midi_note + ((7 - pad_ij[0]) * 5 + pad_ij[1])
@@ -138,10 +139,7 @@ class MelodicMode(definitions.PyshaMode):
         return not self.scale_pattern[relative_midi_note]
 
     def is_midi_note_being_played(self, midi_note):
-        for note in self.notes_being_played:
-            if note["note"] == midi_note:
-                return True
-        return False
+        return self.note_state.is_playing(midi_note)
 
     def note_number_to_name(self, note_number):
         semis = ["C", "C#", "D", "D#", "E", "F", "F#", "G", "G#", "A", "A#", "B"]
@@ -192,30 +190,38 @@ class MelodicMode(definitions.PyshaMode):
             push2_python.constants.BUTTON_SHIFT, definitions.BLACK
         )
 
-    def check_for_delayed_actions(self):
-        if (
-            self.last_time_at_params_edited is not None
-            and time.time() - self.last_time_at_params_edited
-            > definitions.DELAYED_ACTIONS_APPLY_TIME
-        ):
-            # Update channel and poly AT parameters
-            self.push.pads.set_channel_aftertouch_range(
-                range_start=self.channel_at_range_start,
-                range_end=self.channel_at_range_end,
-            )
-            self.push.pads.set_velocity_curve(velocities=self.get_poly_at_curve())
-            self.last_time_at_params_edited = None
+    def at_params_edited(self):
+        # AT params are sent to Push once they have not been edited for DELAYED_ACTIONS_APPLY_TIME (editing again
+        # replaces the pending timer)
+        self.last_time_at_params_edited = time.time()
+        self.app.wakeups.call_later(
+            definitions.DELAYED_ACTIONS_APPLY_TIME,
+            self.apply_at_params,
+            key=(self, "at_params"),
+        )
+
+    def apply_at_params(self):
+        # Update channel and poly AT parameters
+        self.push.pads.set_channel_aftertouch_range(
+            range_start=self.channel_at_range_start,
+            range_end=self.channel_at_range_end,
+        )
+        self.push.pads.set_velocity_curve(velocities=self.get_poly_at_curve())
+        self.last_time_at_params_edited = None
+        mark_display_dirty()  # Settings page shows pending AT params in a different colour
 
     def on_midi_in(self, msg, source=None):
         # Update the list of notes being currently played so push2 pads can be updated accordingly
+        changed = False
         if msg.type == "note_on":
             if msg.velocity == 0:
-                self.remove_note_being_played(msg.note, source)
+                changed = self.remove_note_being_played(msg.note, source)
             else:
-                self.add_note_being_played(msg.note, source)
+                changed = self.add_note_being_played(msg.note, source)
         elif msg.type == "note_off":
-            self.remove_note_being_played(msg.note, source)
-        self.app.pads_need_update = True
+            changed = self.remove_note_being_played(msg.note, source)
+        if changed:
+            self.app.pads_need_update = True
 
     def update_octave_buttons(self):
         self.push.buttons.set_button_color(
@@ -260,86 +266,101 @@ class MelodicMode(definitions.PyshaMode):
         self.update_modulation_wheel_mode_button()
         self.update_accent_button()
 
+    def get_pad_instrument_color(self):
+        try:
+            return self.app.instrument_selection_mode.get_current_instrument_color()
+        except AttributeError:
+            return definitions.YELLOW
+
+    def get_pad_layout_key(self):
+        # Everything the base pad colours depend on, the layout is rebuilt when this changes
+        return (self.root_midi_note, self.get_pad_instrument_color())
+
+    def get_base_pad_color(self, i, j, midi_note):
+        # Colour of a pad when its note is not being played
+        cell_color = definitions.WHITE
+        if self.is_black_key_midi_note(midi_note):
+            cell_color = definitions.BLACK
+        if self.is_midi_note_root_octave(midi_note):
+            cell_color = self.get_pad_instrument_color()
+        return cell_color
+
+    def build_pad_layout(self):
+        # Pad -> note table, base colours and note -> pads table (a note can be on several pads)
+        self.pad_notes = [
+            [self.pad_ij_to_midi_note([i, j]) for j in range(0, 8)] for i in range(0, 8)
+        ]
+        self.base_pad_colors = [
+            [self.get_base_pad_color(i, j, self.pad_notes[i][j]) for j in range(0, 8)]
+            for i in range(0, 8)
+        ]
+        self.note_pads = {}
+        for i in range(0, 8):
+            for j in range(0, 8):
+                self.note_pads.setdefault(self.pad_notes[i][j], []).append((i, j))
+
+    def ensure_pad_layout(self):
+        pad_layout_key = self.get_pad_layout_key()
+        if pad_layout_key != self.pad_layout_key:
+            self.pad_layout_key = pad_layout_key
+            self.build_pad_layout()
+
+    def get_pad_color(self, i, j):
+        midi_note = self.pad_notes[i][j]
+        if midi_note is not None and self.is_midi_note_being_played(midi_note):
+            return definitions.NOTE_ON_COLOR
+        return self.base_pad_colors[i][j]
+
     def update_pads(self):
-        color_matrix = []
+        # Pads whose colour did not change are not sent to Push (see controllers.led_cache)
+        self.ensure_pad_layout()
         for i in range(0, 8):
-            row_colors = []
             for j in range(0, 8):
-                corresponding_midi_note = self.pad_ij_to_midi_note([i, j])
-                cell_color = definitions.WHITE
-                if self.is_black_key_midi_note(corresponding_midi_note):
-                    cell_color = definitions.BLACK
-                if self.is_midi_note_root_octave(corresponding_midi_note):
-                    try:
-                        cell_color = (
-                            self.app.instrument_selection_mode.get_current_instrument_color()
-                        )
-                    except AttributeError:
-                        cell_color = definitions.YELLOW
-                if self.is_midi_note_being_played(corresponding_midi_note):
-                    cell_color = definitions.NOTE_ON_COLOR
-
-                row_colors.append(cell_color)
-            color_matrix.append(row_colors)
-
-        self.push.pads.set_pads_color(color_matrix)
+                self.push.pads.set_pad_color((i, j), color=self.get_pad_color(i, j))
+
+    def update_pads_for_note(self, midi_note):
+        # Only the pads of this note can have changed
+        self.ensure_pad_layout()
+        for i, j in self.note_pads.get(midi_note, ()):
+            self.push.pads.set_pad_color((i, j), color=self.get_pad_color(i, j))
+
+    def pad_ij_to_layout_midi_note(self, pad_ij):
+        # Same as pad_ij_to_midi_note but looked up in the precomputed pad layout
+        self.ensure_pad_layout()
+        return self.pad_notes[pad_ij[0]][pad_ij[1]]
 
     def on_pad_pressed(self, pad_n, pad_ij, velocity):
-        midi_note = self.pad_ij_to_midi_note(pad_ij)
-        # print("pad pressed", pad_ij)
-        # print("Midi note", self.pad_ij_to_midi_note(pad_ij))
+        # Note output goes through app.note_output, which caches the MIDI channel and OSC client of the instrument
+        midi_note = self.pad_ij_to_layout_midi_note(pad_ij)
         if midi_note is not None:
-            # print("Midi_note is not none")
             self.latest_velocity_value = (time.time(), velocity)
-            if (
-                self.app.instrument_selection_mode.get_current_instrument_info().get(
-                    "illuminate_local_notes", True
-                )
-                or self.app.notes_midi_in is None
-            ):
+            if self.app.note_output.get_transport().illuminate_local_notes or self.app.notes_midi_in is None:
                 # illuminate_local_notes is used to decide wether a pad/key should be lighted when pressing it. This will probably be the default behaviour,
                 # but in synth definitions this can be disabled because we will be receiving back note events at the "notes_midi_in" device and in this
                 # case we don't want to light the pad "twice" (or if the note pressed gets processed and another note is actually played we don't want to
                 # light the currently presed pad). However, if "notes_midi_in" input is not configured, we do want to liht the pad as we won't have
                 # notes info comming from any other source
                 self.add_note_being_played(midi_note, "push")
-                # print("Illuminate local note check whatever")
-            # print("before MIDO")
-            msg = mido.Message(
-                "note_on",
-                note=midi_note,
-                velocity=velocity if not self.fixed_velocity_mode else 127,
+            self.app.note_output.note_on(
+                midi_note,
+                velocity if not self.fixed_velocity_mode else 127,
+                osc_velocity=velocity,
             )
-            self.app.send_midi(msg)
-            instrument = self.app.instrument_selection_mode.get_current_instrument_short_name()
-            self.app.send_osc("/mnote", [float(midi_note), float(velocity)], instrument)
-            # print("after MIDO")
             # TODO: this send osc hangs at sending to client for some reason, for now commented out but needs to be fixed later
             # self.send_osc_func('/mnote', [float(midi_note), float(velocity)])
-            self.update_pads()  # Directly calling update pads method because we want user to feel feedback as quick as possible
-            # print("after update pads")
+            self.update_pads_for_note(midi_note)  # Directly updating pads because we want user to feel feedback as quick as possible
             return True
 
     def on_pad_released(self, pad_n, pad_ij, velocity):
-        midi_note = self.pad_ij_to_midi_note(pad_ij)
+        midi_note = self.pad_ij_to_layout_midi_note(pad_ij)
         if midi_note is not None:
-            if (
-                self.app.instrument_selection_mode.get_current_instrument_info().get(
-                    "illuminate_local_notes", True
-                )
-                or self.app.notes_midi_in is None
-            ):
+            if self.app.note_output.get_transport().illuminate_local_notes or self.app.notes_midi_in is None:
                 # see comment in "on_pad_pressed" above
                 self.remove_note_being_played(midi_note, "push")
-            msg = mido.Message("note_off", note=midi_note, velocity=velocity)
-            self.app.send_midi(msg)
-            instrument = self.app.instrument_selection_mode.get_current_instrument_short_name()
-            self.app.send_osc("/mnote/rel", [float(midi_note), float(velocity)], instrument)
-            # print("midi sent", pad_ij)
+            self.app.note_output.note_off(midi_note, velocity)
             # TODO: This send_osc_func makes so the sequencer pads don't update correctly
             # self.send_osc_func('/mnote/rel', [float(midi_note), float(velocity)])
-            self.update_pads()  # Directly calling update pads method because we want user to feel feedback as quick as possible
-            # print("pad released")
+            self.update_pads_for_note(midi_note)  # Directly updating pads because we want user to feel feedback as quick as possible
             return True
 
     def on_pad_aftertouch(self, pad_n, pad_ij, velocity):
@@ -404,6 +425,12 @@ class MelodicMode(definitions.PyshaMode):
             return True
 
         elif button_name == push2_python.constants.BUTTON_SHIFT:
+            return True  # Touchstrip mode is toggled on release, see on_button_released
+
+    def on_button_released(self, button_name):
+        if button_name == push2_python.constants.BUTTON_SHIFT:
+            if self.app.encoder_acceleration.fine_mode_used:
+                return True  # Shift was held to edit parameters in fine mode, keep touchstrip mode
             self.modulation_wheel_mode = not self.modulation_wheel_mode
             if self.modulation_wheel_mode:
                 self.push.touchstrip.set_modulation_wheel_mode()
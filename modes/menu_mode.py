@@ -4,6 +4,7 @@ import time
 from controllers import push2_constants
 
 from definitions import PyshaMode
+from scheduling.task_scheduler import PRIORITY_REALTIME
 from user_interface.display_utils import show_text
 
 
@@ -200,7 +201,11 @@ class MenuMode(PyshaMode):
         elif button_name == push2_constants.BUTTON_ADD_DEVICE:
             selected_device = devices_in_current_slot[self.selected_menu_item_index]
             try:
-                self.app.queue.append(selected_device.select())
+                self.app.task_scheduler.submit(
+                    selected_device.select(),
+                    priority=PRIORITY_REALTIME,
+                    key=(selected_device, "select"),
+                )
                 devices = self.app.osc_mode.get_current_instrument_devices()
                 for device in devices:
                     if device.label == selected_device.label:
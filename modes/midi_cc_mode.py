@@ -7,6 +7,7 @@ import os
 
 from definitions import PyshaMode
 from user_interface.display_utils import show_text
+from controllers.dispatch_table import TRACK_ENCODER_INDEX
 
 
 class MIDICCControl(object):
@@ -391,19 +392,7 @@ class MIDICCMode(PyshaMode):
             return True
 
     def on_encoder_rotated(self, encoder_name, increment):
-        try:
-            encoder_num = [
-                push2_python.constants.ENCODER_TRACK1_ENCODER,
-                push2_python.constants.ENCODER_TRACK2_ENCODER,
-                push2_python.constants.ENCODER_TRACK3_ENCODER,
-                push2_python.constants.ENCODER_TRACK4_ENCODER,
-                push2_python.constants.ENCODER_TRACK5_ENCODER,
-                push2_python.constants.ENCODER_TRACK6_ENCODER,
-                push2_python.constants.ENCODER_TRACK7_ENCODER,
-                push2_python.constants.ENCODER_TRACK8_ENCODER,
-            ].index(encoder_name)
-            if self.active_midi_control_ccs:
-                self.active_midi_control_ccs[encoder_num].update_value(increment)
-        except ValueError:
-            pass  # Encoder not in list
+        encoder_num = TRACK_ENCODER_INDEX.get(encoder_name)
+        if encoder_num is not None and self.active_midi_control_ccs:  # None: encoder not in list
+            self.active_midi_control_ccs[encoder_num].update_value(increment)
         return True  # Always return True because encoder should not be used in any other mode if this is first active
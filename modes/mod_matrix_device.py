@@ -1,10 +1,14 @@
 from user_interface.display_utils import show_text
+from user_interface.widget_atlas import draw_slider
+from user_interface.display_renderer import mark_display_dirty
 
 import push2_python
 import logging
 import definitions
-from ratelimit import limits
 import asyncio
+from scheduling.task_scheduler import PRIORITY_ROUTING
+from controllers.dispatch_table import TRACK_ENCODER_INDEX
+from controllers.encoder_accumulator import send_accumulated
 
 logger = logging.getLogger("mod_matrix_device")
 # logger.setLevel(level=logging.DEBUG)
@@ -140,6 +144,7 @@ class ModMatrixDevice(definitions.PyshaMode):
     def set_state(self, source, *args):
         dest, depth, *rest = args
         new_mapping = [source, dest, depth]
+        mark_display_dirty()
         # print("New mod matrix mapping")
         # print(new_mapping)
         
@@ -277,6 +282,7 @@ class ModMatrixDevice(definitions.PyshaMode):
         selected_device = int(self.controls[self.device_column])
         controls = self.get_all_mod_matrix_controls_for_device_in_slot(selected_device)
         selected_control = int(self.controls[self.control_column])
+        color = self.get_color_helper()
 
         # This draws the controls for selecting and setting mod mappings
         self.draw_src_column(
@@ -297,7 +303,7 @@ class ModMatrixDevice(definitions.PyshaMode):
             30,
             "Set Mapping",
             height=15,
-            font_color=self.get_color_helper(),
+            font_color=color,
         )
         show_text(
             ctx,
@@ -305,7 +311,7 @@ class ModMatrixDevice(definitions.PyshaMode):
             30,
             "Delete Mapping",
             height=15,
-            font_color=self.get_color_helper(),
+            font_color=color,
         )
         show_text(
             ctx,
@@ -313,7 +319,7 @@ class ModMatrixDevice(definitions.PyshaMode):
             30,
             "Scroll Mappings",
             height=15,
-            font_color=self.get_color_helper(),
+            font_color=color,
         )
 
         visible_controls = self.get_visible_controls()
@@ -536,14 +542,9 @@ class ModMatrixDevice(definitions.PyshaMode):
             margin_left=int(value / 1 * 80 + 10),
         )
 
-        # Knob
-        ctx.save()
-
+        # Knob (pre-rendered sprite for the quantised value)
         height = 30
-        length = 80
         radius = height / 2
-        triangle_padding = 3
-        triangle_size = 6
 
         display_w = push2_python.constants.DISPLAY_LINE_PIXELS
         x = (display_w // 8) * x_part
@@ -551,42 +552,7 @@ class ModMatrixDevice(definitions.PyshaMode):
 
         xc = x + radius + 3
         yc = y
-
-        # This is needed to prevent showing line from previous position
-        ctx.set_source_rgb(0, 0, 0)
-        ctx.move_to(xc, yc)
-        ctx.stroke()
-
-        # Inner line
-        bipolar_value = value / 1 - 0.5 * 1
-        ctx.move_to(xc, yc)
-        ctx.line_to(xc + length, yc)
-        ctx.set_source_rgb(*definitions.get_color_rgb_float(definitions.GRAY_LIGHT))
-        ctx.set_line_width(1)
-        ctx.stroke()
-
-        # Outer line
-        ctx.move_to(xc + 0.5 * length, yc)
-        ctx.line_to(xc + 0.5 * length + bipolar_value * length, yc)
-        ctx.set_source_rgb(*definitions.get_color_rgb_float(color))
-        ctx.set_line_width(3)
-        ctx.stroke()
-
-        # Triangle indicator
-        ctx.move_to(xc + length * value / 1, yc - triangle_padding)
-        ctx.line_to(
-            xc + length * value / 1 - triangle_size,
-            yc - triangle_padding - 2 * triangle_size,
-        )
-        ctx.line_to(
-            xc + length * value / 1 + triangle_size,
-            yc - triangle_padding - 2 * triangle_size,
-        )
-        ctx.move_to(xc + length * value, yc - triangle_padding)
-        ctx.close_path()
-        ctx.set_source_rgb(*definitions.get_color_rgb_float(color))
-        ctx.fill_preserve()
-        ctx.restore()
+        draw_slider(ctx, xc, yc, value, 1, color, bipolar=True)
 
     def draw_mod_src(self, ctx, offset, list, selected_idx):
         # Draw Device Names
@@ -955,11 +921,14 @@ class ModMatrixDevice(definitions.PyshaMode):
         visible_controls[self.depth_control_column] = mod_depth_scaled
     
 
-    @limits(calls=1, period=0.1)
     def send_message_cli(self, *args):
         volume_node_id = self.app.volume_node["id"]
         cli_string = f"pw-cli s {volume_node_id} Props '{{monitorVolumes: {self.app.volumes}}}'"
-        self.app.queue.append(asyncio.create_subprocess_shell(cli_string, stdout=asyncio.subprocess.PIPE))
+        self.app.task_scheduler.submit(
+            asyncio.create_subprocess_shell(cli_string, stdout=asyncio.subprocess.PIPE),
+            priority=PRIORITY_ROUTING,
+            key=("monitorVolumes", volume_node_id),  # Only the latest volumes need to be set
+        )
 
     def on_encoder_rotated(self, encoder_name, increment):
         #This if statement is for setting post-synth volume levels
@@ -983,21 +952,11 @@ class ModMatrixDevice(definitions.PyshaMode):
             all_volumes[instrument_idx*2] = track_L_volume
             all_volumes[instrument_idx*2 +1] = track_R_volume
             self.app.volumes = all_volumes
-            self.send_message_cli()
+            send_accumulated(self.send_message_cli)
 
         
-        try:
-            encoder_idx = [
-                push2_python.constants.ENCODER_TRACK1_ENCODER,
-                push2_python.constants.ENCODER_TRACK2_ENCODER,
-                push2_python.constants.ENCODER_TRACK3_ENCODER,
-                push2_python.constants.ENCODER_TRACK4_ENCODER,
-                push2_python.constants.ENCODER_TRACK5_ENCODER,
-                push2_python.constants.ENCODER_TRACK6_ENCODER,
-                push2_python.constants.ENCODER_TRACK7_ENCODER,
-                push2_python.constants.ENCODER_TRACK8_ENCODER,
-            ].index(encoder_name)
-        except ValueError as e:
+        encoder_idx = TRACK_ENCODER_INDEX.get(encoder_name)
+        if encoder_idx is None:
             return
 
         visible_controls = self.get_visible_controls()
@@ -1103,19 +1062,8 @@ class ModMatrixDevice(definitions.PyshaMode):
     def on_encoder_touched(self, encoder_name):
         
         
-        try:
-            encoder_idx = [
-                push2_python.constants.ENCODER_TRACK1_ENCODER,
-                push2_python.constants.ENCODER_TRACK2_ENCODER,
-                push2_python.constants.ENCODER_TRACK3_ENCODER,
-                push2_python.constants.ENCODER_TRACK4_ENCODER,
-                push2_python.constants.ENCODER_TRACK5_ENCODER,
-                push2_python.constants.ENCODER_TRACK6_ENCODER,
-                push2_python.constants.ENCODER_TRACK7_ENCODER,
-                push2_python.constants.ENCODER_TRACK8_ENCODER,
-            ].index(encoder_name)
-
-        except ValueError:
+        encoder_idx = TRACK_ENCODER_INDEX.get(encoder_name)
+        if encoder_idx is None:
             return
 
         if encoder_idx == self.delete_mapping_column:
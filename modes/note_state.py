@@ -0,0 +1,35 @@
+class NoteState(object):
+    """Notes currently being played, kept as one 128-bit bitmap (a python int, bit n is MIDI note n) per source
+    ("push", "notes_midi_in"...) plus the union of all sources. Checking whether a note is on is a single bit
+    test, and add/remove return whether the union changed so callers only refresh pads when needed."""
+
+    def __init__(self):
+        self.sources = {}
+        self.playing = 0  # Union of all sources
+
+    def add(self, midi_note, source):
+        bitmap = self.sources.get(source, 0) | (1 << midi_note)
+        self.sources[source] = bitmap
+        changed = not (self.playing >> midi_note) & 1
+        self.playing |= 1 << midi_note
+        return changed
+
+    def remove(self, midi_note, source):
+        bitmap = self.sources.get(source, 0) & ~(1 << midi_note)
+        self.sources[source] = bitmap
+        playing = 0
+        for source_bitmap in self.sources.values():
+            playing |= source_bitmap
+        changed = playing != self.playing
+        self.playing = playing
+        return changed
+
+    def clear(self):
+        self.sources = {}
+        self.playing = 0
+
+    def is_playing(self, midi_note):
+        return (self.playing >> midi_note) & 1 == 1
+
+    def get_notes(self):
+        return [midi_note for midi_note in range(128) if (self.playing >> midi_note) & 1]
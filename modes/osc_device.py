@@ -11,6 +11,9 @@ import asyncio
 import push2_python
 import logging
 from definitions import PyshaMode
+from controllers.dispatch_table import TRACK_ENCODER_INDEX
+from controllers.encoder_accumulator import send_accumulated
+from osc.query_scheduler import send_query
 from ratelimit import limits
 
 logger = logging.getLogger("osc_device")
@@ -66,6 +69,7 @@ class OSCDevice(PyshaMode):
         self.osc = osc
         self.label = config.get("name", "Device")
         self.dispatcher = osc.get("dispatcher", None)
+        self.parameters = osc.get("parameters", None)
         self.slot = config.get("slot", None)
         self.log_in = logger.getChild(f"in-{kwargs['osc_in_port']}")
         self.log_out = logger.getChild(f"out-{kwargs['osc_out_port']}")
@@ -87,16 +91,24 @@ class OSCDevice(PyshaMode):
                     for param in control_def["params"]:
                         self.dispatcher.map(param.address, control.set_state)
                 case "control-range":
-                    control = OSCControl(control_def, get_color, self.send_message)
+                    control = OSCControl(
+                        control_def, get_color, self.send_message, parameters=self.parameters
+                    )
                     self.dispatcher.map(control.address, control.set_state)
                     self.controls.append(control)
                 case "control-spacer-address":
-                    control = OSCSpacerAddress(control_def, self.send_message)
+                    control = OSCSpacerAddress(
+                        control_def, self.send_message, parameters=self.parameters
+                    )
                     self.dispatcher.map(control.address, control.set_state)
                     self.controls.append(control)
                 case "control-switch":
                     control = OSCControlSwitch(
-                        control_def, get_color, self.send_message, self.dispatcher
+                        control_def,
+                        get_color,
+                        self.send_message,
+                        self.dispatcher,
+                        parameters=self.parameters,
                     )
                     if control.address:
                         self.dispatcher.map(control.address, control.set_state)
@@ -104,7 +116,9 @@ class OSCDevice(PyshaMode):
                     self.controls.append(control)
 
                 case "control-menu":
-                    control = OSCControlMenu(control_def, get_color, self.send_message)
+                    control = OSCControlMenu(
+                        control_def, get_color, self.send_message, parameters=self.parameters
+                    )
                     if control.address:
                         self.dispatcher.map(control.address, control.set_state)
 
@@ -189,13 +203,15 @@ class OSCDevice(PyshaMode):
         visible_controls = self.get_visible_controls()
         for control in visible_controls:
             if hasattr(control, "address") and control.address is not None:
-                self.send_message("/q" + control.address, None)
+                send_query(self.osc["client"], control.address, visible=True)
 
     def query_all_controls(self):
+        # Controls of the current page are queried first (see osc.query_scheduler)
+        visible_controls = {id(control) for control in self.get_visible_controls()}
         all_controls = self.get_all_controls()
         for control in all_controls:
             if hasattr(control, "address") and control.address is not None:
-                self.send_message("/q" + control.address, None)
+                send_query(self.osc["client"], control.address, visible=id(control) in visible_controls)
 
     def get_visible_controls(self):
         return self.pages[self.page]
@@ -209,43 +225,33 @@ class OSCDevice(PyshaMode):
 
 
     def on_encoder_rotated(self, encoder_name, increment):
-        try:
-            #This if statement is for setting post-synth volume levels
-            if encoder_name == push2_python.constants.ENCODER_MASTER_ENCODER:
-                instrument = self.app.osc_mode.get_current_instrument()
-                all_volumes = self.app.volumes
-                instrument_idx = instrument.osc_in_port % 10
-                track_L_volume = all_volumes[instrument_idx * 2]
-                track_R_volume = all_volumes[instrument_idx * 2 +1]
-                #This specific wording of elif is needed
-                # to ensure we can reach max/min values
-                if track_L_volume + increment*0.01 <= 0:
-                    track_L_volume = 0
-                    track_R_volume = 0
-                elif track_L_volume + increment*0.01 >=1:
-                    track_L_volume = 1
-                    track_R_volume = 1
-                else:
-                    track_L_volume = track_L_volume + increment*0.01
-                    track_R_volume = track_R_volume + increment*0.01
-                all_volumes[instrument_idx*2] = track_L_volume
-                all_volumes[instrument_idx*2 +1] = track_R_volume
-                self.app.volumes = all_volumes
-                self.app.send_message_cli()
-            else: 
-                encoder_idx = [
-                    push2_python.constants.ENCODER_TRACK1_ENCODER,
-                    push2_python.constants.ENCODER_TRACK2_ENCODER,
-                    push2_python.constants.ENCODER_TRACK3_ENCODER,
-                    push2_python.constants.ENCODER_TRACK4_ENCODER,
-                    push2_python.constants.ENCODER_TRACK5_ENCODER,
-                    push2_python.constants.ENCODER_TRACK6_ENCODER,
-                    push2_python.constants.ENCODER_TRACK7_ENCODER,
-                    push2_python.constants.ENCODER_TRACK8_ENCODER,
-                ].index(encoder_name)
-
-                visible_controls = self.get_visible_controls()
-                control = visible_controls[encoder_idx]
-                control.update_value(increment)
-        except ValueError:
-            pass  # Encoder not in list
+        #This if statement is for setting post-synth volume levels
+        if encoder_name == push2_python.constants.ENCODER_MASTER_ENCODER:
+            instrument = self.app.osc_mode.get_current_instrument()
+            all_volumes = self.app.volumes
+            instrument_idx = instrument.osc_in_port % 10
+            track_L_volume = all_volumes[instrument_idx * 2]
+            track_R_volume = all_volumes[instrument_idx * 2 +1]
+            #This specific wording of elif is needed
+            # to ensure we can reach max/min values
+            if track_L_volume + increment*0.01 <= 0:
+                track_L_volume = 0
+                track_R_volume = 0
+            elif track_L_volume + increment*0.01 >=1:
+                track_L_volume = 1
+                track_R_volume = 1
+            else:
+                track_L_volume = track_L_volume + increment*0.01
+                track_R_volume = track_R_volume + increment*0.01
+            all_volumes[instrument_idx*2] = track_L_volume
+            all_volumes[instrument_idx*2 +1] = track_R_volume
+            self.app.volumes = all_volumes
+            send_accumulated(self.app.send_message_cli)
+        else: 
+            encoder_idx = TRACK_ENCODER_INDEX.get(encoder_name)
+            if encoder_idx is None:
+                return  # Encoder not in list
+
+            visible_controls = self.get_visible_controls()
+            control = visible_controls[encoder_idx]
+            control.update_value(increment)
@@ -1,13 +1,16 @@
 import logging
 import engine
 import mido
-from pythonosc.udp_client import SimpleUDPClient
+from osc.batcher import BatchingUDPClient
+from osc.query_scheduler import QueryReplyDispatcher, send_query
+from osc.parameter_store import ParameterStore
 from pythonosc.osc_server import AsyncIOOSCUDPServer
-from pythonosc.dispatcher import Dispatcher
 from modes.osc_device import OSCDevice
 from modes.mod_matrix_device import ModMatrixDevice
 from modes.audio_in_device import AudioInDevice
 from definitions import PyshaMode
+from user_interface.display_renderer import mark_display_dirty
+from user_interface.frame_rate_governor import notify_user_activity
 import asyncio
 logger = logging.getLogger("osc_instrument")
 # logger.setLevel(level=logging.DEBUG)
@@ -30,14 +33,14 @@ class OSCInstrument(PyshaMode):
         self.instrument_nodes = []
         self.instrument_ports = []
         self.slots = [
-            {"address": "/param/a/osc/1/type", "value": 0.0},
-            {"address": "/param/a/osc/2/type", "value": 0.0},
+            {"address": "/param/a/osc/1/type"},
+            {"address": "/param/a/osc/2/type"},
             None,
             None,
             None,
-            {"address": "/param/fx/a/1/type", "value": 0.0},
-            {"address": "/param/fx/a/2/type", "value": 0.0},
-            {"address": "/param/fx/global/1/type", "value": 0.0},
+            {"address": "/param/fx/a/1/type"},
+            {"address": "/param/fx/a/2/type"},
+            {"address": "/param/fx/global/1/type"},
             None,
             None,
             None,
@@ -66,18 +69,22 @@ class OSCInstrument(PyshaMode):
             
         client = None
         server = None
-        dispatcher = Dispatcher()
+        dispatcher = QueryReplyDispatcher()
         dispatcher.set_default_handler(lambda *message: self.log_in.debug(message))
 
         if self.osc_in_port:
-            client = SimpleUDPClient("127.0.0.1", self.osc_in_port)
+            client = BatchingUDPClient("127.0.0.1", self.osc_in_port)
+            dispatcher.client = client
 
-        self.osc = {"client": client, "server": server, "dispatcher": dispatcher}
+        # Values of all OSC parameters of the instrument (slots and device controls)
+        self.parameters = ParameterStore()
+        self.osc = {"client": client, "server": server, "dispatcher": dispatcher, "parameters": self.parameters}
         # populate slot values
         for slot_idx, slot in enumerate(self.slots):
             if slot:
                 # print(f'making a dispatcher for slot {slot["address"]}')
-                dispatcher.map(slot["address"], self.set_slot_state)
+                self.parameters.subscribe(slot["address"], self.slot_changed)
+                dispatcher.map(slot["address"], self.parameters.set_state)
         for x in range(16):
             self.devices.append([])
 
@@ -126,29 +133,13 @@ class OSCInstrument(PyshaMode):
         # print(dispatcher._map.keys())
         # self.query_all_params()
 
-    def set_slot_state(self, *resp):
-        address, value, *rest = resp
-        # print(f"Setting state of slot {address} to {value}")
-        for slot in self.slots:
-            if slot and slot["address"] == address:
-                # if slot["value"] != value:
-                #     print("slot ", slot["address"], slot["value"],  " disselected")
-                #     print("slot ", address, value,  " selected")
-                
-                # This compares new value with current value and fires a selected/disselected call
-                if slot["address"] == ('/param/a/osc/1/type' or 'param/a/osc/2/type') and value == 4 and slot["value"] != 4:
-                    pass
-                    # print("audio in selected")
-
-                if slot["address"] == ('/param/a/osc/1/type' or 'param/a/osc/2/type') and value != 4 and slot["value"] == 4:
-                    pass
-                    # print("audio in dis-selected")
-
-
-                if float(slot["value"]) != float(value):
-                    slot["value"] = float(value)
-                    break
-                
+    def slot_changed(self, address, value):
+        # Parameter store subscription, the selected device of a slot changed
+        mark_display_dirty()
+        notify_user_activity()
+
+    def get_slot_value(self, slot):
+        return self.parameters.get_value(slot["address"])
 
     async def init_devices(self):
         for slot_idx, slot_devices in enumerate(self.devices):
@@ -160,7 +151,7 @@ class OSCInstrument(PyshaMode):
                     for init in device.init:
                         if init["address"] == slot["address"] and int(
                             init["value"]
-                        ) == float(slot["value"]):
+                        ) == self.get_slot_value(slot):
                             await device.select()
 
 
@@ -175,7 +166,7 @@ class OSCInstrument(PyshaMode):
                     for init in device.init:
                         if init["address"] == slot["address"] and int(
                             init["value"]
-                        ) == float(slot["value"]):
+                        ) == self.get_slot_value(slot):
                             device.query_visible_controls()
 
     def query_all_controls(self):
@@ -188,7 +179,7 @@ class OSCInstrument(PyshaMode):
                     for init in device.init:
                         if init["address"] == slot["address"] and int(
                             init["value"]
-                        ) == float(slot["value"]):
+                        ) == self.get_slot_value(slot):
                             device.query_all_controls()
 
     """
@@ -226,7 +217,7 @@ class OSCInstrument(PyshaMode):
             for slot in self.slots:
                 if slot:
                     # print(f'querrying slot /q{slot["address"]}')
-                    client.send_message(f'/q{slot["address"]}', None)
+                    send_query(client, slot["address"], visible=True)
 
     """
     Close transports on ctrl+c
@@ -157,7 +157,7 @@ class OSCMode(PyshaMode):
                     for init in device.init:
                         if init["address"] == slot["address"] and int(
                             init["value"]
-                        ) == float(slot["value"]):
+                        ) == instrument.get_slot_value(slot):
                             devices.append(device)
 
         return devices
@@ -180,7 +180,7 @@ class OSCMode(PyshaMode):
                     for init in device.init:
                         if init["address"] == slot["address"] and int(
                             init["value"]
-                        ) == float(slot["value"]):
+                        ) == instrument.get_slot_value(slot):
                             devices.append(device)
 
         if self.instrument_page == 0:
@@ -1,9 +1,13 @@
 import definitions
 import push2_python
+import math
 import os
 import json
 from glob import glob
 from user_interface.display_utils import show_text
+from user_interface.display_renderer import mark_display_dirty
+from scheduling.task_scheduler import PRIORITY_REALTIME
+from controllers.dispatch_table import TRACK_ENCODER_INDEX
 from pathlib import Path
 import logging
 
@@ -12,6 +16,44 @@ log = logging.getLogger("preset_selection_mode")
 # log.setLevel(level=logging.DEBUG)
 
 
+class PresetTreeNode(object):
+    """One level of the patch tree flattened into lists indexed by row, so that drawing a frame only needs to
+    look at the rows that are visible. Labels (file stems) and preset addresses are computed once when the patch
+    folders are scanned instead of on every frame."""
+
+    def __init__(self, entries, folder=None, child_folders=None):
+        self.keys = []
+        self.labels = []
+        self.children = []  # PresetTreeNode for sub folders, None for presets
+        self.addresses = []  # Preset path without extension for presets, None for sub folders
+        self.index = {}  # key -> row
+        for row, (key, val) in enumerate(entries.items()):
+            row_folder = child_folders[row] if child_folders is not None else folder
+            self.keys.append(key)
+            self.index[key] = row
+            if isinstance(val, dict):
+                self.labels.append(key)
+                self.children.append(PresetTreeNode(val, folder=row_folder))
+                self.addresses.append(None)
+            else:
+                self.labels.append(Path(val).stem)
+                self.children.append(None)
+                self.addresses.append(
+                    os.path.splitext(row_folder + "/" + val)[0]
+                    if row_folder is not None
+                    else None
+                )
+
+    def __len__(self):
+        return len(self.keys)
+
+    def visible_rows(self, position, rows_before=3, rows_after=2):
+        # Rows drawn around the (fractional) encoder position
+        start = max(0, math.ceil(position - rows_before))
+        end = min(len(self.keys), math.floor(position + rows_after) + 1)
+        return range(start, end)
+
+
 class PresetSelectionMode(definitions.PyshaMode):
 
     xor_group = "pads"
@@ -26,6 +68,7 @@ class PresetSelectionMode(definitions.PyshaMode):
     state = [0] * 8
     patches_dicts = []
     current_address = None
+    patch_tree = None
 
     def initialize(self, settings=None):
         for idx, instrument_short_name in enumerate(
@@ -36,6 +79,14 @@ class PresetSelectionMode(definitions.PyshaMode):
             ] * 8
             self.last_pad_in_column_pressed[instrument_short_name] = (0, idx)
 
+        self.scan_patches()
+
+        try:
+            self.load_presets()
+        except:
+            self.save_presets()
+
+    def scan_patches(self):
         self.patches["Factory"] = self.create_dict_from_paths(
             glob(
                 f"**/*.fxp",
@@ -60,10 +111,15 @@ class PresetSelectionMode(definitions.PyshaMode):
             )
         )
 
-        try:
-            self.load_presets()
-        except:
-            self.save_presets()
+        # child_folders is the folder of each top level entry, in the order they were added to self.patches
+        self.patch_tree = PresetTreeNode(
+            self.patches,
+            child_folders=[
+                definitions.FACTORY_PATCHES_FOLDER,
+                definitions.THIRD_PARTY_PATCHES_FOLDER,
+                definitions.USER_PATCHES_FOLDER,
+            ],
+        )
 
     def load_init_presets(self):
         for item in self.presets:
@@ -303,6 +359,7 @@ class PresetSelectionMode(definitions.PyshaMode):
         )
         self.last_pad_in_column_pressed[instrument_short_name] = pad_ij
         self.set_knob_postions()
+        mark_display_dirty()
         log.debug(f"Loading {self.presets[instrument_short_name][pad_ij[0]]}")
         self.send_osc("/patch/load", self.presets[instrument_short_name][pad_ij[0]])
         self.update_pads()
@@ -326,7 +383,9 @@ class PresetSelectionMode(definitions.PyshaMode):
         devices = self.app.osc_mode.get_current_instrument_devices()
         for device in devices:
             device.query_visible_controls()
-            self.app.queue.append(device.select())
+            self.app.task_scheduler.submit(
+                device.select(), priority=PRIORITY_REALTIME, key=(device, "select")
+            )
         self.update_pads()
         # print("pad released")
         return True  # Prevent other modes to get this event
@@ -334,73 +393,41 @@ class PresetSelectionMode(definitions.PyshaMode):
     def nested_draw(
         self,
         ctx,
-        current,
+        node,
         level,
         max_height,
         item_height=20,
         padding_top=5,
         instrument_selector_height=20,
     ):
-        for idx, entry in enumerate(current.items()):
-            key, val = entry
-            bg_color = (
-                definitions.YELLOW
-                if int(self.state[level]) == idx
-                else definitions.GREEN
-            )
-            text_color = (
-                definitions.BLACK
-                if int(self.state[level]) == idx
-                else definitions.WHITE
+        position = self.state[level]
+        selected_row = int(position)
+        for idx in node.visible_rows(position):
+            is_selected = idx == selected_row
+            bg_color = definitions.YELLOW if is_selected else definitions.GREEN
+            text_color = definitions.BLACK if is_selected else definitions.WHITE
+            child = node.children[idx]
+
+            if child is None and is_selected:
+                self.current_address = node.addresses[idx]
+            show_text(
+                ctx,
+                level,
+                item_height * (idx - selected_row) + padding_top + 60,
+                node.labels[idx],
+                height=item_height,
+                font_color=text_color,
+                background_color=bg_color,
+                font_size_percentage=1,
+                center_vertically=True,
+                center_horizontally=True,
+                rectangle_padding=1,
             )
-
-            if isinstance(val, str) and idx - 2 <= self.state[level] <= idx + 3:
-                if idx == int(self.state[level]):
-                    self.current_address = os.path.splitext(self.get_preset_path(val))[
-                        0
-                    ]
-                show_text(
-                    ctx,
-                    level,
-                    item_height * (idx - int(self.state[level])) + padding_top + 60,
-                    Path(val).stem,
-                    height=item_height,
-                    font_color=text_color,
-                    background_color=bg_color,
-                    font_size_percentage=1,
-                    center_vertically=True,
-                    center_horizontally=True,
-                    rectangle_padding=1,
-                )
-            elif isinstance(val, dict) and idx - 2 <= self.state[level] <= idx + 3:
-                show_text(
-                    ctx,
-                    level,
-                    item_height * (idx - int(self.state[level])) + padding_top + 60,
-                    key,
-                    height=item_height,
-                    font_color=text_color,
-                    background_color=bg_color,
-                    font_size_percentage=1,
-                    center_vertically=True,
-                    center_horizontally=True,
-                    rectangle_padding=1,
-                )
-                if int(self.state[level]) == idx:
-                    self.nested_draw(ctx, val, level=level + 1, max_height=max_height)
-
-    def get_preset_path(self, preset):
-        chosen_folder = None
-        if 0 <= self.state[0] < 1:
-            chosen_folder = definitions.FACTORY_PATCHES_FOLDER
-        elif 1 <= self.state[0] < 2:
-            chosen_folder = definitions.THIRD_PARTY_PATCHES_FOLDER
-        elif 2 <= self.state[0] < 3:
-            chosen_folder = definitions.USER_PATCHES_FOLDER
-        return chosen_folder + "/" + preset
+            if child is not None and is_selected:
+                self.nested_draw(ctx, child, level=level + 1, max_height=max_height)
 
     def update_display(self, ctx, w, h):
-        self.nested_draw(ctx, self.patches, level=0, max_height=h)
+        self.nested_draw(ctx, self.patch_tree, level=0, max_height=h)
         show_text(
             ctx,
             6,
@@ -432,17 +459,19 @@ class PresetSelectionMode(definitions.PyshaMode):
         try:
             if definitions.FACTORY_PATCHES_FOLDER in preset_address:
                 self.state[0] = 0
-                level = self.patches["Factory"]
+                level = self.patch_tree.children[0]
             elif definitions.THIRD_PARTY_PATCHES_FOLDER in preset_address:
                 self.state[0] = 1
-                level = self.patches["Third Party"]
+                level = self.patch_tree.children[1]
             elif definitions.USER_PATCHES_FOLDER in preset_address:
                 self.state[0] = 2
-                level = self.patches["User"]
+                level = self.patch_tree.children[2]
 
+            # Select the row of every folder in the path (and the preset itself) in each column
             for idx, piece in enumerate(address_array):
-                self.state[idx + 1] = list(level).index(piece)
-                level = level[piece]  # who knows what this line does? But it works!
+                row = level.index[piece]
+                self.state[idx + 1] = row
+                level = level.children[row]
         except Exception as e:
             print(
                 f"ERROR in preset_selection_mode set_knob_positions() at {preset_address}"
@@ -469,40 +498,25 @@ class PresetSelectionMode(definitions.PyshaMode):
             self.save_presets()
 
     def on_encoder_rotated(self, encoder_name, increment):
-        try:
-            encoder_idx = [
-                push2_python.constants.ENCODER_TRACK1_ENCODER,
-                push2_python.constants.ENCODER_TRACK2_ENCODER,
-                push2_python.constants.ENCODER_TRACK3_ENCODER,
-                push2_python.constants.ENCODER_TRACK4_ENCODER,
-                push2_python.constants.ENCODER_TRACK5_ENCODER,
-                push2_python.constants.ENCODER_TRACK6_ENCODER,
-                push2_python.constants.ENCODER_TRACK7_ENCODER,
-                push2_python.constants.ENCODER_TRACK8_ENCODER,
-            ].index(encoder_name)
-
-            current_dict = self.patches
-            for level in range(encoder_idx):
-                for idx, entry in enumerate(current_dict.values()):
-                    if int(self.state[level]) == idx:
-                        if isinstance(entry, dict):
-                            current_dict = entry
-
-            if (
-                0
-                <= self.state[encoder_idx] + increment * 0.1
-                < len(current_dict.keys())
+        encoder_idx = TRACK_ENCODER_INDEX.get(encoder_name)
+        if encoder_idx is None:
+            return  # Encoder not in list
+
+        # Find the folder shown in the column of this encoder
+        node = self.patch_tree
+        for level in range(encoder_idx):
+            row = int(self.state[level])
+            if row < len(node) and node.children[row] is not None:
+                node = node.children[row]
+
+        if 0 <= self.state[encoder_idx] + increment * 0.1 < len(node):
+            if int(self.state[encoder_idx] + increment * 0.1) != int(
+                self.state[encoder_idx]
             ):
-                if int(self.state[encoder_idx] + increment * 0.1) != int(
-                    self.state[encoder_idx]
-                ):
-                    for idx in range(encoder_idx + 1, 8 - encoder_idx):
-                        self.state[idx] = 0
-
-                self.state[encoder_idx] += increment * 0.1
+                for idx in range(encoder_idx + 1, 8 - encoder_idx):
+                    self.state[idx] = 0
 
-        except ValueError:
-            pass  # Encoder not in list
+            self.state[encoder_idx] += increment * 0.1
 
     def send_osc(self, *args, instrument_shortname=None):
         instrument = self.app.osc_mode.instruments.get(
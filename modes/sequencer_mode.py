@@ -120,6 +120,10 @@ class SequencerMode(MelodicMode):
         # print(self.selected_instrument)
         # print(self.app.osc_mode.get_current_instrument_osc_address_sections())
 
+    def update_pads_for_note(self, midi_note):
+        # Pressing a pad toggles its step, which is done while updating all pads
+        self.update_pads()
+
     def update_pads(self):
         try:
             seq = self.instrument_sequencers[
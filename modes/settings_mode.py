@@ -6,6 +6,10 @@ import sys
 import psutil
 
 from user_interface.display_utils import show_title, show_value, draw_text_at
+from user_interface.display_renderer import mark_display_dirty
+
+# Device change timers fire this long after DELAYED_ACTIONS_APPLY_TIME so the "has not moved for" check passes
+DELAYED_ACTIONS_MARGIN = 0.01
 
 
 class SettingsMode(definitions.PyshaMode):
@@ -34,6 +38,7 @@ class SettingsMode(definitions.PyshaMode):
     n_pages = 3
     encoders_state = {}
     is_running_sw_update = False
+    last_time_dependent_display_state = None
 
     def move_to_next_page(self):
         self.app.buttons_need_update = True
@@ -57,7 +62,27 @@ class SettingsMode(definitions.PyshaMode):
     def deactivate(self):
         self.set_all_upper_row_buttons_off()
 
-    def check_for_delayed_actions(self):
+    def schedule_pending_midi_device_changes(self):
+        # MIDI device changes are applied once the corresponding encoder has not moved for
+        # DELAYED_ACTIONS_APPLY_TIME, schedule a wake-up for the earliest pending change
+        deadlines = [
+            self.encoders_state[encoder_name]["last_message_received"]
+            + definitions.DELAYED_ACTIONS_APPLY_TIME
+            for encoder_name, tmp_device_idx in [
+                (push2_python.constants.ENCODER_TRACK1_ENCODER, self.app.midi_in_tmp_device_idx),
+                (push2_python.constants.ENCODER_TRACK3_ENCODER, self.app.midi_out_tmp_device_idx),
+                (push2_python.constants.ENCODER_TRACK6_ENCODER, self.app.notes_midi_in_tmp_device_idx),
+            ]
+            if tmp_device_idx is not None
+        ]
+        if deadlines:
+            self.app.wakeups.call_later(
+                max(0.0, min(deadlines) - time.time()) + DELAYED_ACTIONS_MARGIN,
+                self.apply_pending_midi_device_changes,
+                key=(self, "midi_devices"),
+            )
+
+    def apply_pending_midi_device_changes(self):
         current_time = time.time()
 
         if self.app.midi_in_tmp_device_idx is not None:
@@ -71,6 +96,7 @@ class SettingsMode(definitions.PyshaMode):
             ):
                 self.app.set_midi_in_device_by_index(self.app.midi_in_tmp_device_idx)
                 self.app.midi_in_tmp_device_idx = None
+                mark_display_dirty()
 
         if self.app.midi_out_tmp_device_idx is not None:
             # Means we are in the process of changing the MIDI out device
@@ -83,6 +109,7 @@ class SettingsMode(definitions.PyshaMode):
             ):
                 self.app.set_midi_out_device_by_index(self.app.midi_out_tmp_device_idx)
                 self.app.midi_out_tmp_device_idx = None
+                mark_display_dirty()
 
         if self.app.notes_midi_in_tmp_device_idx is not None:
             # Means we are in the process of changing the notes MIDI in device
@@ -97,6 +124,49 @@ class SettingsMode(definitions.PyshaMode):
                     self.app.notes_midi_in_tmp_device_idx
                 )
                 self.app.notes_midi_in_tmp_device_idx = None
+                mark_display_dirty()
+
+        # Changes made with other encoders might still be waiting
+        self.schedule_pending_midi_device_changes()
+
+    def check_for_delayed_actions(self):
+        current_time = time.time()
+
+        # Some values shown in the display change with time rather than with user input (FPS counters, latest
+        # AT/velocity values that get hidden after 3 seconds), so flag the display as dirty when these change
+        time_dependent_display_state = self.get_time_dependent_display_state(
+            current_time
+        )
+        if time_dependent_display_state != self.last_time_dependent_display_state:
+            self.last_time_dependent_display_state = time_dependent_display_state
+            mark_display_dirty()
+
+    def get_time_dependent_display_state(self, current_time):
+        if self.current_page == 0:  # Performance settings
+            melodic_mode = self.app.melodic_mode
+            return (
+                self.current_page,
+                [
+                    value if current_time - value[0] < 3 else None
+                    for value in [
+                        melodic_mode.latest_channel_at_value,
+                        melodic_mode.latest_poly_at_value,
+                        melodic_mode.latest_velocity_value,
+                    ]
+                ],
+            )
+        elif self.current_page == 2:  # About
+            return (
+                self.current_page,
+                self.app.actual_frame_rate,
+                self.app.frame_rate_governor.current_frame_rate,
+                self.app.display_renderer.rendered_frame_rate,
+                self.app.frame_clock.lag_stats,
+                self.app.frame_clock.frames_skipped,
+                self.app.input_bus.latency_stats,
+                self.app.input_bus.events_coalesced,
+            )
+        return self.current_page
 
     def set_all_upper_row_buttons_off(self):
         self.push.buttons.set_button_color(
@@ -204,7 +274,7 @@ class SettingsMode(definitions.PyshaMode):
                 push2_python.constants.BUTTON_UPPER_ROW_5, definitions.OFF_BTN_COLOR
             )
             self.push.buttons.set_button_color(
-                push2_python.constants.BUTTON_UPPER_ROW_6, definitions.OFF_BTN_COLOR
+                push2_python.constants.BUTTON_UPPER_ROW_6, definitions.WHITE
             )
             self.push.buttons.set_button_color(
                 push2_python.constants.BUTTON_UPPER_ROW_7, definitions.OFF_BTN_COLOR
@@ -467,9 +537,67 @@ class SettingsMode(definitions.PyshaMode):
                     if self.is_running_sw_update:
                         show_value(ctx, part_x, h, "Running... ", color)
 
-                elif i == 3:  # FPS indicator
+                elif i == 3:  # FPS indicator (measured / rate chosen by the governor, lower when idle)
                     show_title(ctx, part_x, h, "FPS")
-                    show_value(ctx, part_x, h, self.app.actual_frame_rate, color)
+                    show_value(
+                        ctx,
+                        part_x,
+                        h,
+                        "{0} / {1}".format(
+                            self.app.actual_frame_rate,
+                            self.app.frame_rate_governor.current_frame_rate,
+                        ),
+                        color,
+                    )
+
+                elif i == 4:  # Rendered frames per second and real cost of the last rendered frame
+                    show_title(ctx, part_x, h, "RENDER")
+                    show_value(
+                        ctx,
+                        part_x,
+                        h,
+                        "{0}/s {1:.1f}ms".format(
+                            self.app.display_renderer.rendered_frame_rate,
+                            self.app.display_renderer.last_render_time * 1000,
+                        ),
+                        color,
+                    )
+
+                elif i == 5:  # Frame time profiler overlay (stats are dumped to a file when switched off)
+                    show_title(ctx, part_x, h, "PROFILER")
+                    show_value(
+                        ctx,
+                        part_x,
+                        h,
+                        "On" if self.app.frame_profiler.enabled else "Off",
+                        color,
+                    )
+
+                elif i == 6:  # Main loop lag (p95 over the last frames) and total skipped frames
+                    show_title(ctx, part_x, h, "LOOP LAG")
+                    show_value(
+                        ctx,
+                        part_x,
+                        h,
+                        "{0:.1f}ms {1}".format(
+                            self.app.frame_clock.lag_stats["p95"] * 1000,
+                            self.app.frame_clock.frames_skipped,
+                        ),
+                        color,
+                    )
+
+                elif i == 7:  # Push input latency (p95 from MIDI thread to handling) and merged encoder events
+                    show_title(ctx, part_x, h, "INPUT LAT")
+                    show_value(
+                        ctx,
+                        part_x,
+                        h,
+                        "{0:.1f}ms {1}".format(
+                            self.app.input_bus.latency_stats["p95"] * 1000,
+                            self.app.input_bus.events_coalesced,
+                        ),
+                        color,
+                    )
 
         # After drawing all labels and values, draw other stuff if required
         if self.current_page == 0:  # Performance settings
@@ -645,6 +773,8 @@ class SettingsMode(definitions.PyshaMode):
                 elif self.app.notes_midi_in_tmp_device_idx < -1:
                     self.app.notes_midi_in_tmp_device_idx = -1  # Will use -1 for "None"
 
+            self.schedule_pending_midi_device_changes()
+
         elif self.current_page == 2:  # About
             pass
 
@@ -691,6 +821,7 @@ class SettingsMode(definitions.PyshaMode):
                     self.app.midi_in_tmp_device_idx = (
                         len(self.app.available_midi_in_device_names) - 1
                     )
+                self.schedule_pending_midi_device_changes()
                 return True
 
             elif button_name == push2_python.constants.BUTTON_UPPER_ROW_2:
@@ -717,6 +848,7 @@ class SettingsMode(definitions.PyshaMode):
                     self.app.midi_out_tmp_device_idx = (
                         len(self.app.available_midi_out_device_names) - 1
                     )
+                self.schedule_pending_midi_device_changes()
                 return True
 
             elif button_name == push2_python.constants.BUTTON_UPPER_ROW_4:
@@ -749,6 +881,7 @@ class SettingsMode(definitions.PyshaMode):
                     self.app.notes_midi_in_tmp_device_idx = (
                         len(self.app.available_midi_in_device_names) - 1
                     )
+                self.schedule_pending_midi_device_changes()
                 return True
 
             elif button_name == push2_python.constants.BUTTON_UPPER_ROW_7:
@@ -767,6 +900,15 @@ class SettingsMode(definitions.PyshaMode):
                 run_sw_update()
                 return True
 
+            elif button_name == push2_python.constants.BUTTON_UPPER_ROW_6:
+                # Toggle frame time profiler
+                if self.app.frame_profiler.enabled:
+                    self.app.frame_profiler.dump_to_file(extra_stats=self.app.get_loop_stats())
+                    self.app.add_display_notification("Frame profile saved")
+                self.app.frame_profiler.set_enabled(not self.app.frame_profiler.enabled)
+                mark_display_dirty()
+                return True
+
 
 def restart_program():
     """Restarts the current program, with file objects and descriptors cleanup
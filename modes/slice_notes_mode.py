@@ -24,26 +24,15 @@ class SliceNotesMode(MelodicMode):
     def pad_ij_to_midi_note(self, pad_ij):
         return self.start_note + 8 * (7 - pad_ij[0]) + pad_ij[1]
 
-    def update_pads(self):
-        color_matrix = []
-        for i in range(0, 8):
-            row_colors = []
-            for j in range(0, 8):
-                corresponding_midi_note = self.pad_ij_to_midi_note([i, j])
-                midi_16_note_groups_idx = corresponding_midi_note // 16
-                # cell_color = self.color_groups[midi_16_note_groups_idx]
-                if midi_16_note_groups_idx % 2 == 0:
-                    cell_color = (
-                        self.app.instrument_selection_mode.get_current_instrument_color()
-                    )
-                else:
-                    cell_color = definitions.WHITE
-                if self.is_midi_note_being_played(corresponding_midi_note):
-                    cell_color = definitions.NOTE_ON_COLOR
-                row_colors.append(cell_color)
-            color_matrix.append(row_colors)
+    def get_pad_layout_key(self):
+        return (self.start_note, self.get_pad_instrument_color())
 
-        self.push.pads.set_pads_color(color_matrix)
+    def get_base_pad_color(self, i, j, midi_note):
+        midi_16_note_groups_idx = midi_note // 16
+        # cell_color = self.color_groups[midi_16_note_groups_idx]
+        if midi_16_note_groups_idx % 2 == 0:
+            return self.get_pad_instrument_color()
+        return definitions.WHITE
 
     def on_button_pressed(self, button_name):
 
@@ -0,0 +1,131 @@
+import struct
+import threading
+import traceback
+
+from pythonosc.udp_client import SimpleUDPClient
+
+from osc.message_encoder import encode_message
+from scheduling.wakeups import notify_wakeups
+
+# Max size of the datagrams sent by the batcher (bytes). Bigger batches are split in several bundles. A single
+# message bigger than this is still sent (alone).
+MAX_DATAGRAM_SIZE = 8192
+
+BUNDLE_HEADER = b"#bundle\x00" + b"\x00\x00\x00\x00\x00\x00\x00\x01"  # Time tag 1 means "immediately"
+BUNDLE_ELEMENT_SIZE = struct.Struct(">i")
+
+_current_batcher = None
+
+
+def build_datagrams(message_dgrams, max_datagram_size=MAX_DATAGRAM_SIZE):
+    """Packs OSC messages into as few datagrams as possible, without going over max_datagram_size. A datagram
+    with a single message is sent as a plain message, otherwise as a bundle. Message order is kept."""
+    datagrams = []
+    bundle = []
+    bundle_size = len(BUNDLE_HEADER)
+
+    def close_bundle():
+        if len(bundle) == 1:
+            datagrams.append(bundle[0])
+        elif bundle:
+            datagrams.append(
+                BUNDLE_HEADER
+                + b"".join(BUNDLE_ELEMENT_SIZE.pack(len(dgram)) + dgram for dgram in bundle)
+            )
+
+    for dgram in message_dgrams:
+        element_size = BUNDLE_ELEMENT_SIZE.size + len(dgram)
+        if bundle and bundle_size + element_size > max_datagram_size:
+            close_bundle()
+            bundle = []
+            bundle_size = len(BUNDLE_HEADER)
+        bundle.append(dgram)
+        bundle_size += element_size
+    close_bundle()
+    return datagrams
+
+
+class OSCBatcher(object):
+    """Collects the OSC messages sent to each instrument (each BatchingUDPClient) during a main loop tick and sends
+    them as OSC bundles when flush() is called, once per tick by the main loop and after each batch of input
+    events. A macro sweep or a device init list then costs one datagram per instrument instead of one per message.
+    Messages can be queued from any thread, the first one queued wakes up the main loop."""
+
+    def __init__(self, max_datagram_size=MAX_DATAGRAM_SIZE):
+        global _current_batcher
+        _current_batcher = self
+
+        self.max_datagram_size = max_datagram_size
+        self.lock = threading.Lock()
+        self.pending = {}  # client -> [message dgram]
+
+        # Counters
+        self.messages_queued = 0
+        self.messages_immediate = 0
+        self.datagrams_sent = 0
+        self.bundles_sent = 0
+
+    def queue(self, client, dgram):
+        with self.lock:
+            first_pending = not self.pending
+            self.pending.setdefault(client, []).append(dgram)
+            self.messages_queued += 1
+        if first_pending:
+            notify_wakeups()
+
+    def take_pending(self, client=None):
+        with self.lock:
+            if client is None:
+                pending = self.pending
+                self.pending = {}
+                return pending
+            messages = self.pending.pop(client, None)
+            return {client: messages} if messages else {}
+
+    def flush(self, client=None):
+        # Sends all queued messages (or only those of client)
+        for pending_client, message_dgrams in self.take_pending(client).items():
+            for datagram in build_datagrams(message_dgrams, self.max_datagram_size):
+                if datagram.startswith(BUNDLE_HEADER):
+                    self.bundles_sent += 1
+                self.datagrams_sent += 1
+                try:
+                    pending_client.send_dgram(datagram)
+                except Exception:
+                    traceback.print_exc()
+
+    def send_immediately(self, client, dgram):
+        # Messages queued before for the same client go first so that the order of values is kept
+        self.flush(client)
+        self.messages_immediate += 1
+        self.datagrams_sent += 1
+        client.send_dgram(dgram)
+
+    def get_stats(self):
+        return {
+            "messages_queued": self.messages_queued,
+            "messages_immediate": self.messages_immediate,
+            "datagrams_sent": self.datagrams_sent,
+            "bundles_sent": self.bundles_sent,
+        }
+
+
+class BatchingUDPClient(SimpleUDPClient):
+    """SimpleUDPClient whose messages go through the current OSCBatcher (or are sent straight away if there is
+    none). send_message(address, value, immediate=True) and send_message_now() skip the batching, for messages
+    that must go out without waiting for the end of the tick (notes)."""
+
+    def send_message(self, address, value, immediate=False):
+        dgram = encode_message(address, value)
+        if _current_batcher is None:
+            self.send_dgram(dgram)
+        elif immediate:
+            _current_batcher.send_immediately(self, dgram)
+        else:
+            _current_batcher.queue(self, dgram)
+
+    def send_message_now(self, address, value):
+        self.send_message(address, value, immediate=True)
+
+    def send_dgram(self, dgram):
+        self._sock.sendto(dgram, (self._address, self._port))
@@ -0,0 +1,71 @@
+import re
+
+from pythonosc.dispatcher import Dispatcher
+
+# Characters that make an incoming address an OSC address pattern
+ADDRESS_PATTERN_CHARACTERS = frozenset("*?[]{}")
+
+
+def is_address_pattern(address):
+    return not ADDRESS_PATTERN_CHARACTERS.isdisjoint(address)
+
+
+class OSCDispatcher(Dispatcher):
+    """pythonosc Dispatcher that finds the handlers of an incoming address with a dictionary lookup instead of
+    matching the address against every mapped address (there are thousands once all devices of all instruments
+    are mapped). Several handlers can be mapped to the same address, they are called in mapping order.
+
+    Incoming addresses are almost always plain addresses (Surge replies), these are looked up in the map and
+    checked against the (few) mapped addresses with a "*" wildcard. Those follow pythonosc's rule for mapped
+    wildcards: "*" matches any characters, "/" included ("/param/*" matches "/param/a/1"). Handlers of several
+    matching addresses are returned in the order the addresses were first mapped. Incoming OSC address patterns
+    ("/param/a/*"...) fall back to pythonosc's pattern matching. As with pythonosc, the default handler is used
+    when nothing matches."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.wildcard_mappings = []  # [(compiled mapped address, mapped address)]
+        self.mapping_order = {}  # mapped address -> order it was first mapped in
+
+        # Counters
+        self.exact_lookups = 0
+        self.pattern_lookups = 0
+
+    def map(self, address, handler, *args, **kwargs):
+        if address not in self.mapping_order:
+            self.mapping_order[address] = len(self.mapping_order)
+            if "*" in address:
+                # Same regular expression as pythonosc's Dispatcher.handlers_for_address
+                self.wildcard_mappings.append((re.compile(address.replace("*", ".*?") + "$"), address))
+        return super().map(address, handler, *args, **kwargs)
+
+    def handlers_for_address(self, address_pattern):
+        if is_address_pattern(address_pattern):
+            self.pattern_lookups += 1
+            return super().handlers_for_address(address_pattern)
+
+        self.exact_lookups += 1
+        handlers = self._map.get(address_pattern)
+        if self.wildcard_mappings:
+            matched_addresses = [address_pattern] if handlers else []
+            for compiled_address, address in self.wildcard_mappings:
+                if address != address_pattern and compiled_address.match(address_pattern):
+                    matched_addresses.append(address)
+            if len(matched_addresses) > 1:
+                matched_addresses.sort(key=self.mapping_order.__getitem__)
+                handlers = [handler for address in matched_addresses for handler in self._map[address]]
+            elif matched_addresses:
+                handlers = self._map[matched_addresses[0]]
+        if handlers:
+            return handlers
+        if self._default_handler is not None:
+            return [self._default_handler]
+        return []
+
+    def get_stats(self):
+        return {
+            "addresses_mapped": len(self._map),
+            "wildcard_mappings": len(self.wildcard_mappings),
+            "exact_lookups": self.exact_lookups,
+            "pattern_lookups": self.pattern_lookups,
+        }
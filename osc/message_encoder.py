@@ -0,0 +1,143 @@
+import struct
+import threading
+from collections.abc import Iterable
+
+from pythonosc.osc_message_builder import OscMessageBuilder
+
+# Compiled templates kept before the cache is cleared (addresses come from device definitions, so this is not
+# expected to be reached)
+MAX_TEMPLATES = 8192
+
+INT32_MIN = -(2**31)
+INT32_MAX = 2**31 - 1
+
+# Argument type -> (OSC type tag, struct format), for types with a fixed size payload
+ARGUMENT_TYPES = {
+    float: ("f", "f"),
+    int: ("i", "i"),
+    bool: (None, ""),  # True/False are encoded in the type tag only
+    type(None): ("N", ""),
+}
+
+
+def pad_osc_string(string):
+    # OSC strings are null terminated and padded to a multiple of 4 bytes
+    encoded = string.encode("utf-8")
+    return encoded + b"\x00" * (4 - len(encoded) % 4)
+
+
+def message_args(value):
+    # Same arguments as SimpleUDPClient.send_message
+    if value is None:
+        return ()
+    if not isinstance(value, Iterable) or isinstance(value, (str, bytes)):
+        return (value,)
+    return tuple(value)
+
+
+def build_message_dgram(address, value):
+    # Encodes a message with pythonosc (used for argument types MessageEncoder does not compile)
+    builder = OscMessageBuilder(address=address)
+    for arg in message_args(value):
+        builder.add_arg(arg)
+    return builder.build().dgram
+
+
+class MessageTemplate(object):
+    """Encoded address and type tags of messages with a given address and argument types, followed by the space
+    for the arguments in a preallocated buffer. Encoding a message only packs the arguments into the buffer."""
+
+    __slots__ = ("buffer", "offset", "packer", "payload_indices")
+
+    def __init__(self, address, arg_types, args):
+        type_tags = ","
+        payload_format = ">"
+        self.payload_indices = []
+        for index, (arg_type, arg) in enumerate(zip(arg_types, args)):
+            type_tag, arg_format = ARGUMENT_TYPES[arg_type]
+            if arg_type is bool:
+                type_tag = "T" if arg else "F"
+            type_tags += type_tag
+            if arg_format:
+                payload_format += arg_format
+                self.payload_indices.append(index)
+        prefix = pad_osc_string(address) + pad_osc_string(type_tags)
+        self.packer = struct.Struct(payload_format)
+        self.offset = len(prefix)
+        self.buffer = bytearray(prefix + b"\x00" * self.packer.size)
+
+    def encode(self, args):
+        if len(self.payload_indices) == len(args):
+            self.packer.pack_into(self.buffer, self.offset, *args)
+        else:
+            self.packer.pack_into(self.buffer, self.offset, *[args[index] for index in self.payload_indices])
+        return bytes(self.buffer)
+
+
+class MessageEncoder(object):
+    """Encodes OSC messages like pythonosc's OscMessageBuilder (same bytes), but compiles a MessageTemplate per
+    address and argument types the first time they are seen, so sending the same parameter again only packs the
+    new values. Arguments of other types (strings, blobs...) and out of range integers are encoded by pythonosc."""
+
+    def __init__(self, max_templates=MAX_TEMPLATES):
+        self.max_templates = max_templates
+        self.lock = threading.Lock()  # Templates share their buffer, the sequencer sends from its own thread
+        self.templates = {}  # (address, arg types[, bool values]) -> MessageTemplate
+
+        # Counters
+        self.messages_encoded = 0
+        self.templates_compiled = 0
+        self.messages_not_compiled = 0
+
+    def encode(self, address, value):
+        self.messages_encoded += 1
+        args = message_args(value)
+        arg_types = tuple(type(arg) for arg in args)
+        key = (address, arg_types)
+        if bool in arg_types:
+            key = (address, arg_types, tuple(arg for arg in args if type(arg) is bool))
+
+        template = self.templates.get(key)
+        if template is None:
+            if not self.can_compile(arg_types, args):
+                self.messages_not_compiled += 1
+                return build_message_dgram(address, value)
+            if len(self.templates) >= self.max_templates:
+                self.templates = {}
+            template = MessageTemplate(address, arg_types, args)
+            self.templates[key] = template
+            self.templates_compiled += 1
+        elif int in arg_types and not self.can_compile(arg_types, args):
+            self.messages_not_compiled += 1
+            return build_message_dgram(address, value)
+        with self.lock:
+            return template.encode(args)
+
+    @staticmethod
+    def can_compile(arg_types, args):
+        for arg_type, arg in zip(arg_types, args):
+            if arg_type not in ARGUMENT_TYPES:
+                return False
+            if arg_type is int and not INT32_MIN <= arg <= INT32_MAX:
+                return False  # pythonosc encodes these as 64 bit integers
+        return True
+
+    def get_stats(self):
+        return {
+            "messages_encoded": self.messages_encoded,
+            "templates": len(self.templates),
+            "templates_compiled": self.templates_compiled,
+            "messages_not_compiled": self.messages_not_compiled,
+        }
+
+
+_encoder = MessageEncoder()
+
+
+def encode_message(address, value):
+    """Encodes an OSC message (arguments as in SimpleUDPClient.send_message) with the shared MessageEncoder"""
+    return _encoder.encode(address, value)
+
+
+def get_encoder_stats():
+    return _encoder.get_stats()
@@ -0,0 +1,110 @@
+import traceback
+import numpy
+
+INITIAL_CAPACITY = 256
+
+
+class ParameterStore(object):
+    """Values of the parameters of an instrument, kept in a float array. Each OSC address gets an integer index
+    into the array the first time it is seen (index_of), controls keep that index and read/write their value
+    through the store, so controls sharing an address share the value. Reading a value is an array access and
+    setting one by address a dictionary lookup (set_state can be mapped directly in the OSC dispatcher).
+
+    Callbacks subscribed to an address are called with (address, value) when its value changes. snapshot() copies
+    all values, diff() and restore() compare a snapshot with the current values in one vectorised operation."""
+
+    def __init__(self, capacity=INITIAL_CAPACITY):
+        self.indices = {}  # address -> index
+        self.addresses = []  # index -> address
+        self.values = numpy.zeros(capacity, dtype=numpy.float64)
+        self.subscribers = {}  # index -> [callback(address, value)]
+
+        # Counters
+        self.values_set = 0
+        self.values_changed = 0
+
+    def __len__(self):
+        return len(self.addresses)
+
+    def index_of(self, address, default=0.0):
+        index = self.indices.get(address)
+        if index is not None:
+            return index
+        index = len(self.addresses)
+        if index == len(self.values):
+            self.values = numpy.concatenate([self.values, numpy.zeros(len(self.values), dtype=numpy.float64)])
+        self.values[index] = default
+        self.indices[address] = index
+        self.addresses.append(address)
+        return index
+
+    def get(self, index):
+        return float(self.values[index])
+
+    def get_value(self, address, default=0.0):
+        index = self.indices.get(address)
+        return default if index is None else float(self.values[index])
+
+    def set(self, index, value):
+        # Returns True if the value changed
+        self.values_set += 1
+        if self.values[index] == value:
+            return False
+        self.values[index] = value
+        self.values_changed += 1
+        self.notify(index)
+        return True
+
+    def set_value(self, address, value):
+        return self.set(self.index_of(address), value)
+
+    def set_state(self, address, value, *args):
+        # OSC dispatcher handler
+        self.set_value(address, float(value))
+
+    def subscribe(self, address, callback):
+        self.subscribers.setdefault(self.index_of(address), []).append(callback)
+
+    def unsubscribe(self, address, callback):
+        callbacks = self.subscribers.get(self.indices.get(address), [])
+        if callback in callbacks:
+            callbacks.remove(callback)
+
+    def notify(self, index):
+        callbacks = self.subscribers.get(index)
+        if not callbacks:
+            return
+        address = self.addresses[index]
+        value = float(self.values[index])
+        for callback in callbacks:
+            try:
+                callback(address, value)
+            except Exception:
+                traceback.print_exc()
+
+    def snapshot(self):
+        return self.values[: len(self.addresses)].copy()
+
+    def diff(self, snapshot):
+        # Addresses whose value differs from the snapshot (addresses added after the snapshot are not compared)
+        n = min(len(snapshot), len(self.addresses))
+        changed = numpy.flatnonzero(self.values[:n] != snapshot[:n])
+        return [self.addresses[index] for index in changed]
+
+    def restore(self, snapshot):
+        """Sets the values of a snapshot back, subscribers are notified of the values that change. Returns the
+        addresses that changed, e.g. to send them to the instrument."""
+        n = min(len(snapshot), len(self.addresses))
+        changed = numpy.flatnonzero(self.values[:n] != snapshot[:n])
+        self.values[changed] = snapshot[changed]
+        self.values_changed += len(changed)
+        for index in changed:
+            self.notify(index)
+        return [self.addresses[index] for index in changed]
+
+    def get_stats(self):
+        return {
+            "parameters": len(self.addresses),
+            "values_set": self.values_set,
+            "values_changed": self.values_changed,
+        }
@@ -0,0 +1,190 @@
+import time
+import traceback
+
+from osc.dispatcher import OSCDispatcher
+
+# Max queries sent per second, over all instruments
+DEFAULT_QUERY_RATE = 400.0
+
+# Lowest rate accepted (the rate comes from settings.json, 0 or negative values would stop all queries)
+MIN_QUERY_RATE = 1.0
+
+# Max queries sent at once after an idle period
+QUERY_BURST = 32
+
+# Max queries per instrument (client) sent and not replied yet
+MAX_OUTSTANDING_QUERIES = 32
+
+# Queries not replied after this are forgotten (the address might not exist), seconds
+QUERY_REPLY_TIMEOUT = 1.0
+
+# Min time between two runs of the scheduler while there are queries waiting (seconds)
+PUMP_INTERVAL = 0.005
+
+_current_query_scheduler = None
+
+
+def send_query(client, address, visible=True):
+    """Asks for the value of the parameter at address (sends "/q" + address to client) through the current query
+    scheduler, or straight away if there is none. Queries of visible controls are sent before the others."""
+    if not client:
+        return
+    if _current_query_scheduler is None:
+        client.send_message("/q" + address, None)
+        return
+    _current_query_scheduler.request(client, address, visible=visible)
+
+
+def query_reply_received(client, address):
+    if _current_query_scheduler is not None:
+        _current_query_scheduler.reply_received(client, address)
+
+
+class QueryReplyDispatcher(OSCDispatcher):
+    """Dispatcher that reports every address it receives from an instrument to the query scheduler, so
+    that queries to that instrument are known to have been replied. client is the instrument's OSC client."""
+
+    def __init__(self, client=None):
+        super().__init__()
+        self.client = client
+
+    def handlers_for_address(self, address_pattern):
+        query_reply_received(self.client, address_pattern)
+        return super().handlers_for_address(address_pattern)
+
+
+class QueryScheduler(object):
+    """Paces the /q parameter queries sent to instruments. Queries waiting to be sent are deduplicated per
+    instrument and address (devices share addresses, pages and presets trigger the same queries again), queries
+    of visible controls go before the others and queries are sent at most at `rate` per second (with bursts of
+    QUERY_BURST), taking turns between instruments. Sent queries stay outstanding until the instrument replies
+    with the same address (or QUERY_REPLY_TIMEOUT passes), asking again for an outstanding address is a no-op and
+    no more than MAX_OUTSTANDING_QUERIES are outstanding per instrument, so instruments are not flooded after a
+    preset load. While the only queries waiting are for instruments at that limit, the scheduler sleeps until the
+    first of their queries times out or a reply arrives.
+
+    call_later(delay, callback, key=None) schedules the next batch of queries, normally Wakeups.call_later
+    (scheduling again with the same key replaces the previous timer)."""
+
+    def __init__(self, call_later, rate=DEFAULT_QUERY_RATE, clock=time.monotonic):
+        global _current_query_scheduler
+        _current_query_scheduler = self
+
+        self.call_later = call_later
+        self.rate = max(MIN_QUERY_RATE, rate)
+        self.clock = clock
+        self.waiting = {}  # client -> {visible -> {address: None}}, in request order
+        self.outstanding = {}  # client -> {address: time sent}, in sending order
+        self.tokens = QUERY_BURST
+        self.last_pump_time = clock()
+        self.pump_deadline = None  # Clock time of the next scheduled pump, None if not scheduled
+
+        # Counters
+        self.queries_requested = 0
+        self.queries_deduplicated = 0
+        self.queries_sent = 0
+        self.replies_received = 0
+        self.queries_timed_out = 0
+
+    def request(self, client, address, visible=False):
+        self.queries_requested += 1
+        if address in self.outstanding.get(client, ()):
+            self.queries_deduplicated += 1
+            return
+        queues = self.waiting.get(client)
+        if queues is None:
+            queues = self.waiting[client] = {True: {}, False: {}}
+        if address in queues[True]:
+            self.queries_deduplicated += 1
+            return
+        if address in queues[False]:
+            self.queries_deduplicated += 1
+            if not visible:
+                return
+            del queues[False][address]  # Became visible, move it ahead
+        queues[visible][address] = None
+        if not self.is_full(client):
+            self.schedule_pump(0)
+
+    def reply_received(self, client, address):
+        outstanding = self.outstanding.get(client)
+        if not outstanding or outstanding.pop(address, None) is None:
+            return
+        self.replies_received += 1
+        if client in self.waiting and len(outstanding) == MAX_OUTSTANDING_QUERIES - 1:
+            self.schedule_pump(0)  # Instrument was full, its waiting queries can go
+
+    def is_full(self, client):
+        return len(self.outstanding.get(client, ())) >= MAX_OUTSTANDING_QUERIES
+
+    def schedule_pump(self, delay):
+        deadline = self.clock() + delay
+        if self.pump_deadline is not None and self.pump_deadline <= deadline:
+            return
+        self.pump_deadline = deadline
+        self.call_later(delay, self.pump, key="query_scheduler")
+
+    def expire_outstanding(self, now):
+        # Outstanding queries are in sending order, only the expired ones at the start are looked at
+        for outstanding in self.outstanding.values():
+            expired = []
+            for address, sent_time in outstanding.items():
+                if now - sent_time < QUERY_REPLY_TIMEOUT:
+                    break
+                expired.append(address)
+            for address in expired:
+                del outstanding[address]
+            self.queries_timed_out += len(expired)
+
+    def pump(self):
+        self.pump_deadline = None
+        now = self.clock()
+        self.tokens = min(QUERY_BURST, self.tokens + (now - self.last_pump_time) * self.rate)
+        self.last_pump_time = now
+        self.expire_outstanding(now)
+
+        # One query per instrument in turn, instruments at the outstanding limit are skipped
+        for visible in (True, False):
+            clients = [
+                client for client, queues in self.waiting.items() if queues[visible] and not self.is_full(client)
+            ]
+            while clients and self.tokens >= 1:
+                for client in list(clients):
+                    if self.tokens < 1:
+                        break
+                    queue = self.waiting[client][visible]
+                    address = next(iter(queue))
+                    del queue[address]
+                    self.tokens -= 1
+                    self.send(client, address, now)
+                    if not queue or self.is_full(client):
+                        clients.remove(client)
+        for client in [client for client, queues in self.waiting.items() if not queues[True] and not queues[False]]:
+            del self.waiting[client]
+
+        if any(not self.is_full(client) for client in self.waiting):
+            self.schedule_pump(max(PUMP_INTERVAL, (1 - self.tokens) / self.rate))
+        elif self.waiting:
+            # Only full instruments have queries waiting, sleep until their first outstanding query times out
+            first_sent = min(next(iter(self.outstanding[client].values())) for client in self.waiting)
+            self.schedule_pump(max(PUMP_INTERVAL, first_sent + QUERY_REPLY_TIMEOUT - now))
+
+    def send(self, client, address, now):
+        self.outstanding.setdefault(client, {})[address] = now
+        self.queries_sent += 1
+        try:
+            client.send_message("/q" + address, None)
+        except Exception:
+            traceback.print_exc()
+
+    def get_stats(self):
+        return {
+            "rate": self.rate,
+            "queries_waiting": sum(len(queues[True]) + len(queues[False]) for queues in self.waiting.values()),
+            "queries_outstanding": sum(len(outstanding) for outstanding in self.outstanding.values()),
+            "queries_requested": self.queries_requested,
+            "queries_deduplicated": self.queries_deduplicated,
+            "queries_sent": self.queries_sent,
+            "replies_received": self.replies_received,
+            "queries_timed_out": self.queries_timed_out,
+        }
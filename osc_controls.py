@@ -2,6 +2,18 @@ import definitions
 import math
 import push2_python
 from user_interface.display_utils import show_text
+from user_interface.widget_atlas import draw_slider
+from user_interface.palette import palette
+from user_interface.display_renderer import mark_display_dirty
+from user_interface.frame_rate_governor import notify_user_activity
+from controllers.encoder_accumulator import send_accumulated
+from osc.parameter_store import ParameterStore
+from controllers.encoder_acceleration import (
+    get_acceleration_curve,
+    accelerate_increment,
+    fine_mode_active,
+    FINE_DECIMAL_PLACES,
+)
 import logging
 
 logger = logging.getLogger("osc_controls")
@@ -24,6 +36,13 @@ def scale_value(value, min_val, max_val, decimals=DECIMAL_PLACES):
     return round(float(value / SCALING_FACTOR * (max_val - min_val)), decimals)
 
 
+def scale_increment(control, increment, min_val, max_val):
+    # Encoder increment -> value increment, with the control's acceleration curve (or fine mode) applied
+    increment = accelerate_increment(control.acceleration, control, increment)
+    decimals = FINE_DECIMAL_PLACES if fine_mode_active() else DECIMAL_PLACES
+    return scale_value(increment, min_val, max_val, decimals=decimals)
+
+
 def closest(lst, K):
     return lst[min(range(len(lst)), key=lambda i: abs(lst[i] - K))]
 
@@ -32,16 +51,16 @@ class OSCControl(object):
     name = "Range"
     size = 1
 
-    def __init__(self, config, get_color_func=None, send_osc_func=None):
+    def __init__(self, config, get_color_func=None, send_osc_func=None, parameters=None):
         if config["$type"] != "control-range":
             raise Exception("Invalid config passed to new OSCControl")
+        self.acceleration = get_acceleration_curve(config)
         self.color = definitions.GRAY_LIGHT
         self.color_rgb = None
         self.label = "Unknown"
         self.address = None
         self.min = 0.0
         self.max = 1.0
-        self.value = 0.0
         self.modmatrix = config.get("modmatrix", True)
         self.string = ""
         self.get_color_func = None
@@ -50,6 +69,9 @@ class OSCControl(object):
         self.get_color_func = get_color_func
         self.min = config["min"]
         self.max = config["max"]
+        # Value is kept in the instrument's parameter store (a store of its own if not given one)
+        self.parameters = parameters if parameters is not None else ParameterStore(capacity=1)
+        self.parameter_index = self.parameters.index_of(self.address)
         self.log = logger.getChild(f"{self.label}:Range")
         self.bipolar = None
         if "bipolar" in config:
@@ -61,6 +83,14 @@ class OSCControl(object):
             self.send_osc_func = send_osc_func
             # self.send_osc_func(f"/q{self.address}", None)
 
+    @property
+    def value(self):
+        return self.parameters.get(self.parameter_index)
+
+    @value.setter
+    def value(self, value):
+        self.parameters.set(self.parameter_index, value)
+
     def query(self):
         self.send_osc_func("/q" + self.address, None)
 
@@ -68,166 +98,45 @@ class OSCControl(object):
         pass
 
     def draw(self, ctx, x_part):
-        if self.bipolar == True:
-            margin_top = 25
-            # Param name
-            name_height = 20
-            show_text(
-                ctx,
-                x_part,
-                margin_top,
-                self.label,
-                height=name_height,
-                font_color=definitions.WHITE,
-                center_horizontally=True,
-            )
-
-            # Param value
-            val_height = 20
-            color = self.get_color_func()
-            show_text(
-                ctx,
-                x_part,
-                margin_top + name_height,
-                str(round(self.value, 2)),
-                # str(self.string),
-                height=val_height,
-                font_color=color,
-                margin_left=int(self.value / self.max * 80 + 10),
-            )
+        margin_top = 25
 
-            # Knob
-            ctx.save()
-
-            height = 30
-            length = 80
-            radius = height / 2
-            triangle_padding = 3
-            triangle_size = 6
-
-            display_w = push2_python.constants.DISPLAY_LINE_PIXELS
-            x = (display_w // 8) * x_part
-            y = margin_top + name_height + val_height + radius + 5
-
-            xc = x + radius + 3
-            yc = y
-
-            # This is needed to prevent showing line from previous position
-            ctx.set_source_rgb(0, 0, 0)
-            ctx.move_to(xc, yc)
-            ctx.stroke()
-
-            # Inner line
-            bipolar_value = self.value / self.max - 0.5 * self.max
-            ctx.move_to(xc, yc)
-            ctx.line_to(xc + length, yc)
-            ctx.set_source_rgb(*definitions.get_color_rgb_float(definitions.GRAY_LIGHT))
-            ctx.set_line_width(1)
-            ctx.stroke()
-
-            # Outer line
-            ctx.move_to(xc + 0.5 * length, yc)
-            ctx.line_to(xc + 0.5 * length + bipolar_value * length, yc)
-            ctx.set_source_rgb(*definitions.get_color_rgb_float(color))
-            ctx.set_line_width(3)
-            ctx.stroke()
-
-            # Triangle indicator
-            ctx.move_to(xc + length * self.value / self.max, yc - triangle_padding)
-            ctx.line_to(
-                xc + length * self.value / self.max - triangle_size,
-                yc - triangle_padding - 2 * triangle_size,
-            )
-            ctx.line_to(
-                xc + length * self.value / self.max + triangle_size,
-                yc - triangle_padding - 2 * triangle_size,
-            )
-            ctx.move_to(xc + length * self.value, yc - triangle_padding)
-            ctx.close_path()
-            ctx.set_source_rgb(*definitions.get_color_rgb_float(color))
-            ctx.fill_preserve()
-            ctx.restore()
+        # Param name
+        name_height = 20
+        show_text(
+            ctx,
+            x_part,
+            margin_top,
+            self.label,
+            height=name_height,
+            font_color=definitions.WHITE,
+            center_horizontally=True,
+        )
 
-        if self.bipolar == False:
-            margin_top = 25
+        # Param value
+        val_height = 20
+        color = self.get_color_func()
+        show_text(
+            ctx,
+            x_part,
+            margin_top + name_height,
+            str(round(self.value, 2)),
+            # str(self.string),
+            height=val_height,
+            font_color=color,
+            margin_left=int(self.value / self.max * 80 + 10),
+        )
 
-            # Param name
-            name_height = 20
-            show_text(
-                ctx,
-                x_part,
-                margin_top,
-                self.label,
-                height=name_height,
-                font_color=definitions.WHITE,
-                center_horizontally=True,
-            )
+        # Knob (pre-rendered sprite for the quantised value)
+        height = 30
+        radius = height / 2
 
-            # Param value
-            val_height = 20
-            color = self.get_color_func()
-            show_text(
-                ctx,
-                x_part,
-                margin_top + name_height,
-                str(round(self.value, 2)),
-                # str(self.string),
-                height=val_height,
-                font_color=color,
-                margin_left=int(self.value / self.max * 80 + 10),
-            )
+        display_w = push2_python.constants.DISPLAY_LINE_PIXELS
+        x = (display_w // 8) * x_part
+        y = margin_top + name_height + val_height + radius + 5
 
-            # Knob
-            ctx.save()
-
-            height = 30
-            length = 80
-            radius = height / 2
-            triangle_padding = 3
-            triangle_size = 6
-
-            display_w = push2_python.constants.DISPLAY_LINE_PIXELS
-            x = (display_w // 8) * x_part
-            y = margin_top + name_height + val_height + radius + 5
-
-            xc = x + radius + 3
-            yc = y
-
-            # This is needed to prevent showing line from previous position
-            ctx.set_source_rgb(0, 0, 0)
-            ctx.move_to(xc, yc)
-            ctx.stroke()
-
-            # Inner line
-            ctx.move_to(xc, yc)
-            ctx.line_to(xc + length, yc)
-
-            ctx.set_source_rgb(*definitions.get_color_rgb_float(definitions.GRAY_LIGHT))
-            ctx.set_line_width(1)
-            ctx.stroke()
-
-            # Outer line
-            ctx.move_to(xc, yc)
-            ctx.line_to(xc + length * self.value / self.max, yc)
-            ctx.set_source_rgb(*definitions.get_color_rgb_float(color))
-            ctx.set_line_width(3)
-            ctx.stroke()
-
-            # Triangle indicator
-            ctx.move_to(xc + length * self.value / self.max, yc - triangle_padding)
-            ctx.line_to(
-                xc + length * self.value / self.max - triangle_size,
-                yc - triangle_padding - 2 * triangle_size,
-            )
-            ctx.line_to(
-                xc + length * self.value / self.max + triangle_size,
-                yc - triangle_padding - 2 * triangle_size,
-            )
-            ctx.move_to(xc + length * self.value, yc - triangle_padding)
-            ctx.close_path()
-            ctx.set_source_rgb(*definitions.get_color_rgb_float(color))
-            ctx.fill_preserve()
-            ctx.restore()
+        xc = x + radius + 3
+        yc = y
+        draw_slider(ctx, xc, yc, self.value, self.max, color, bipolar=bool(self.bipolar))
 
     def draw_submenu(self, ctx, x_part):
         margin_top = 95
@@ -269,7 +178,7 @@ class OSCControl(object):
         ctx.move_to(xc - line_padding, yc - 5)
         ctx.line_to(xc - line_padding, yc + 5)
 
-        ctx.set_source_rgb(*definitions.get_color_rgb_float(definitions.GRAY_LIGHT))
+        palette.set_source(ctx, definitions.GRAY_LIGHT)
         ctx.set_line_width(1)
         ctx.stroke()
 
@@ -277,44 +186,46 @@ class OSCControl(object):
         ctx.move_to(xc + line_padding + line_width, yc - 5)
         ctx.line_to(xc + line_padding + line_width, yc + 5)
 
-        ctx.set_source_rgb(*definitions.get_color_rgb_float(definitions.GRAY_LIGHT))
+        palette.set_source(ctx, definitions.GRAY_LIGHT)
         ctx.set_line_width(1)
         ctx.stroke()
 
-        # Knob
-        ctx.save()
-
     def set_state(self, address, *args):
         value, *rest = args
         self.log.debug((address, value))
-        self.value = value
+        if self.parameters.set(self.parameter_index, float(value)):
+            mark_display_dirty()
+            notify_user_activity()  # Echo of a parameter changed elsewhere, keep UI responsive
         # TODO: this human readable string doesn't change with knob movements, querry fixes it but makes it glitchy
         # self.string = string
 
     def update_value(self, increment, **kwargs):
-        scaled = scale_value(increment, self.min, self.max)
+        scaled = scale_increment(self, increment, self.min, self.max)
         if self.value + scaled > self.max:
             self.value = self.max
         elif self.value + scaled < self.min:
             self.value = self.min
         else:
             self.value += scaled
+        mark_display_dirty()
         # print("update value: adress", self.address, "value", self.value)
         # Send cc message, subtract 1 to number because MIDO works from 0 - 127
         # msg = mido.Message('control_change', control=self.address, value=self.value)
         # msg=f'control_change {self.address} {self.value}'
-        self.send_osc_func(self.address, float(self.value))
+        send_accumulated(self.send_osc_func, self.address, float(self.value))
 
 
 class OSCSpacerAddress(object):
     name = "SpacerAddress"
     size = 1
 
-    def __init__(self, config, send_osc_func=None):
+    def __init__(self, config, send_osc_func=None, parameters=None):
         if config["$type"] != "control-spacer-address":
             raise Exception("Invalid config passed to new OSCControl")
         self.label = ""
         self.address = config["address"]
+        self.parameters = parameters if parameters is not None else ParameterStore(capacity=1)
+        self.parameter_index = self.parameters.index_of(self.address)
         self.log = logger.getChild(f"{self.label}:Range")
         self.modmatrix = False
 
@@ -331,13 +242,17 @@ class OSCSpacerAddress(object):
     def update_value(self, *args, **kwargs):
         pass
 
+    @property
+    def value(self):
+        return self.parameters.get(self.parameter_index)
+
     def query(self):
         self.send_osc_func("/q" + self.address, None)
 
     def set_state(self, address, *args):
         value, *rest = args
         self.log.debug((address, value))
-        self.value = value
+        self.parameters.set(self.parameter_index, float(value))
 
 
 class ControlSpacer(object):
@@ -372,6 +287,7 @@ class OSCControlMacro(object):
     def __init__(self, config, get_color_func=None, send_osc_func=None):
         if config["$type"] != "control-macro":
             raise Exception("Invalid config passed to new OSCControlMacro")
+        self.acceleration = get_acceleration_curve(config)
 
         self.color = definitions.GRAY_LIGHT
         self.color_rgb = None
@@ -390,7 +306,7 @@ class OSCControlMacro(object):
         self.log = logger.getChild("Macro")
 
     def update_value(self, increment, **kwargs):
-        scaled = scale_value(increment, self.min, self.max)
+        scaled = scale_increment(self, increment, self.min, self.max)
         if self.value + scaled > self.max:
             self.value = self.max
         elif self.value + scaled < self.min:
@@ -402,8 +318,9 @@ class OSCControlMacro(object):
         # msg = mido.Message('control_change', control=self.address, value=self.value)
         # msg=f'control_change {self.address} {self.value}'
 
+        mark_display_dirty()
         for param in self.params:
-            self.send_osc_func(param["address"], float(self.value))
+            send_accumulated(self.send_osc_func, param["address"], float(self.value))
 
     def query(self):
         self.send_osc_func("/q" + self.address, None)
@@ -413,6 +330,7 @@ class OSCControlMacro(object):
         self.log.debug((address, value))
 
         self.value = scale_value(value)
+        mark_display_dirty()
         ###TODO: Find by index
 
 
@@ -437,10 +355,11 @@ class OSCControlSwitch(object):
         return None
 
     def __init__(
-        self, config, get_color_func=None, send_osc_func=None, dispatcher=None
+        self, config, get_color_func=None, send_osc_func=None, dispatcher=None, parameters=None
     ):
         if config["$type"] != "control-switch":
             raise Exception("Invalid config passed to new OSCControlSwitch")
+        self.acceleration = get_acceleration_curve(config)
 
         if dispatcher == None:
             raise Exception("Switch not given dispatcher")
@@ -459,6 +378,7 @@ class OSCControlSwitch(object):
                 get_color_func=get_color_func,
                 send_osc_func=send_osc_func,
                 dispatcher=dispatcher,
+                parameters=parameters,
             )
 
             self.groups.append(group_control)
@@ -484,10 +404,11 @@ class OSCControlSwitch(object):
         if not self.value:
             pass
 
-        scaled = scale_value(increment, 0, len(self.groups))
+        scaled = scale_increment(self, increment, 0, len(self.groups))
 
         if 0 <= (self.value + scaled) <= len(self.groups):
             self.value += scaled
+            mark_display_dirty()
 
             active_group = self.get_active_group()
             if hasattr(active_group, "select"):
@@ -516,6 +437,7 @@ class OSCControlSwitch(object):
                     or control.address == address
                 ):
                     self.value = float(idx)
+        mark_display_dirty()
 
     def draw(self, ctx, offset):
         margin_top = 30
@@ -587,7 +509,7 @@ class OSCGroup(object):
         return sum([control.size for control in self.controls])
 
     def __init__(
-        self, config, get_color_func=None, send_osc_func=None, dispatcher=None
+        self, config, get_color_func=None, send_osc_func=None, dispatcher=None, parameters=None
     ):
         if config["$type"] != "group":
             raise Exception("Invalid type passed to new OSCGroup")
@@ -614,6 +536,7 @@ class OSCGroup(object):
                         get_color_func=get_color_func,
                         send_osc_func=send_osc_func,
                         dispatcher=dispatcher,
+                        parameters=parameters,
                     )
 
                     # This might be wrong
@@ -626,6 +549,7 @@ class OSCGroup(object):
                         item,
                         get_color_func=get_color_func,
                         send_osc_func=send_osc_func,
+                        parameters=parameters,
                     )
 
                     if control.address:
@@ -638,6 +562,7 @@ class OSCGroup(object):
                         item,
                         get_color_func=get_color_func,
                         send_osc_func=send_osc_func,
+                        parameters=parameters,
                     )
 
                     if control.address:
@@ -650,6 +575,7 @@ class OSCGroup(object):
                     control = OSCSpacerAddress(
                         item,
                         send_osc_func=send_osc_func,
+                        parameters=parameters,
                     )
 
                     if control.address:
@@ -701,9 +627,10 @@ class OSCControlMenu(object):
             return active.label
         return ""
 
-    def __init__(self, config, get_color_func=None, send_osc_func=None):
+    def __init__(self, config, get_color_func=None, send_osc_func=None, parameters=None):
         if config["$type"] != "control-menu":
             raise Exception("Invalid config passed to new OSCControlMenu")
+        self.acceleration = get_acceleration_curve(config)
 
         self.items = []
         self.get_color_func = get_color_func
@@ -723,9 +650,16 @@ class OSCControlMenu(object):
         if self.address is None and len(self.items) > 0:
             self.address = self.items[0].address  # assumes all items have same address
 
+        # The parameter value is kept in the parameter store, self.value is the index of the selected item
+        self.parameters = parameters if parameters is not None else ParameterStore(capacity=1)
+        self.parameter_index = self.parameters.index_of(self.address) if self.address else None
+
     def set_state(self, address, value, *args):
         self.log.debug((address, value))
+        if self.parameter_index is not None:
+            self.parameters.set(self.parameter_index, float(value))
         self.value = self.get_closest_idx(self.value)
+        mark_display_dirty()
 
     def query(self):
         self.send_osc_func("/q" + self.address, None)
@@ -734,7 +668,7 @@ class OSCControlMenu(object):
         if not self.value:
             pass
 
-        scaled = scale_value(increment, 0, len(self.items))
+        scaled = scale_increment(self, increment, 0, len(self.items))
         new_value = self.value + scaled
 
         # print(self.label, min_item_value, max_item_value, scaled, self.value, new_value)
@@ -744,6 +678,7 @@ class OSCControlMenu(object):
             self.value = 0
         elif new_value > len(self.items) - 1:
             self.value = len(self.items) - 1
+        mark_display_dirty()
 
         active_item = self.get_active_menu_item()
         if hasattr(active_item, "select"):
@@ -0,0 +1,99 @@
+import asyncio
+from collections import deque
+
+# A frame that finishes later than this many frame periods after its deadline makes the clock skip frames instead
+# of running the missed ones back to back
+MAX_CATCH_UP_FRAMES = 2
+LAG_WINDOW_SIZE = 300
+EARLY_WAKE_TOLERANCE = 0.001  # seconds
+
+
+class FrameClock(object):
+    """Paces the main loop with absolute deadlines on the event loop's monotonic clock. Each frame's deadline is
+    the previous deadline plus one frame period, so time spent working does not accumulate as drift. When a frame
+    overruns, the next ones run without sleeping until the clock has caught up; if the loop is too far behind,
+    the missed frames are skipped and the clock re-anchors to the next period boundary.
+
+    Lag (how late the loop wakes relative to the deadline) is kept in a rolling window, and summarised once per
+    second by update_measurement() so it can be shown in the UI."""
+
+    def __init__(self, max_catch_up_frames=MAX_CATCH_UP_FRAMES, window_size=LAG_WINDOW_SIZE):
+        self.max_catch_up_frames = max_catch_up_frames
+        self.next_deadline = None
+        self.lag_samples = deque(maxlen=window_size)
+
+        # Counters
+        self.frames = 0
+        self.frames_caught_up = 0  # Frames started without sleeping because the loop was behind
+        self.frames_skipped = 0
+        self.frames_woken_early = 0  # Idle sleeps interrupted by user activity
+        self.frames_waited_for_event = 0  # Iterations that slept until a wake-up because there was nothing to do
+        self.max_lag = 0.0
+        self.lag_stats = {"p50": 0.0, "p95": 0.0, "max": 0.0}
+
+    def start(self, now):
+        # Deadlines are counted from the start of the first frame
+        self.next_deadline = now
+
+    def record_lag(self, lag):
+        self.lag_samples.append(lag)
+        self.max_lag = max(self.max_lag, lag)
+
+    async def wait_for_next_frame(self, loop, frame_rate, sleep=asyncio.sleep):
+        period = 1.0 / frame_rate
+        now = loop.time()
+        self.frames += 1
+        if self.next_deadline is None:
+            self.next_deadline = now
+        self.next_deadline += period
+
+        if now > self.next_deadline:
+            behind = now - self.next_deadline
+            self.record_lag(behind)
+            if behind <= period * self.max_catch_up_frames:
+                # Run next frame straight away (but let other tasks run)
+                self.frames_caught_up += 1
+                await asyncio.sleep(0)
+                return
+            skipped = int(behind // period) + 1
+            self.frames_skipped += skipped
+            self.next_deadline += skipped * period
+
+        await sleep(self.next_deadline - now)
+        woke = loop.time()
+        if woke < self.next_deadline - EARLY_WAKE_TOLERANCE:
+            # Sleep was interrupted (input after being idle), next deadlines count from now
+            self.frames_woken_early += 1
+            self.next_deadline = woke
+        else:
+            self.record_lag(woke - self.next_deadline)
+
+    async def wait_for_event(self, loop, wait):
+        # Nothing to do until some event arrives, sleeping here is not lag. Deadlines count from the wake-up.
+        self.frames += 1
+        self.frames_waited_for_event += 1
+        await wait()
+        self.next_deadline = loop.time()
+
+    def update_measurement(self):
+        # Called once per second by the main loop
+        sorted_samples = sorted(self.lag_samples)
+        n = len(sorted_samples)
+        if n == 0:
+            return
+        self.lag_stats = {
+            "p50": sorted_samples[int(0.50 * (n - 1))],
+            "p95": sorted_samples[int(0.95 * (n - 1))],
+            "max": sorted_samples[-1],
+        }
+
+    def get_stats(self):
+        return dict(
+            self.lag_stats,
+            frames=self.frames,
+            frames_caught_up=self.frames_caught_up,
+            frames_skipped=self.frames_skipped,
+            frames_woken_early=self.frames_woken_early,
+            frames_waited_for_event=self.frames_waited_for_event,
+            max_lag_ever=self.max_lag,
+        )
@@ -0,0 +1,161 @@
+import asyncio
+import itertools
+import logging
+import threading
+import time
+import traceback
+from collections import OrderedDict
+
+log = logging.getLogger("task_scheduler")
+
+# Priority classes, lower runs first
+PRIORITY_REALTIME = 0  # Notes and OSC messages (e.g. device init messages sent on select)
+PRIORITY_ROUTING = 1  # pw-link / pw-cli calls that change audio routing or volumes
+PRIORITY_HOUSEKEEPING = 2  # Everything else (startup initialisation, etc.)
+
+PRIORITY_NAMES = {
+    PRIORITY_REALTIME: "realtime",
+    PRIORITY_ROUTING: "routing",
+    PRIORITY_HOUSEKEEPING: "housekeeping",
+}
+
+# Max number of tasks of each class running at the same time
+DEFAULT_CONCURRENCY = {
+    PRIORITY_REALTIME: 8,
+    PRIORITY_ROUTING: 2,
+    PRIORITY_HOUSEKEEPING: 2,
+}
+
+# Max number of tasks of each class waiting to run, new jobs are rejected when full
+DEFAULT_MAX_PENDING = {
+    PRIORITY_REALTIME: 128,
+    PRIORITY_ROUTING: 256,
+    PRIORITY_HOUSEKEEPING: 64,
+}
+
+
+class PriorityClassStats(object):
+    def __init__(self):
+        self.submitted = 0
+        self.started = 0
+        self.completed = 0
+        self.failed = 0
+        self.deduplicated = 0  # Pending jobs replaced by an equivalent newer one
+        self.rejected = 0  # Jobs dropped because the pending queue was full
+        self.max_pending = 0
+        self.total_wait_time = 0.0  # Time between submission and start, summed over started jobs
+        self.max_wait_time = 0.0
+
+
+class TaskScheduler(object):
+    """Runs coroutines submitted by modes (pipewire routing commands, device selection...) on the asyncio loop.
+    Jobs are grouped in priority classes, each with a bounded pending queue and a cap on concurrently running
+    tasks. Higher priority classes are always started first. A job submitted with a key replaces any pending
+    job with the same key (e.g. a newer volume update or the latest link/unlink command for the same ports); the
+    newer job goes to the back of the queue so that it runs after anything submitted before it.
+
+    submit() can be called from any thread. dispatch() must be called from the loop (once per main loop tick),
+    and is also called whenever a task finishes so freed slots are used straight away."""
+
+    def __init__(self, concurrency=None, max_pending=None):
+        self.concurrency = dict(DEFAULT_CONCURRENCY)
+        self.concurrency.update(concurrency or {})
+        self.max_pending = dict(DEFAULT_MAX_PENDING)
+        self.max_pending.update(max_pending or {})
+        self.priorities = sorted(self.concurrency.keys())
+        self.pending = {priority: OrderedDict() for priority in self.priorities}
+        self.running = {priority: set() for priority in self.priorities}
+        self.stats = {priority: PriorityClassStats() for priority in self.priorities}
+        self.lock = threading.Lock()
+        self.unique_keys = itertools.count()
+
+    def submit(self, coro, priority=PRIORITY_HOUSEKEEPING, key=None):
+        """Adds a coroutine to the pending queue of its priority class. Returns False if it was rejected."""
+        if coro is None:
+            return False
+        stats = self.stats[priority]
+        with self.lock:
+            pending = self.pending[priority]
+            stats.submitted += 1
+            if key is None:
+                key = ("unique", next(self.unique_keys))
+            elif key in pending:
+                replaced_coro, _ = pending.pop(key)
+                replaced_coro.close()  # Never started, close it so no "never awaited" warning is raised
+                stats.deduplicated += 1
+            if len(pending) >= self.max_pending[priority]:
+                stats.rejected += 1
+                coro.close()
+                log.warning(
+                    "Rejected {0} task, {1} tasks pending".format(
+                        PRIORITY_NAMES.get(priority, priority), len(pending)
+                    )
+                )
+                return False
+            pending[key] = (coro, time.time())
+            stats.max_pending = max(stats.max_pending, len(pending))
+        return True
+
+    def dispatch(self):
+        """Starts as many pending tasks as the concurrency caps allow, higher priority classes first"""
+        now = time.time()
+        for priority in self.priorities:
+            running = self.running[priority]
+            stats = self.stats[priority]
+            while len(running) < self.concurrency[priority]:
+                with self.lock:
+                    if not self.pending[priority]:
+                        break
+                    _, (coro, submit_time) = self.pending[priority].popitem(last=False)
+                task = asyncio.create_task(self.run_task(coro, priority))
+                running.add(task)
+                stats.started += 1
+                wait_time = now - submit_time
+                stats.total_wait_time += wait_time
+                stats.max_wait_time = max(stats.max_wait_time, wait_time)
+
+    async def run_task(self, coro, priority):
+        stats = self.stats[priority]
+        try:
+            await coro
+            stats.completed += 1
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            stats.failed += 1
+            traceback.print_exc()
+        finally:
+            self.running[priority].discard(asyncio.current_task())
+            self.dispatch()
+
+    def n_pending(self, priority=None):
+        if priority is not None:
+            return len(self.pending[priority])
+        return sum(len(pending) for pending in self.pending.values())
+
+    def n_running(self, priority=None):
+        if priority is not None:
+            return len(self.running[priority])
+        return sum(len(running) for running in self.running.values())
+
+    def get_stats(self):
+        stats = {}
+        for priority in self.priorities:
+            priority_stats = self.stats[priority]
+            stats[PRIORITY_NAMES.get(priority, priority)] = {
+                "pending": len(self.pending[priority]),
+                "running": len(self.running[priority]),
+                "submitted": priority_stats.submitted,
+                "completed": priority_stats.completed,
+                "failed": priority_stats.failed,
+                "deduplicated": priority_stats.deduplicated,
+                "rejected": priority_stats.rejected,
+                "max_pending": priority_stats.max_pending,
+                "average_wait_time": (
+                    priority_stats.total_wait_time / priority_stats.started
+                    if priority_stats.started
+                    else 0.0
+                ),
+                "max_wait_time": priority_stats.max_wait_time,
+            }
+        return stats
@@ -0,0 +1,119 @@
+import asyncio
+import heapq
+import itertools
+import threading
+import time
+
+# Even with nothing to do, the main loop wakes up this often (Push display keepalive, once per second counters...)
+MAX_IDLE_SLEEP = 0.5
+
+_current_wakeups = None
+
+
+def notify_wakeups():
+    """Wake up the main loop because something needs to be done (display, pads or buttons need an update...).
+    Safe to call from any thread and before the app has been created."""
+    if _current_wakeups is not None:
+        _current_wakeups.notify()
+
+
+class Wakeups(object):
+    """One-shot timers and "something changed" notifications for the main loop, so that it can sleep until there
+    is real work to do instead of polling every frame. Timers registered with a key replace any pending timer with
+    the same key, which makes debouncing trivial: re-register the same key on every encoder message and the
+    callback runs once, some time after the last one. Timer callbacks run in the main loop (see run_due).
+
+    Timers use the monotonic clock (the same one asyncio's loop.time() uses). call_later/cancel/notify can be
+    called from any thread."""
+
+    def __init__(self):
+        global _current_wakeups
+        _current_wakeups = self
+
+        self.lock = threading.Lock()
+        self.heap = []  # (deadline, sequence, key)
+        self.timers = {}  # key -> (deadline, sequence, callback)
+        self.sequence = itertools.count()
+        self.loop = None
+        self.event = None
+        self.notified = False
+
+        # Counters
+        self.timers_fired = 0
+        self.notifications = 0
+
+    def call_later(self, delay, callback, key=None):
+        return self.call_at(time.monotonic() + delay, callback, key=key)
+
+    def call_at(self, deadline, callback, key=None):
+        with self.lock:
+            sequence = next(self.sequence)
+            if key is None:
+                key = ("unique", sequence)
+            self.timers[key] = (deadline, sequence, callback)
+            heapq.heappush(self.heap, (deadline, sequence, key))
+        self.notify()  # The loop might need to wake up earlier than planned
+        return key
+
+    def cancel(self, key):
+        with self.lock:
+            self.timers.pop(key, None)  # Stale heap entries are discarded when popped
+
+    def notify(self):
+        self.notifications += 1
+        self.notified = True
+        if self.loop is not None and not self.loop.is_closed():
+            try:
+                self.loop.call_soon_threadsafe(self.event.set)
+            except RuntimeError:
+                pass  # Loop closed meanwhile (app shutting down), nothing to wake up
+
+    def next_deadline(self):
+        with self.lock:
+            self._discard_stale_entries()
+            return self.heap[0][0] if self.heap else None
+
+    def _discard_stale_entries(self):
+        while self.heap:
+            deadline, sequence, key = self.heap[0]
+            timer = self.timers.get(key)
+            if timer is not None and timer[1] == sequence:
+                return
+            heapq.heappop(self.heap)
+
+    def run_due(self, now=None):
+        """Runs the callbacks of all timers whose deadline has passed. Returns the number of timers fired."""
+        if now is None:
+            now = time.monotonic()
+        due = []
+        with self.lock:
+            self._discard_stale_entries()
+            while self.heap and self.heap[0][0] <= now:
+                _, _, key = heapq.heappop(self.heap)
+                _, _, callback = self.timers.pop(key)
+                due.append(callback)
+                self._discard_stale_entries()
+        for callback in due:
+            callback()
+        self.timers_fired += len(due)
+        return len(due)
+
+    async def wait(self, max_sleep=MAX_IDLE_SLEEP):
+        """Sleeps until notify() is called, the next timer is due or max_sleep seconds have passed"""
+        if self.loop is None:
+            self.loop = asyncio.get_running_loop()
+            self.event = asyncio.Event()
+        if self.notified:
+            # Something happened since the loop last looked, don't sleep
+            self.notified = False
+            return
+        self.event.clear()
+        timeout = max_sleep
+        next_deadline = self.next_deadline()
+        if next_deadline is not None:
+            timeout = max(0, min(timeout, next_deadline - time.monotonic()))
+        try:
+            await asyncio.wait_for(self.event.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        self.notified = False
@@ -63,11 +63,11 @@ class Sequencer(object):
         if self.gate[playhead] is True:
             print(self.name, "NAME")
             print("sent note seq", self.name)
-            self.send_osc_func("/mnote", [float(25), float(0)], self.name)
-            self.send_osc_func("/mnote", [float(25), float(127)], self.name)
+            self.send_osc_func("/mnote", [float(25), float(0)], self.name, immediate=True)
+            self.send_osc_func("/mnote", [float(25), float(127)], self.name, immediate=True)
 
         if self.gate[playhead] is False:
-            self.send_osc_func("/mnote", [float(25), float(0)], self.name)
+            self.send_osc_func("/mnote", [float(25), float(0)], self.name, immediate=True)
 
     def get_track(self, lane):
         if lane == "gate":
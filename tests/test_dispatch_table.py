@@ -0,0 +1,73 @@
+from controllers.dispatch_table import InputDispatchTable, TRACK_ENCODER_INDEX, TRACK_ENCODER_NAMES
+
+
+class BaseMode(object):
+    def on_encoder_rotated(self, encoder_name, increment):
+        pass
+
+    def on_encoder_touched(self, encoder_name):
+        pass
+
+    def on_button_pressed(self, button_name):
+        pass
+
+    def on_button_released(self, button_name):
+        pass
+
+    def on_pad_pressed(self, pad_n, pad_ij, velocity):
+        pass
+
+    def on_pad_released(self, pad_n, pad_ij, velocity):
+        pass
+
+    def on_pad_aftertouch(self, pad_n, pad_ij, velocity):
+        pass
+
+    def on_touchstrip(self, value):
+        pass
+
+    def on_sustain_pedal(self, sustain_on):
+        pass
+
+
+class ButtonMode(BaseMode):
+    def __init__(self, name, handled_buttons, calls):
+        self.name = name
+        self.handled_buttons = handled_buttons
+        self.calls = calls
+
+    def on_button_pressed(self, button_name):
+        self.calls.append(self.name)
+        return button_name in self.handled_buttons
+
+
+def test_InputDispatchTable_calls_topmost_modes_first():
+    calls = []
+    modes = [ButtonMode("bottom", {"a", "b"}, calls), BaseMode(), ButtonMode("top", {"a"}, calls)]
+    table = InputDispatchTable(BaseMode)
+
+    assert table.dispatch("on_button_pressed", ("a",), modes)
+    assert calls == ["top"], "Propagation should stop at the first mode that takes action"
+    assert table.dispatch("on_button_pressed", ("b",), modes)
+    assert calls == ["top", "top", "bottom"]
+    assert not table.dispatch("on_button_pressed", ("c",), modes)
+    assert table.chains["on_encoder_rotated"] == (), "Modes without handlers should be left out"
+    assert table.rebuilds == 1
+
+
+def test_InputDispatchTable_rebuilds_after_invalidate():
+    calls = []
+    table = InputDispatchTable(BaseMode)
+    modes = [ButtonMode("first", {"a"}, calls)]
+    table.dispatch("on_button_pressed", ("a",), modes)
+
+    modes = modes + [ButtonMode("second", {"a"}, calls)]
+    table.invalidate()
+    table.dispatch("on_button_pressed", ("a",), modes)
+    assert calls == ["first", "second"]
+    assert table.rebuilds == 2
+
+
+def test_track_encoder_index():
+    assert [TRACK_ENCODER_INDEX[name] for name in TRACK_ENCODER_NAMES] == list(range(8))
+    assert TRACK_ENCODER_INDEX.get("Master Encoder") is None
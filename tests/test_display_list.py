@@ -0,0 +1,74 @@
+import pytest
+
+from user_interface.display_list import DisplayList, recorded
+
+
+class FakeContext(object):
+    def __init__(self):
+        self.calls = []
+
+    def __getattr__(self, name):
+        def call(*args, **kwargs):
+            self.calls.append((name, args, kwargs))
+
+        return call
+
+
+@recorded
+def draw_label(ctx, x, text, color=[1, 1, 1]):
+    ctx.move_to(x, 0)
+    ctx.set_source_rgb(*color)
+    ctx.show_text(text)
+
+
+def test_DisplayList_replays_context_calls_in_order():
+    display_list = DisplayList()
+    display_list.set_line_width(1.5)
+    display_list.rectangle(0, 0, 10, 10)
+    display_list.fill()
+    assert len(display_list) == 3
+
+    ctx = FakeContext()
+    display_list.replay(ctx)
+    assert ctx.calls == [
+        ("set_line_width", (1.5,), {}),
+        ("rectangle", (0, 0, 10, 10), {}),
+        ("fill", (), {}),
+    ]
+
+
+def test_DisplayList_records_helpers_as_one_operation():
+    display_list = DisplayList()
+    assert draw_label(display_list, 5, "Cutoff", color=[1, 0, 0]) is None
+    assert len(display_list) == 1, "Helper should not run while recording"
+
+    ctx = FakeContext()
+    display_list.replay(ctx)
+    assert ctx.calls == [
+        ("move_to", (5, 0), {}),
+        ("set_source_rgb", (1, 0, 0), {}),
+        ("show_text", ("Cutoff",), {}),
+    ]
+
+    ctx = FakeContext()
+    draw_label(ctx, 0, "Direct")
+    assert ("show_text", ("Direct",), {}) in ctx.calls, "Helper should draw on real contexts"
+
+
+def test_DisplayList_is_a_snapshot():
+    color = [1, 1, 1]
+    display_list = DisplayList()
+    display_list.set_source_rgb(color)
+    draw_label(display_list, 0, "Label", color=color)
+    color[0] = 0  # Mode changes its state after the frame was recorded
+
+    ctx = FakeContext()
+    display_list.replay(ctx)
+    assert ctx.calls[0] == ("set_source_rgb", ((1, 1, 1),), {})
+    assert ctx.calls[2] == ("set_source_rgb", (1, 1, 1), {})
+
+
+def test_DisplayList_rejects_unrecorded_methods():
+    display_list = DisplayList()
+    with pytest.raises(AttributeError):
+        display_list.text_extents("Label")
@@ -0,0 +1,36 @@
+from user_interface.display_renderer import DisplayRenderer, mark_display_dirty
+
+
+def test_DisplayRenderer_skips_clean_frames():
+    renderer = DisplayRenderer()
+    modes = ["mode a", "mode b"]
+
+    assert renderer.needs_render(modes), "First frame should always be rendered"
+    renderer.begin_frame()
+    renderer.end_frame("frame")
+    assert renderer.frames_rendered == 1
+
+    assert not renderer.needs_render(modes), "Unchanged frame should not be rendered"
+    assert renderer.needs_render(modes, force=True), "Forced frames should be rendered"
+
+    mark_display_dirty()
+    assert renderer.needs_render(modes), "Module helper should flag current renderer"
+    renderer.begin_frame()
+    renderer.end_frame("frame")
+
+    assert renderer.needs_render(modes[:1]), "Changing active modes should redraw"
+
+
+def test_DisplayRenderer_keepalive():
+    renderer = DisplayRenderer()
+    assert not renderer.needs_keepalive(), "Nothing to resend before first frame"
+
+    renderer.begin_frame()
+    renderer.end_frame("frame")
+    assert not renderer.needs_keepalive()
+
+    renderer.last_frame_sent_time -= 10
+    assert renderer.needs_keepalive(), "Last frame should be resent after a while"
+    renderer.frame_resent()
+    assert renderer.frames_resent == 1
+    assert not renderer.needs_keepalive()
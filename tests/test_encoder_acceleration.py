@@ -0,0 +1,56 @@
+from controllers import encoder_acceleration
+from controllers.encoder_acceleration import (
+    AccelerationCurve,
+    EncoderAcceleration,
+    accelerate_increment,
+    fine_mode_active,
+    get_acceleration_curve,
+)
+
+
+class FakeClock(object):
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_AccelerationCurve_multiplier():
+    curve = AccelerationCurve(threshold=10, saturation=50, max_multiplier=5, curve=1, fine_divisor=10)
+    assert curve.multiplier(5) == 1.0
+    assert curve.multiplier(30) == 3.0
+    assert curve.multiplier(500) == 5.0
+
+
+def test_get_acceleration_curve_uses_definitions_and_control_overrides():
+    range_curve = get_acceleration_curve({"$type": "control-range"})
+    assert range_curve.extra_multiplier > 0 and range_curve.fine_divisor > 1
+    overridden = get_acceleration_curve(
+        {"$type": "control-range", "acceleration": {"max_multiplier": 1, "fine_divisor": 4}}
+    )
+    assert overridden.multiplier(1000) == 1.0
+    assert overridden.fine_divisor == 4
+    assert get_acceleration_curve({"$type": "unknown"}).multiplier(1000) == 1.0
+
+
+def test_EncoderAcceleration_speed_and_fine_mode():
+    clock = FakeClock()
+    acceleration = EncoderAcceleration(clock=clock)
+    curve = AccelerationCurve(threshold=10, saturation=50, max_multiplier=5, curve=1, fine_divisor=10)
+
+    assert accelerate_increment(curve, "control", 1) == 1, "First event has no speed"
+    clock.now += 0.5
+    assert accelerate_increment(curve, "control", 1) == 1, "Slow turns are not accelerated"
+    clock.now += 0.02
+    assert accelerate_increment(curve, "control", 2) == 2 * 5, "100 detents/s should saturate"
+    clock.now += 0.02
+    assert accelerate_increment(curve, "other control", 2) == 2, "Speed is measured per control"
+
+    acceleration.set_fine_mode(True)
+    assert fine_mode_active() and not acceleration.fine_mode_used
+    clock.now += 0.02
+    assert accelerate_increment(curve, "control", 1) == 0.1
+    acceleration.set_fine_mode(False)
+    assert acceleration.fine_mode_used
+    encoder_acceleration._current_acceleration = None
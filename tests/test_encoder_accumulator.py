@@ -0,0 +1,53 @@
+from controllers import encoder_accumulator
+from controllers.encoder_accumulator import EncoderAccumulator, send_accumulated
+
+
+class FakeTimers(object):
+    def __init__(self):
+        self.timers = {}
+
+    def call_later(self, delay, callback, key=None):
+        self.timers[key] = callback
+
+    def fire_all(self):
+        timers, self.timers = self.timers, {}
+        for callback in timers.values():
+            callback()
+
+
+def test_EncoderAccumulator_sends_leading_and_trailing_values():
+    timers = FakeTimers()
+    accumulator = EncoderAccumulator(timers.call_later, window=0.05)
+    sent = []
+
+    def send(address, value):
+        sent.append((address, value))
+
+    for value in [0.1, 0.2, 0.3, 0.4]:
+        send_accumulated(send, "/param/a", value)
+    send_accumulated(send, "/param/b", 1.0)
+    assert sent == [("/param/a", 0.1), ("/param/b", 1.0)], "First value of each control sent straight away"
+
+    timers.fire_all()
+    assert sent[2:] == [("/param/a", 0.4)], "Latest value should be sent on the trailing edge"
+    assert accumulator.messages_saved == 2
+
+    # Window for /param/a was reopened by the trailing send, nothing pending so it closes silently
+    timers.fire_all()
+    assert len(sent) == 3
+    assert accumulator.open_windows == {}
+
+    send_accumulated(send, "/param/a", 0.5)
+    assert sent[-1] == ("/param/a", 0.5), "Closed window should send straight away again"
+    stats = accumulator.get_stats()
+    assert stats["messages_requested"] == 6 and stats["messages_sent"] == 4
+
+
+def test_EncoderAccumulator_disabled_with_zero_window():
+    timers = FakeTimers()
+    EncoderAccumulator(timers.call_later, window=0)
+    sent = []
+    for value in range(3):
+        send_accumulated(lambda *args: sent.append(args), "/param/a", value)
+    assert len(sent) == 3 and timers.timers == {}
+    encoder_accumulator._current_accumulator = None
@@ -0,0 +1,66 @@
+import asyncio
+from scheduling.frame_clock import FrameClock
+
+
+class FakeLoop(object):
+    def __init__(self):
+        self.now = 100.0
+
+    def time(self):
+        return self.now
+
+
+def run_frames(clock, loop, work_times, frame_rate=10):
+    async def sleep(duration):
+        loop.now += duration
+
+    async def run():
+        wake_times = []
+        for work_time in work_times:
+            loop.now += work_time
+            await clock.wait_for_next_frame(loop, frame_rate, sleep=sleep)
+            wake_times.append(round(loop.now, 6))
+        return wake_times
+
+    return asyncio.run(run())
+
+
+def test_FrameClock_uses_absolute_deadlines():
+    loop = FakeLoop()
+    clock = FrameClock()
+    clock.start(loop.time())
+    wake_times = run_frames(clock, loop, [0.01, 0.03, 0.05, 0.0])
+    assert wake_times == [100.1, 100.2, 100.3, 100.4], "Work time should not cause drift"
+    assert clock.frames_skipped == 0
+
+
+def test_FrameClock_catches_up_and_skips():
+    loop = FakeLoop()
+    clock = FrameClock(max_catch_up_frames=2)
+    clock.start(loop.time())
+    run_frames(clock, loop, [0.0, 0.15])  # Second frame overran by half a period
+    assert clock.frames_caught_up == 1
+    assert round(clock.next_deadline, 6) == 100.2
+
+    run_frames(clock, loop, [0.5])  # Far behind, should skip
+    assert clock.frames_skipped > 0
+    assert clock.next_deadline > loop.now - 0.1
+    clock.update_measurement()
+    assert clock.get_stats()["max"] > 0.2
+
+
+def test_FrameClock_event_wait_is_not_lag():
+    loop = FakeLoop()
+    clock = FrameClock()
+    clock.start(loop.time())
+
+    async def wait():
+        loop.now += 3.0  # Slept for a long time waiting for an event
+
+    async def run():
+        await clock.wait_for_event(loop, wait)
+
+    asyncio.run(run())
+    assert clock.frames_waited_for_event == 1
+    assert run_frames(clock, loop, [0.01]) == [103.1], "Deadlines should count from the wake-up"
+    assert clock.frames_skipped == 0 and clock.max_lag < 0.1
@@ -0,0 +1,24 @@
+import json
+from user_interface.frame_profiler import FrameProfiler
+
+
+def test_FrameProfiler_stats(tmp_path):
+    profiler = FrameProfiler(enabled=False)
+    profiler.record("MelodicMode.update_display", profiler.start())
+    assert profiler.get_stats() == {}, "Disabled profiler should not record"
+
+    profiler.set_enabled(True)
+    for i in range(1, 101):
+        profiler.samples.setdefault("OSCMode.update_display", []).append(i / 1000)
+    profiler.record("SettingsMode.update_display", profiler.start())
+
+    stats = profiler.get_stats()
+    assert stats["OSCMode.update_display"]["p50"] == 0.050
+    assert stats["OSCMode.update_display"]["p95"] == 0.095
+    assert stats["OSCMode.update_display"]["max"] == 0.100
+    assert stats["SettingsMode.update_display"]["n"] == 1
+    assert profiler.get_overlay_lines()[1].startswith("OSCMode.update_display")
+
+    filename = tmp_path / "profile.json"
+    profiler.dump_to_file(filename)
+    assert "OSCMode.update_display" in json.load(open(filename))["sections"]
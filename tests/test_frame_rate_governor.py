@@ -0,0 +1,29 @@
+import asyncio
+import time
+from user_interface.frame_rate_governor import FrameRateGovernor, notify_user_activity
+
+
+def test_FrameRateGovernor_drops_to_idle_rate():
+    governor = FrameRateGovernor(max_frame_rate=60, idle_frame_rate=10, idle_timeout=5)
+    now = time.monotonic()
+    assert governor.get_frame_rate(now) == 60
+    assert governor.get_frame_rate(now + 6) == 10, "Should be idle after timeout"
+
+    governor.last_activity_time -= 10
+    assert governor.current_frame_rate == 10
+    notify_user_activity()
+    assert governor.current_frame_rate == 60, "Activity should restore full rate"
+
+
+def test_FrameRateGovernor_activity_interrupts_idle_sleep():
+    governor = FrameRateGovernor(max_frame_rate=60, idle_frame_rate=1, idle_timeout=5)
+    governor.last_activity_time -= 10
+
+    async def sleep_and_wake():
+        loop = asyncio.get_running_loop()
+        loop.call_later(0.05, governor.notify_activity)
+        start = time.monotonic()
+        await governor.sleep(1.0)
+        return time.monotonic() - start
+
+    assert asyncio.run(sleep_and_wake()) < 0.5
@@ -0,0 +1,83 @@
+from controllers.input_bus import InputBus, sum_last_arg
+
+
+class FakeLoop(object):
+    def __init__(self):
+        self.callbacks = []
+
+    def call_soon_threadsafe(self, callback):
+        self.callbacks.append(callback)
+
+    def run_callbacks(self):
+        callbacks, self.callbacks = self.callbacks, []
+        for callback in callbacks:
+            callback()
+
+
+def make_bus():
+    handled = []
+    bus = InputBus(lambda name, args: handled.append((name, args)))
+    loop = FakeLoop()
+    bus.attach(loop)
+    return bus, loop, handled
+
+
+def test_InputBus_handles_synchronously_before_attach():
+    handled = []
+    bus = InputBus(lambda name, args: handled.append((name, args)))
+    bus.post("on_button_pressed", ("play",))
+    assert handled == [("on_button_pressed", ("play",))]
+
+
+def test_InputBus_hands_events_to_loop_in_one_flush():
+    bus, loop, handled = make_bus()
+    bus.post("on_button_pressed", ("play",))
+    bus.post("on_button_released", ("play",))
+    assert handled == [], "Events should only be handled in the loop"
+    assert len(loop.callbacks) == 1, "Only one flush should be scheduled per batch"
+    loop.run_callbacks()
+    assert handled == [("on_button_pressed", ("play",)), ("on_button_released", ("play",))]
+    assert bus.events_handled == 2
+    bus.update_measurement()
+    assert bus.get_stats()["p95"] >= 0.0
+
+
+def test_InputBus_coalesces_encoder_rotations():
+    bus, loop, handled = make_bus()
+    for _ in range(3):
+        bus.post("on_encoder_rotated", ("track1", 1), coalesce_key="track1", merge=sum_last_arg)
+    bus.post("on_encoder_rotated", ("track2", -1), coalesce_key="track2", merge=sum_last_arg)
+    bus.post("on_encoder_rotated", ("track1", 2), coalesce_key="track1", merge=sum_last_arg)
+    loop.run_callbacks()
+    assert handled == [
+        ("on_encoder_rotated", ("track1", 5)),
+        ("on_encoder_rotated", ("track2", -1)),
+    ]
+    assert bus.events_coalesced == 3
+
+
+def test_InputBus_does_not_coalesce_across_presses():
+    bus, loop, handled = make_bus()
+    bus.post("on_encoder_rotated", ("track1", 1), coalesce_key="track1", merge=sum_last_arg)
+    bus.post("on_button_pressed", ("shift",))
+    bus.post("on_encoder_rotated", ("track1", 1), coalesce_key="track1", merge=sum_last_arg)
+    bus.post("on_touchstrip", (10,), coalesce_key="touchstrip")
+    bus.post("on_touchstrip", (20,), coalesce_key="touchstrip")
+    loop.run_callbacks()
+    assert handled == [
+        ("on_encoder_rotated", ("track1", 1)),
+        ("on_button_pressed", ("shift",)),
+        ("on_encoder_rotated", ("track1", 1)),
+        ("on_touchstrip", (20,)),
+    ]
+
+
+def test_InputBus_calls_after_flush_once_per_batch():
+    flushes = []
+    bus = InputBus(lambda name, args: None, after_flush=lambda: flushes.append(1))
+    loop = FakeLoop()
+    bus.attach(loop)
+    bus.post("on_button_pressed", ("play",))
+    bus.post("on_button_released", ("play",))
+    loop.run_callbacks()
+    assert len(flushes) == 1
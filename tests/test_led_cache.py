@@ -0,0 +1,73 @@
+from controllers.led_cache import ButtonLedCache, PadLedCache
+
+
+class FakeSection(object):
+    def __init__(self):
+        self.sent = []
+
+    def set_button_color(self, button_name, color, *args, **kwargs):
+        self.sent.append((button_name, color, kwargs))
+
+    def set_all_buttons_color(self, color, *args, **kwargs):
+        self.sent.append(("all", color, kwargs))
+
+    def set_pad_color(self, pad_ij, color, *args, **kwargs):
+        self.sent.append((pad_ij, color, kwargs))
+
+    def set_velocity_curve(self, curve):
+        self.sent.append(("velocity_curve", curve))
+
+
+def test_ButtonLedCache_only_sends_changes_once_per_flush():
+    section = FakeSection()
+    buttons = ButtonLedCache(section)
+
+    buttons.set_button_color("play", "green")
+    buttons.set_button_color("play", "red")
+    assert section.sent == [], "Nothing is sent before the flush"
+    assert buttons.flush() == 1
+    assert section.sent == [("play", "red", {})]
+
+    buttons.set_button_color("play", "red")
+    buttons.set_button_color("rec", "black", animation=1)
+    assert buttons.flush() == 1
+    assert section.sent[-1] == ("rec", "black", {"animation": 1})
+    buttons.set_button_color("rec", "black")
+    assert buttons.flush() == 1, "A different animation is a different state"
+    assert buttons.messages_sent == 3 and buttons.messages_suppressed == 2
+
+
+def test_ButtonLedCache_set_all_sets_known_state():
+    section = FakeSection()
+    buttons = ButtonLedCache(section)
+
+    buttons.set_button_color("play", "green")
+    buttons.set_all_buttons_color(color="black")
+    assert section.sent == [("all", "black", {})], "Set all is sent straight away and drops pending updates"
+    buttons.set_button_color("play", "black")
+    buttons.set_button_color("rec", "white")
+    assert buttons.flush() == 1
+    assert section.sent[-1] == ("rec", "white", {})
+
+    buttons.invalidate()
+    buttons.set_button_color("rec", "white")
+    assert buttons.flush() == 1, "After invalidation state is unknown"
+
+
+def test_PadLedCache_diffs_pad_matrices():
+    section = FakeSection()
+    pads = PadLedCache(section)
+    matrix = [["white"] * 8 for _ in range(8)]
+
+    pads.set_pads_color(matrix)
+    assert pads.flush() == 64
+    pads.set_pads_color(matrix)
+    assert pads.flush() == 0
+    matrix[3][4] = "green"
+    pads.set_pads_color(matrix)
+    pads.set_pad_color([0, 0], color="white")
+    assert pads.flush() == 1
+    assert section.sent[-1] == ((3, 4), "green", {})
+
+    pads.set_velocity_curve([1, 2])
+    assert section.sent[-1] == ("velocity_curve", [1, 2]), "Other methods are forwarded"
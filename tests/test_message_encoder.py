@@ -0,0 +1,38 @@
+from osc.message_encoder import MessageEncoder, build_message_dgram
+
+
+def test_MessageEncoder_matches_pythonosc():
+    encoder = MessageEncoder()
+    messages = [
+        ("/param/a/osc/1/pitch", 0.25),
+        ("/param/a/osc/1/pitch", -3.5),
+        ("/mnote", [60, 100]),
+        ("/mnote", [60, 0]),
+        ("/mnote/rel", [60, 100, 1.0]),
+        ("/abc", [True, 1, False, None]),
+        ("/abc", [False, 1, True, None]),
+        ("/q/all_params", None),
+        ("/a", 7),
+        ("/patch/load", "/path/to/patch.fxp"),
+        ("/mnote", [2**40, 1]),
+    ]
+    for _ in range(2):
+        for address, value in messages:
+            assert encoder.encode(address, value) == build_message_dgram(address, value), (address, value)
+
+    stats = encoder.get_stats()
+    assert stats["templates_compiled"] == 7
+    assert stats["messages_not_compiled"] == 4
+
+
+def test_MessageEncoder_reuses_templates():
+    encoder = MessageEncoder(max_templates=2)
+    first = encoder.encode("/fx/a/1/param/1", 0.5)
+    second = encoder.encode("/fx/a/1/param/1", 0.75)
+    assert first != second  # Returned bytes are not the template buffer
+    assert second == build_message_dgram("/fx/a/1/param/1", 0.75)
+    assert encoder.templates_compiled == 1
+
+    encoder.encode("/fx/a/1/param/2", 0.5)
+    encoder.encode("/fx/a/1/param/3", 0.5)
+    assert len(encoder.templates) == 1
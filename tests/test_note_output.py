@@ -0,0 +1,63 @@
+from types import SimpleNamespace
+
+from controllers.note_output import NoteOutput
+
+
+class FakeSender(object):
+    def __init__(self):
+        self.sent = []
+
+    def send(self, msg):
+        self.sent.append(msg)
+
+    def send_message(self, address, value):
+        self.sent.append((address, value))
+
+
+def make_app():
+    osc_client = FakeSender()
+    instruments_info = [
+        {"instrument_short_name": "synth", "midi_channel": 3},
+        {"instrument_short_name": "drums", "midi_channel": -1, "illuminate_local_notes": False},
+    ]
+    instrument_selection_mode = SimpleNamespace(selected_instrument=0)
+    instrument_selection_mode.get_current_instrument_info = lambda: instruments_info[
+        instrument_selection_mode.selected_instrument
+    ]
+    app = SimpleNamespace(
+        midi_out=FakeSender(),
+        midi_out_channel=-1,
+        instrument_selection_mode=instrument_selection_mode,
+        osc_mode=SimpleNamespace(
+            instruments={
+                "synth": SimpleNamespace(osc={"client": osc_client}),
+                "drums": SimpleNamespace(osc={"client": None}),
+            }
+        ),
+    )
+    return app, osc_client
+
+
+def test_NoteOutput_sends_to_current_instrument():
+    app, osc_client = make_app()
+    note_output = NoteOutput(app)
+
+    note_output.note_on(60, 127, osc_velocity=90)
+    note_output.note_off(60, 0)
+    assert [(msg.type, msg.channel, msg.note, msg.velocity) for msg in app.midi_out.sent] == [
+        ("note_on", 2, 60, 127),
+        ("note_off", 2, 60, 0),
+    ]
+    assert osc_client.sent == [("/mnote", [60.0, 90.0]), ("/mnote/rel", [60.0, 0.0])]
+    assert note_output.transports_resolved == 1, "Transport is resolved once"
+
+    app.instrument_selection_mode.selected_instrument = 1
+    note_output.note_on(36, 100)
+    assert app.midi_out.sent[-1].channel == 0
+    assert len(osc_client.sent) == 2
+    assert not note_output.get_transport().illuminate_local_notes
+
+    app.midi_out_channel = 5
+    note_output.note_on(36, 100)
+    assert app.midi_out.sent[-1].channel == 5
+    assert note_output.transports_resolved == 3
@@ -0,0 +1,19 @@
+from modes.note_state import NoteState
+
+
+def test_NoteState_tracks_notes_per_source():
+    notes = NoteState()
+    assert notes.add(60, "push"), "Note should go on"
+    assert not notes.add(60, "notes_midi_in"), "Already on because of another source"
+    assert notes.add(64, "push")
+    assert notes.is_playing(60) and notes.is_playing(64) and not notes.is_playing(61)
+
+    assert not notes.remove(60, "push"), "Still played by the other source"
+    assert notes.is_playing(60)
+    assert notes.remove(60, "notes_midi_in")
+    assert not notes.is_playing(60)
+    assert not notes.remove(60, "push"), "Removing a note that is not on changes nothing"
+    assert notes.get_notes() == [64]
+
+    notes.clear()
+    assert notes.get_notes() == []
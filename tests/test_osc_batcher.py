@@ -0,0 +1,72 @@
+import pytest
+from pythonosc.osc_bundle import OscBundle
+from pythonosc.osc_message import OscMessage
+
+from osc import batcher as osc_batcher
+from osc.batcher import OSCBatcher, BatchingUDPClient, build_datagrams
+from osc.message_encoder import build_message_dgram
+
+
+@pytest.fixture(autouse=True)
+def reset_current_batcher():
+    # OSCBatcher() installs itself as the batcher of all BatchingUDPClients, don't leak it to other tests
+    yield
+    osc_batcher._current_batcher = None
+
+
+class RecordingClient(BatchingUDPClient):
+    def __init__(self):
+        super().__init__("127.0.0.1", 9999)
+        self.datagrams = []
+
+    def send_dgram(self, dgram):
+        self.datagrams.append(dgram)
+
+
+def decode(dgram):
+    if OscBundle.dgram_is_bundle(dgram):
+        return [(msg.address, msg.params) for msg in OscBundle(dgram)]
+    message = OscMessage(dgram)
+    return [(message.address, message.params)]
+
+
+def test_OSCBatcher_sends_one_bundle_per_client_per_flush():
+    batcher = OSCBatcher()
+    synth, drums = RecordingClient(), RecordingClient()
+
+    synth.send_message("/param/a/1", 0.5)
+    synth.send_message("/param/a/2", [1.0, 2.0])
+    drums.send_message("/q/param/a/1", None)
+    assert synth.datagrams == [] and drums.datagrams == []
+
+    batcher.flush()
+    assert [decode(dgram) for dgram in synth.datagrams] == [
+        [("/param/a/1", [0.5]), ("/param/a/2", [1.0, 2.0])]
+    ]
+    assert [decode(dgram) for dgram in drums.datagrams] == [[("/q/param/a/1", [])]]
+    assert batcher.bundles_sent == 1 and batcher.datagrams_sent == 2
+
+
+def test_OSCBatcher_immediate_messages_keep_order():
+    batcher = OSCBatcher()
+    synth = RecordingClient()
+
+    synth.send_message("/param/a/1", 0.25)
+    synth.send_message("/mnote", [60.0, 100.0], immediate=True)
+    assert [decode(dgram) for dgram in synth.datagrams] == [
+        [("/param/a/1", [0.25])],
+        [("/mnote", [60.0, 100.0])],
+    ]
+    batcher.flush()
+    assert len(synth.datagrams) == 2
+    assert batcher.messages_immediate == 1
+
+
+def test_build_datagrams_respects_max_size():
+    message_dgrams = [build_message_dgram("/param/a/{0}".format(i), float(i)) for i in range(50)]
+    datagrams = build_datagrams(message_dgrams, max_datagram_size=256)
+    assert all(len(dgram) <= 256 for dgram in datagrams)
+    assert sum(len(decode(dgram)) for dgram in datagrams) == 50
+    assert [address for dgram in datagrams for address, _ in decode(dgram)] == [
+        "/param/a/{0}".format(i) for i in range(50)
+    ]
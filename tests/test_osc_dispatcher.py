@@ -0,0 +1,60 @@
+from pythonosc.dispatcher import Dispatcher
+from pythonosc.osc_message_builder import OscMessageBuilder
+
+from osc.dispatcher import OSCDispatcher
+
+
+def build_dgram(address, value):
+    builder = OscMessageBuilder(address=address)
+    builder.add_arg(value)
+    return builder.build().dgram
+
+
+def test_OSCDispatcher_exact_and_wildcard_matches():
+    received = []
+    dispatcher = OSCDispatcher()
+    dispatcher.map("/param/a/1", lambda address, value: received.append(("first", address, value)))
+    dispatcher.map("/param/a/1", lambda address, value: received.append(("second", address, value)))
+    dispatcher.map("/param/b/*", lambda address, value: received.append(("wildcard", address, value)))
+    dispatcher.set_default_handler(lambda address, value: received.append(("default", address, value)))
+
+    dispatcher.call_handlers_for_packet(build_dgram("/param/a/1", 0.5), ("127.0.0.1", 0))
+    assert received == [("first", "/param/a/1", 0.5), ("second", "/param/a/1", 0.5)]
+
+    received.clear()
+    dispatcher.call_handlers_for_packet(build_dgram("/param/b/2", 1.0), ("127.0.0.1", 0))
+    dispatcher.call_handlers_for_packet(build_dgram("/param/b/2/3", 1.0), ("127.0.0.1", 0))
+    dispatcher.call_handlers_for_packet(build_dgram("/param/c/1", 1.0), ("127.0.0.1", 0))
+    assert received == [
+        ("wildcard", "/param/b/2", 1.0),
+        ("wildcard", "/param/b/2/3", 1.0),  # As in pythonosc, a mapped "*" also matches "/"
+        ("default", "/param/c/1", 1.0),
+    ]
+    assert dispatcher.pattern_lookups == 0
+
+
+def test_OSCDispatcher_matches_like_pythonosc():
+    mapped = ["/param/a/1", "/param/*", "/param/a/*", "/fx/*/param/1", "/param/a/1", "/mod/*/amount"]
+    incoming = ["/param/a/1", "/param/a/2", "/param/b/2/3", "/fx/a/1/param/1", "/fx/a/param/2", "/mod/x/amount", "/x"]
+    dispatchers = [Dispatcher(), OSCDispatcher()]
+    for dispatcher in dispatchers:
+        for index, address in enumerate(mapped):
+            dispatcher.map(address, lambda *message: None, index)
+        dispatcher.set_default_handler(lambda *message: None)
+
+    for address in incoming:
+        expected, handlers = [
+            [handler.args for handler in dispatcher.handlers_for_address(address)] for dispatcher in dispatchers
+        ]
+        assert handlers == expected, address
+
+
+def test_OSCDispatcher_incoming_patterns_fall_back_to_pythonosc():
+    received = []
+    dispatcher = OSCDispatcher()
+    for i in range(3):
+        dispatcher.map("/param/a/{0}".format(i), lambda address, i, value: received.append(i[0]), i)
+
+    dispatcher.call_handlers_for_packet(build_dgram("/param/a/*", 0.0), ("127.0.0.1", 0))
+    assert sorted(received) == [0, 1, 2]
+    assert dispatcher.pattern_lookups == 1
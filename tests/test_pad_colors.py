@@ -0,0 +1,38 @@
+from controllers.led_cache import PadLedCache
+
+
+class FakePads(object):
+    def __init__(self):
+        self.sent = []
+
+    def set_pad_color(self, pad_ij, color, *args, **kwargs):
+        self.sent.append((pad_ij, color))
+
+    def set_all_pads_to_color(self, color, *args, **kwargs):
+        self.sent.append(("all", color))
+
+
+def test_PadColorModel_only_sends_changed_pads():
+    section = FakePads()
+    pads = PadLedCache(section)
+    matrix = [["white"] * 8 for _ in range(8)]
+
+    pads.set_pads_color(matrix)
+    assert pads.flush() == 64, "First flush sends all pads"
+    pads.set_pads_color(matrix)
+    assert pads.flush() == 0
+    matrix[3][4] = "green"
+    pads.set_pads_color(matrix)
+    assert pads.flush() == 1
+    assert section.sent[-1] == ((3, 4), "green")
+    assert pads.messages_sent == 65 and pads.messages_suppressed == 127
+
+    pads.invalidate()
+    pads.set_pads_color(matrix)
+    assert pads.flush() == 64, "Invalidated pads should all be sent again"
+
+    pads.set_all_pads_to_color("black")
+    assert section.sent[-1] == ("all", "black")
+    matrix[0][0] = "black"
+    pads.set_pads_color(matrix)
+    assert pads.flush() == 63, "Pads already black after set all are not sent"
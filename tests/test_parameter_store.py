@@ -0,0 +1,39 @@
+from osc.parameter_store import ParameterStore
+
+
+def test_ParameterStore_indices_and_subscriptions():
+    store = ParameterStore(capacity=2)
+    changes = []
+
+    index = store.index_of("/param/a/1")
+    assert store.index_of("/param/a/1") == index, "Addresses keep their index"
+    store.subscribe("/param/a/1", lambda address, value: changes.append((address, value)))
+    for i in range(10):
+        store.index_of("/param/b/{0}".format(i))
+    assert len(store) == 11, "Store grows when needed"
+
+    assert store.set(index, 0.5)
+    assert not store.set(index, 0.5), "Same value is not a change"
+    store.set_state("/param/b/3", 0.25, "25 %")
+    assert store.get_value("/param/b/3") == 0.25
+    assert store.get_value("/unknown", default=-1.0) == -1.0
+    assert changes == [("/param/a/1", 0.5)]
+
+
+def test_ParameterStore_snapshot_diff_restore():
+    store = ParameterStore()
+    changes = []
+    for i in range(100):
+        store.set_value("/param/a/{0}".format(i), float(i))
+    store.subscribe("/param/a/7", lambda address, value: changes.append((address, value)))
+
+    snapshot = store.snapshot()
+    store.set_value("/param/a/7", -1.0)
+    store.set_value("/param/a/42", -1.0)
+    store.set_value("/param/new", 1.0)
+    assert store.diff(snapshot) == ["/param/a/7", "/param/a/42"]
+
+    assert store.restore(snapshot) == ["/param/a/7", "/param/a/42"]
+    assert store.get_value("/param/a/7") == 7.0
+    assert store.diff(snapshot) == []
+    assert changes == [("/param/a/7", -1.0), ("/param/a/7", 7.0)]
@@ -0,0 +1,114 @@
+import pytest
+
+import osc.query_scheduler
+from osc.query_scheduler import QueryScheduler, QueryReplyDispatcher, send_query
+
+
+@pytest.fixture(autouse=True)
+def reset_current_query_scheduler():
+    # QueryScheduler() installs itself as the scheduler used by send_query, don't leak it to other tests
+    yield
+    osc.query_scheduler._current_query_scheduler = None
+
+
+class FakeClient(object):
+    def __init__(self):
+        self.sent = []
+
+    def send_message(self, address, value):
+        self.sent.append(address)
+
+
+def make_scheduler(rate=1000.0):
+    now = [0.0]
+    timers = {}  # key -> (delay, callback), scheduling again with a key replaces the timer as in Wakeups
+
+    def call_later(delay, callback, key=None):
+        timers[key] = (delay, callback)
+
+    scheduler = QueryScheduler(call_later, rate=rate, clock=lambda: now[0])
+    return scheduler, now, timers
+
+
+def run_timers(timers):
+    callbacks = [callback for delay, callback in timers.values()]
+    timers.clear()
+    for callback in callbacks:
+        callback()
+
+
+def test_QueryScheduler_dedupes_and_prioritises_visible():
+    scheduler, now, timers = make_scheduler()
+    client = FakeClient()
+
+    send_query(client, "/param/a/1", visible=False)
+    send_query(client, "/param/a/2", visible=False)
+    send_query(client, "/param/a/1", visible=False)
+    send_query(client, "/param/a/3", visible=True)
+    send_query(client, "/param/a/2", visible=True)
+    assert client.sent == [] and len(timers) == 1
+
+    run_timers(timers)
+    assert client.sent == ["/q/param/a/3", "/q/param/a/2", "/q/param/a/1"]
+    assert scheduler.queries_deduplicated == 2
+
+    send_query(client, "/param/a/3")
+    run_timers(timers)
+    assert len(client.sent) == 3, "Outstanding queries are not sent again"
+    QueryReplyDispatcher(client).handlers_for_address("/param/a/3")
+    send_query(client, "/param/a/3")
+    run_timers(timers)
+    assert client.sent[-1] == "/q/param/a/3"
+    assert scheduler.replies_received == 1
+
+
+def test_QueryScheduler_paces_queries():
+    scheduler, now, timers = make_scheduler(rate=100.0)
+    clients = [FakeClient(), FakeClient()]
+
+    for i in range(100):
+        send_query(clients[i % 2], "/param/a/{0}".format(i), visible=True)
+    run_timers(timers)
+    assert scheduler.queries_sent == osc.query_scheduler.QUERY_BURST
+    assert len(timers) == 1, "Pump is scheduled again while queries wait"
+
+    now[0] += 0.1
+    run_timers(timers)
+    assert scheduler.queries_sent == osc.query_scheduler.QUERY_BURST + 10
+
+    # Queries without reply time out and free their slot
+    now[0] += osc.query_scheduler.QUERY_REPLY_TIMEOUT + 1
+    run_timers(timers)
+    assert scheduler.queries_timed_out == osc.query_scheduler.QUERY_BURST + 10
+
+
+def test_QueryScheduler_sleeps_while_instruments_are_full():
+    scheduler, now, timers = make_scheduler(rate=1e6)
+    client = FakeClient()
+    limit = osc.query_scheduler.MAX_OUTSTANDING_QUERIES
+
+    for i in range(limit + 10):
+        send_query(client, "/param/a/{0}".format(i))
+    run_timers(timers)
+    assert len(client.sent) == limit
+    assert [delay for delay, callback in timers.values()] == [osc.query_scheduler.QUERY_REPLY_TIMEOUT]
+
+    # A reply frees a slot and wakes the scheduler up straight away
+    scheduler.reply_received(client, "/param/a/0")
+    assert [delay for delay, callback in timers.values()] == [0]
+    now[0] += 0.001
+    run_timers(timers)
+    assert client.sent[-1] == "/q/param/a/{0}".format(limit)
+    assert scheduler.get_stats()["queries_waiting"] == 9
+
+
+def test_QueryScheduler_clamps_rate_from_settings():
+    scheduler, now, timers = make_scheduler(rate=0)
+    client = FakeClient()
+    assert scheduler.rate == osc.query_scheduler.MIN_QUERY_RATE
+
+    for i in range(osc.query_scheduler.QUERY_BURST + 1):
+        send_query(client, "/param/a/{0}".format(i))
+    run_timers(timers)
+    assert len(client.sent) == osc.query_scheduler.QUERY_BURST
+    assert len(timers) == 1
@@ -0,0 +1,56 @@
+import asyncio
+from scheduling.task_scheduler import (
+    TaskScheduler,
+    PRIORITY_REALTIME,
+    PRIORITY_ROUTING,
+    PRIORITY_HOUSEKEEPING,
+)
+
+
+def test_TaskScheduler_priorities_and_concurrency():
+    started = []
+
+    async def job(name):
+        started.append(name)
+        await asyncio.sleep(0.01)
+
+    async def run():
+        scheduler = TaskScheduler(concurrency={PRIORITY_ROUTING: 1})
+        scheduler.submit(job("housekeeping"), priority=PRIORITY_HOUSEKEEPING)
+        scheduler.submit(job("routing 1"), priority=PRIORITY_ROUTING)
+        scheduler.submit(job("routing 2"), priority=PRIORITY_ROUTING)
+        scheduler.submit(job("osc"), priority=PRIORITY_REALTIME)
+        scheduler.dispatch()
+        assert scheduler.n_running(PRIORITY_ROUTING) == 1, "Routing class is capped to 1"
+        assert scheduler.n_pending(PRIORITY_ROUTING) == 1
+        while scheduler.n_pending() or scheduler.n_running():
+            await asyncio.sleep(0.005)
+        return scheduler
+
+    scheduler = asyncio.run(run())
+    assert started == ["osc", "routing 1", "housekeeping", "routing 2"]
+    assert scheduler.get_stats()["routing"]["completed"] == 2
+
+
+def test_TaskScheduler_deduplication_and_backpressure():
+    ran = []
+
+    async def job(name):
+        ran.append(name)
+
+    async def run():
+        scheduler = TaskScheduler(max_pending={PRIORITY_ROUTING: 2})
+        scheduler.submit(job("link a"), priority=PRIORITY_ROUTING, key="a")
+        scheduler.submit(job("other"), priority=PRIORITY_ROUTING)
+        scheduler.submit(job("unlink a"), priority=PRIORITY_ROUTING, key="a")
+        assert not scheduler.submit(job("rejected"), priority=PRIORITY_ROUTING)
+        scheduler.dispatch()
+        while scheduler.n_running():
+            await asyncio.sleep(0)
+        return scheduler
+
+    stats = asyncio.run(run()).get_stats()["routing"]
+    assert ran == ["other", "unlink a"], "Latest equivalent job should run after earlier jobs"
+    assert stats["deduplicated"] == 1
+    assert stats["rejected"] == 1
+    assert stats["max_pending"] == 2
@@ -0,0 +1,61 @@
+import asyncio
+import time
+from scheduling.wakeups import Wakeups, notify_wakeups
+
+
+def test_Wakeups_runs_due_timers_in_order():
+    wakeups = Wakeups()
+    fired = []
+    now = time.monotonic()
+    wakeups.call_at(now + 2, lambda: fired.append("b"))
+    wakeups.call_at(now + 1, lambda: fired.append("a"))
+    wakeups.call_at(now + 10, lambda: fired.append("c"))
+
+    assert wakeups.run_due(now) == 0
+    assert wakeups.next_deadline() == now + 1
+    assert wakeups.run_due(now + 5) == 2
+    assert fired == ["a", "b"]
+    assert wakeups.next_deadline() == now + 10
+
+
+def test_Wakeups_keys_replace_and_cancel_timers():
+    wakeups = Wakeups()
+    fired = []
+    now = time.monotonic()
+    wakeups.call_at(now + 1, lambda: fired.append(1), key="debounce")
+    wakeups.call_at(now + 2, lambda: fired.append(2), key="debounce")
+    assert wakeups.run_due(now + 1.5) == 0, "Replaced timer should not fire"
+    assert wakeups.run_due(now + 2.5) == 1
+    assert fired == [2]
+
+    wakeups.call_at(now + 1, lambda: fired.append(3), key="other")
+    wakeups.cancel("other")
+    assert wakeups.next_deadline() is None
+    assert wakeups.run_due(now + 5) == 0
+
+
+def test_Wakeups_wait_returns_on_notify_or_timer():
+    wakeups = Wakeups()
+
+    async def run():
+        loop = asyncio.get_running_loop()
+
+        # Nothing pending, sleeps for max_sleep
+        start = loop.time()
+        await wakeups.wait(max_sleep=0.05)
+        assert loop.time() - start >= 0.04
+
+        # Notified while sleeping (e.g. display marked dirty from another thread)
+        loop.call_later(0.01, notify_wakeups)
+        start = loop.time()
+        await wakeups.wait(max_sleep=5)
+        assert loop.time() - start < 1
+
+        # Timer registered before sleeping marks the loop as notified, so first wait returns straight away
+        wakeups.call_later(0.02, lambda: None)
+        await wakeups.wait(max_sleep=5)
+        start = loop.time()
+        await wakeups.wait(max_sleep=5)
+        assert loop.time() - start < 1, "Should wake up for the timer deadline"
+
+    asyncio.run(run())
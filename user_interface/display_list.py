@@ -0,0 +1,84 @@
+import functools
+
+# cairo.Context methods modes draw with. None of them returns a value, so they can be recorded and replayed later.
+RECORDED_CONTEXT_METHODS = frozenset(
+    [
+        "save",
+        "restore",
+        "new_path",
+        "move_to",
+        "line_to",
+        "rel_line_to",
+        "rectangle",
+        "arc",
+        "close_path",
+        "stroke",
+        "fill",
+        "paint",
+        "translate",
+        "set_source_rgb",
+        "set_source_rgba",
+        "set_line_width",
+        "select_font_face",
+        "set_font_size",
+        "show_text",
+    ]
+)
+
+
+def freeze(value):
+    # Lists passed by modes (colours...) are copied so later changes to them do not reach recorded frames
+    return tuple(value) if type(value) is list else value
+
+
+class DisplayList(object):
+    """Snapshot of everything the active modes draw in a frame, taken in the main loop and drawn later by the
+    render worker. Modes draw into it with the same code they use for a cairo context: context methods (see
+    RECORDED_CONTEXT_METHODS) and drawing helpers decorated with @recorded (show_text, draw_slider...) are stored
+    with their arguments (labels, values, colours, positions) instead of being drawn. No cairo work is done while
+    recording. replay(ctx) draws the recorded operations in order on a real cairo context."""
+
+    def __init__(self):
+        self.ops = []  # [(context method name or helper function, args, kwargs)]
+
+    def __len__(self):
+        return len(self.ops)
+
+    def __getattr__(self, name):
+        if name not in RECORDED_CONTEXT_METHODS:
+            raise AttributeError("DisplayList can't record cairo.Context.{0}".format(name))
+
+        def record_context_call(*args, **kwargs):
+            self.record(name, args, kwargs)
+
+        return record_context_call
+
+    def record(self, operation, args, kwargs):
+        self.ops.append(
+            (
+                operation,
+                tuple(freeze(arg) for arg in args),
+                {key: freeze(value) for key, value in kwargs.items()},
+            )
+        )
+
+    def replay(self, ctx):
+        for operation, args, kwargs in self.ops:
+            if type(operation) is str:
+                getattr(ctx, operation)(*args, **kwargs)
+            else:
+                operation(ctx, *args, **kwargs)
+
+
+def recorded(function):
+    """Decorator for drawing helpers that take the context as first argument. When given a DisplayList the call
+    is recorded as one operation (the helper then runs in the render worker, with a real context)."""
+
+    @functools.wraps(function)
+    def draw_or_record(ctx, *args, **kwargs):
+        if isinstance(ctx, DisplayList):
+            ctx.record(function, args, kwargs)
+            return None
+        return function(ctx, *args, **kwargs)
+
+    return draw_or_record
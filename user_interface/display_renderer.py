@@ -0,0 +1,102 @@
+import time
+
+from scheduling.wakeups import notify_wakeups
+
+# Push 2 blanks its screen if it stops receiving frames, so even when nothing changes we resend the
+# last prepared frame every KEEPALIVE_INTERVAL seconds (this is only a USB transfer, nothing is redrawn)
+KEEPALIVE_INTERVAL = 1.0
+
+_current_renderer = None
+
+
+def mark_display_dirty():
+    """Flag the Push display as needing a redraw in the next frame. Modes and controls call this whenever
+    some state they draw has changed. It is safe to call before the app has created its renderer."""
+    if _current_renderer is not None:
+        _current_renderer.mark_dirty()
+
+
+class DisplayRenderer(object):
+    """Keeps track of whether the Push display needs to be redrawn so that static frames are neither
+    rendered nor sent. Also keeps counters with the real cost of the frames that do get rendered."""
+
+    def __init__(self):
+        global _current_renderer
+        _current_renderer = self
+
+        self.dirty = True
+        self.last_active_modes = None
+        self.last_prepared_frame = None
+        self.last_frame_sent_time = 0
+
+        # Counters
+        self.frames_rendered = 0
+        self.frames_skipped = 0
+        self.frames_resent = 0
+        self.last_render_time = 0.0  # seconds spent rendering + sending the last frame
+        self.total_render_time = 0.0
+        self.rendered_frame_rate = 0  # frames actually rendered during the last second
+        self.current_rendered_frames_measurement = 0
+        self.render_start_time = None
+
+    def mark_dirty(self):
+        self.dirty = True
+        notify_wakeups()  # Main loop might be sleeping until the next event
+
+    def needs_render(self, active_modes, force=False):
+        # Activating/deactivating modes always changes what is on screen
+        modes = tuple(active_modes)
+        if modes != self.last_active_modes:
+            self.last_active_modes = modes
+            self.dirty = True
+        return self.dirty or force
+
+    def begin_frame(self):
+        # Clear the flag before drawing so changes that arrive while we draw schedule another frame
+        self.dirty = False
+        self.render_start_time = time.time()
+
+    def end_frame(self, prepared_frame=None):
+        # prepared_frame is None when the frame is only recorded here and sent by the render worker threads
+        now = time.time()
+        if prepared_frame is not None:
+            self.last_prepared_frame = prepared_frame
+            self.last_frame_sent_time = now
+        self.last_render_time = now - self.render_start_time
+        self.total_render_time += self.last_render_time
+        self.frames_rendered += 1
+        self.current_rendered_frames_measurement += 1
+
+    def skip_frame(self):
+        self.frames_skipped += 1
+
+    def needs_keepalive(self):
+        return (
+            self.last_prepared_frame is not None
+            and time.time() - self.last_frame_sent_time > KEEPALIVE_INTERVAL
+        )
+
+    def frame_resent(self):
+        self.last_frame_sent_time = time.time()
+        self.frames_resent += 1
+
+    def update_frame_rate_measurement(self):
+        # Called once per second by the main loop
+        self.rendered_frame_rate = self.current_rendered_frames_measurement
+        self.current_rendered_frames_measurement = 0
+
+    @property
+    def average_render_time(self):
+        if self.frames_rendered == 0:
+            return 0.0
+        return self.total_render_time / self.frames_rendered
+
+    def get_stats(self):
+        return {
+            "frames_rendered": self.frames_rendered,
+            "frames_skipped": self.frames_skipped,
+            "frames_resent": self.frames_resent,
+            "last_render_time": self.last_render_time,
+            "average_render_time": self.average_render_time,
+            "rendered_frame_rate": self.rendered_frame_rate,
+        }
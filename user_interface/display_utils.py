@@ -1,8 +1,15 @@
 import cairo
 import definitions
 import push2_python
+from user_interface.display_list import recorded
+from user_interface.palette import palette
+from user_interface.tile_cache import TileCache
 
+# Shared by all modes, labels like parameter names and device tabs are rasterised once and then blitted
+text_tile_cache = TileCache()
 
+
+@recorded
 def show_title(ctx, x, h, text, color=[1, 1, 1]):
     text = str(text)
     ctx.set_source_rgb(*color)
@@ -13,6 +20,7 @@ def show_title(ctx, x, h, text, color=[1, 1, 1]):
     ctx.show_text(text)
 
 
+@recorded
 def show_value(ctx, x, h, text, color=[1, 1, 1]):
     text = str(text)
     ctx.set_source_rgb(*color)
@@ -23,6 +31,7 @@ def show_value(ctx, x, h, text, color=[1, 1, 1]):
     ctx.show_text(text)
 
 
+@recorded
 def draw_text_at(ctx, x, y, text, font_size = 12, color=[1, 1, 1]):
     text = str(text)
     ctx.set_source_rgb(*color)
@@ -32,6 +41,7 @@ def draw_text_at(ctx, x, y, text, font_size = 12, color=[1, 1, 1]):
     ctx.show_text(text)
 
 
+@recorded
 def show_text(ctx, x_part, pixels_from_top, text, height=20, font_color=definitions.WHITE, background_color=None, margin_left=4, margin_top=4, font_size_percentage=0.8, center_vertically=True, center_horizontally=False, rectangle_padding=0):
     assert 0 <= x_part < 8
     assert type(x_part) == int
@@ -42,30 +52,65 @@ def show_text(ctx, x_part, pixels_from_top, text, height=20, font_color=definiti
     x1 = part_w * x_part
     y1 = pixels_from_top
 
-    ctx.save()
-
-    if background_color is not None:
-        ctx.set_source_rgb(*definitions.get_color_rgb_float(background_color))
-        ctx.rectangle(x1 + rectangle_padding, y1 + rectangle_padding, part_w - rectangle_padding * 2, height - rectangle_padding * 2)
-        ctx.fill()
-    ctx.set_source_rgb(*definitions.get_color_rgb_float(font_color))
-    ctx.select_font_face("Arial", cairo.FONT_SLANT_NORMAL, cairo.FONT_WEIGHT_NORMAL)
+    # Text is rasterised once and then blitted from the cache. If there is no background and text is left
+    # aligned, margin_left only moves the tile so it is left out of the key (value labels move with the value)
+    tile_margin_left = margin_left
+    if background_color is None and not center_horizontally:
+        tile_margin_left = 0
+        x1 += margin_left
     font_size = round(int(height * font_size_percentage))
+    if center_vertically:
+        margin_top = None  # Not used, will be computed from height
+    key = (text, part_w, height, font_size, font_color, background_color, tile_margin_left, margin_top, center_horizontally, rectangle_padding)
+    tile = text_tile_cache.get_tile(
+        key,
+        lambda measure_ctx: _text_bounds(measure_ctx, part_w, text, height, font_size, background_color, tile_margin_left, margin_top, center_horizontally, rectangle_padding),
+        lambda tile_ctx: _draw_text(tile_ctx, part_w, text, height, font_size, font_color, background_color, tile_margin_left, margin_top, center_horizontally, rectangle_padding),
+    )
+    tile.blit(ctx, x1, y1)
+
+
+def _layout_text_lines(ctx, part_w, text, height, font_size, margin_left, margin_top, center_horizontally):
+    # Returns list of (line, x, y) with the position of each line relative to the top left corner of the part
+    ctx.select_font_face("Arial", cairo.FONT_SLANT_NORMAL, cairo.FONT_WEIGHT_NORMAL)
     text_lines = text.split('\n')
     n_lines = len(text_lines)
-    if center_vertically:
+    if margin_top is None:
         margin_top = (height - font_size * n_lines) // 2
     ctx.set_font_size(font_size)
+    layout = []
     for i, line in enumerate(text_lines):
         if center_horizontally:
             (_, _, l_width, _, _, _) = ctx.text_extents(line)
-            ctx.move_to(x1 + part_w/2 - l_width/2, y1 + font_size * (i + 1) + margin_top - 2)
+            layout.append((line, part_w/2 - l_width/2, font_size * (i + 1) + margin_top - 2))
         else:
-            ctx.move_to(x1 + margin_left, y1 + font_size * (i + 1) + margin_top - 2)
-        ctx.show_text(line)
+            layout.append((line, margin_left, font_size * (i + 1) + margin_top - 2))
+    return layout
 
-    ctx.restore()
 
+def _text_bounds(ctx, part_w, text, height, font_size, background_color, margin_left, margin_top, center_horizontally, rectangle_padding):
+    bounds = []
+    if background_color is not None:
+        bounds.append((rectangle_padding, rectangle_padding, part_w - rectangle_padding, height - rectangle_padding))
+    for line, x, y in _layout_text_lines(ctx, part_w, text, height, font_size, margin_left, margin_top, center_horizontally):
+        (x_bearing, y_bearing, l_width, l_height, x_advance, _) = ctx.text_extents(line)
+        bounds.append((x + min(0, x_bearing), y + y_bearing, x + max(x_bearing + l_width, x_advance), y + y_bearing + l_height))
+    if not bounds:
+        return (0, 0, 1, 1)
+    return (min(b[0] for b in bounds), min(b[1] for b in bounds), max(b[2] for b in bounds), max(b[3] for b in bounds))
+
+
+def _draw_text(ctx, part_w, text, height, font_size, font_color, background_color, margin_left, margin_top, center_horizontally, rectangle_padding):
+    if background_color is not None:
+        palette.set_source(ctx, background_color)
+        ctx.rectangle(rectangle_padding, rectangle_padding, part_w - rectangle_padding * 2, height - rectangle_padding * 2)
+        ctx.fill()
+    palette.set_source(ctx, font_color)
+    for line, x, y in _layout_text_lines(ctx, part_w, text, height, font_size, margin_left, margin_top, center_horizontally):
+        ctx.move_to(x, y)
+        ctx.show_text(line)
+
+@recorded
 def show_notification(ctx, text, opacity=1.0):
     ctx.save()
 
@@ -87,3 +132,22 @@ def show_notification(ctx, text, opacity=1.0):
     ctx.show_text(text)
 
     ctx.restore()
+
+@recorded
+def show_debug_overlay(ctx, lines, font_size=10):
+    # Small text box in the top right corner of the display, drawn on top of everything else
+    ctx.save()
+    ctx.select_font_face("Arial", cairo.FONT_SLANT_NORMAL, cairo.FONT_WEIGHT_NORMAL)
+    ctx.set_font_size(font_size)
+    line_h = font_size + 2
+    box_w = max([ctx.text_extents(line).x_advance for line in lines] + [0]) + 8
+    box_h = line_h * len(lines) + 6
+    display_w = push2_python.constants.DISPLAY_LINE_PIXELS
+    ctx.set_source_rgba(0.0, 0.0, 0.0, 0.8)
+    ctx.rectangle(display_w - box_w, 0, box_w, box_h)
+    ctx.fill()
+    ctx.set_source_rgb(1.0, 1.0, 0.0)
+    for i, line in enumerate(lines):
+        ctx.move_to(display_w - box_w + 4, line_h * (i + 1))
+        ctx.show_text(line)
+    ctx.restore()
@@ -0,0 +1,90 @@
+import cairo
+import numpy
+import threading
+
+
+class FrameBuffer(object):
+    """A persistent RGB565 cairo surface together with a context to draw on it and a numpy view of its pixels.
+    The view is already transposed to the (width, height) layout push2_python's display encoder expects, so
+    frames can be handed over without creating new arrays."""
+
+    def __init__(self, w, h):
+        self.w = w
+        self.h = h
+        self.surface = cairo.ImageSurface(cairo.FORMAT_RGB16_565, w, h)
+        self.ctx = cairo.Context(self.surface)
+
+        # Rows might be padded, so build the view with the real stride and crop it to the display width
+        stride_pixels = self.surface.get_stride() // 2
+        self.pixels = numpy.ndarray(
+            shape=(h, stride_pixels), dtype=numpy.uint16, buffer=self.surface.get_data()
+        )[:, :w]
+        self.frame = self.pixels.transpose()
+
+    def begin(self):
+        # Clear to black (new surfaces used to start zeroed) and isolate the drawing state of this frame
+        self.surface.flush()
+        self.pixels.fill(0)
+        self.surface.mark_dirty()
+        self.ctx.save()
+        return self.ctx
+
+    def end(self):
+        self.ctx.restore()
+        self.surface.flush()
+        return self.frame
+
+
+class FrameBufferPool(object):
+    """Two persistent frame buffers that are swapped every frame: one is drawn while the other one (the last
+    finished frame) can still be read by whoever sends it to the Push."""
+
+    def __init__(self, w, h, n_buffers=2):
+        self.buffers = [FrameBuffer(w, h) for _ in range(n_buffers)]
+        self.current_idx = 0
+
+    def next_buffer(self):
+        buffer = self.buffers[self.current_idx]
+        self.current_idx = (self.current_idx + 1) % len(self.buffers)
+        return buffer
+
+
+class FrameRing(object):
+    """Ring of persistent frame buffers shared between a thread that renders frames and a thread that sends them
+    to the Push. The renderer always writes to a slot that is neither the latest published frame nor the one
+    being read, so with three slots neither thread ever has to wait for the other."""
+
+    def __init__(self, w, h, n_slots=3):
+        self.buffers = [FrameBuffer(w, h) for _ in range(n_slots)]
+        self.condition = threading.Condition()
+        self.latest_idx = None
+        self.reading_idx = None
+        self.sequence = 0  # Increased every time a new frame is published
+
+    def acquire_for_writing(self):
+        with self.condition:
+            for idx, buffer in enumerate(self.buffers):
+                if idx != self.latest_idx and idx != self.reading_idx:
+                    return idx, buffer
+
+    def publish(self, idx):
+        with self.condition:
+            self.latest_idx = idx
+            self.sequence += 1
+            self.condition.notify_all()
+
+    def acquire_latest(self, last_sequence, timeout=None):
+        """Waits until a frame newer than last_sequence is published (or timeout expires) and returns
+        (buffer, sequence). Returns (None, last_sequence) if no new frame was published. The buffer must be
+        released after reading it."""
+        with self.condition:
+            if self.sequence == last_sequence:
+                self.condition.wait(timeout)
+            if self.sequence == last_sequence or self.latest_idx is None:
+                return None, last_sequence
+            self.reading_idx = self.latest_idx
+            return self.buffers[self.reading_idx], self.sequence
+
+    def release(self):
+        with self.condition:
+            self.reading_idx = None
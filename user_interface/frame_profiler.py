@@ -0,0 +1,76 @@
+import json
+import time
+from collections import deque
+
+# Number of samples kept per section. At 60 fps this is the last 5 seconds of frames.
+WINDOW_SIZE = 300
+DUMP_FILENAME = "frame_profile.json"
+
+
+class FrameProfiler(object):
+    """Keeps rolling windows of the time spent in each section of the main loop (every mode's update_display,
+    check_for_delayed_actions, update_pads and update_buttons...) and reports p50/p95/max for each of them.
+    When disabled, start() returns None and record() returns immediately, so timing calls can stay in place."""
+
+    def __init__(self, enabled=False, window_size=WINDOW_SIZE):
+        self.enabled = enabled
+        self.window_size = window_size
+        self.samples = {}
+
+    def set_enabled(self, enabled):
+        self.enabled = enabled
+        if not enabled:
+            self.samples = {}
+
+    def start(self):
+        if self.enabled:
+            return time.perf_counter()
+
+    def record(self, section, start_time):
+        if start_time is None:
+            return
+        elapsed = time.perf_counter() - start_time
+        samples = self.samples.get(section)
+        if samples is None:
+            samples = deque(maxlen=self.window_size)
+            self.samples[section] = samples
+        samples.append(elapsed)
+
+    def get_stats(self):
+        # {section: {"n": ..., "p50": ..., "p95": ..., "max": ...}}, times in seconds
+        stats = {}
+        for section, samples in list(self.samples.items()):
+            sorted_samples = sorted(samples)
+            n = len(sorted_samples)
+            if n == 0:
+                continue
+            stats[section] = {
+                "n": n,
+                "p50": sorted_samples[int(0.50 * (n - 1))],
+                "p95": sorted_samples[int(0.95 * (n - 1))],
+                "max": sorted_samples[-1],
+            }
+        return stats
+
+    def get_overlay_lines(self, max_lines=8):
+        # Worst sections first (by p95), formatted in milliseconds
+        stats = sorted(
+            self.get_stats().items(), key=lambda item: item[1]["p95"], reverse=True
+        )
+        lines = ["section  p50 / p95 / max ms"]
+        for section, section_stats in stats[:max_lines]:
+            lines.append(
+                "{0}  {1:.1f} / {2:.1f} / {3:.1f}".format(
+                    section,
+                    section_stats["p50"] * 1000,
+                    section_stats["p95"] * 1000,
+                    section_stats["max"] * 1000,
+                )
+            )
+        return lines
+
+    def dump_to_file(self, filename=DUMP_FILENAME, extra_stats=None):
+        data = {"time": time.time(), "window_size": self.window_size, "sections": self.get_stats()}
+        if extra_stats:
+            data.update(extra_stats)
+        json.dump(data, open(filename, "w"), indent=4)
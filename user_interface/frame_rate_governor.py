@@ -0,0 +1,68 @@
+import asyncio
+import time
+
+# Defaults used when settings.json does not specify them
+IDLE_FRAME_RATE = 10
+IDLE_TIMEOUT = 5.0  # seconds without user activity after which the frame rate drops to the idle rate
+
+_current_governor = None
+
+
+def notify_user_activity():
+    """Tell the frame rate governor that the user did something (pressed a pad, rotated an encoder, an OSC echo
+    arrived...) so the main loop runs at full rate. Safe to call from any thread."""
+    if _current_governor is not None:
+        _current_governor.notify_activity()
+
+
+class FrameRateGovernor(object):
+    """Chooses the rate at which the main loop runs: the full frame rate while the user is interacting and a low
+    idle rate after IDLE_TIMEOUT seconds of inactivity. The idle sleep is interrupted as soon as new activity is
+    notified so the first frame after an input is not delayed by a long idle frame."""
+
+    def __init__(
+        self, max_frame_rate=60, idle_frame_rate=IDLE_FRAME_RATE, idle_timeout=IDLE_TIMEOUT
+    ):
+        global _current_governor
+        _current_governor = self
+
+        self.max_frame_rate = max_frame_rate
+        self.idle_frame_rate = min(idle_frame_rate, max_frame_rate)
+        self.idle_timeout = idle_timeout
+        self.last_activity_time = time.monotonic()
+        self.loop = None
+        self.wake_event = None
+
+    def notify_activity(self):
+        was_idle = self.is_idle()
+        self.last_activity_time = time.monotonic()
+        if was_idle and self.loop is not None:
+            # Might be called from the push2_python/mido callback threads
+            self.loop.call_soon_threadsafe(self.wake_event.set)
+
+    def is_idle(self, now=None):
+        if now is None:
+            now = time.monotonic()
+        return now - self.last_activity_time > self.idle_timeout
+
+    def get_frame_rate(self, now=None):
+        return self.idle_frame_rate if self.is_idle(now) else self.max_frame_rate
+
+    @property
+    def current_frame_rate(self):
+        return self.get_frame_rate()
+
+    async def sleep(self, duration):
+        if not self.is_idle():
+            await asyncio.sleep(duration)
+            return
+
+        # Idle frames are long, so wait in a way that activity notifications can interrupt
+        if self.loop is None:
+            self.loop = asyncio.get_running_loop()
+            self.wake_event = asyncio.Event()
+        self.wake_event.clear()
+        try:
+            await asyncio.wait_for(self.wake_event.wait(), duration)
+        except asyncio.TimeoutError:
+            pass
@@ -0,0 +1,107 @@
+import os
+import threading
+import cairo
+import numpy
+import push2_python
+
+
+def rgb565_to_rgb888(frame):
+    """Converts a (width, height) RGB565 frame as handed to push2_python into a (height, width, 3) uint8 array"""
+    pixels = frame.transpose().astype(numpy.uint32)
+    rgb = numpy.empty(pixels.shape + (3,), dtype=numpy.uint8)
+    rgb[..., 0] = ((pixels >> 11) & 0x1F) * 255 // 0x1F
+    rgb[..., 1] = ((pixels >> 5) & 0x3F) * 255 // 0x3F
+    rgb[..., 2] = (pixels & 0x1F) * 255 // 0x1F
+    return rgb
+
+
+def save_frame_as_png(frame, filename):
+    rgb = rgb565_to_rgb888(frame)
+    h, w, _ = rgb.shape
+    surface = cairo.ImageSurface(cairo.FORMAT_RGB24, w, h)
+    stride_pixels = surface.get_stride() // 4
+    pixels = numpy.ndarray(
+        shape=(h, stride_pixels, 4), dtype=numpy.uint8, buffer=surface.get_data()
+    )[:, :w]
+    # FORMAT_RGB24 is stored as native endian 0xXXRRGGBB words, i.e. BGRX bytes on little endian machines
+    pixels[..., 0] = rgb[..., 2]
+    pixels[..., 1] = rgb[..., 1]
+    pixels[..., 2] = rgb[..., 0]
+    surface.mark_dirty()
+    surface.write_to_png(filename)
+
+
+class HeadlessDisplay(object):
+    """Drop-in replacement for push2_python's display that keeps frames in memory instead of sending them over
+    USB. Prepared frames are copies of the RGB565 frame, so they stay valid after the frame buffer is redrawn.
+    If capture_dir is set, every frame sent is also written there as a PNG file."""
+
+    def __init__(self, capture_dir=None):
+        self.capture_dir = capture_dir
+        self.last_frame = None
+        self.frames_sent = 0
+        if capture_dir is not None:
+            os.makedirs(capture_dir, exist_ok=True)
+
+    def make_black_frame(self):
+        return numpy.zeros(
+            (push2_python.constants.DISPLAY_LINE_PIXELS, push2_python.constants.DISPLAY_N_LINES),
+            dtype=numpy.uint16,
+        )
+
+    def prepare_frame(self, frame, input_format=push2_python.constants.FRAME_FORMAT_RGB565):
+        return numpy.array(frame, dtype=numpy.uint16)
+
+    def send_to_display(self, prepared_frame):
+        self.last_frame = prepared_frame
+        if self.capture_dir is not None:
+            save_frame_as_png(
+                prepared_frame,
+                os.path.join(self.capture_dir, "frame_{0:06d}.png".format(self.frames_sent)),
+            )
+        self.frames_sent += 1
+
+    def display_frame(self, frame, input_format=push2_python.constants.FRAME_FORMAT_RGB565):
+        self.send_to_display(self.prepare_frame(frame, input_format=input_format))
+
+
+class HeadlessSection(object):
+    """Accepts any method call of a push2_python section (buttons, pads, touchstrip...) and only counts it"""
+
+    def __init__(self):
+        self.n_calls = 0
+
+    def __getattr__(self, name):
+        if name.startswith("__"):
+            raise AttributeError(name)
+
+        def record_call(*args, **kwargs):
+            self.n_calls += 1
+
+        return record_call
+
+
+class HeadlessEncoders(HeadlessSection):
+    available_names = [
+        getattr(push2_python.constants, name)
+        for name in dir(push2_python.constants)
+        if name.startswith("ENCODER_") and name.endswith("_ENCODER")
+    ]
+
+
+class HeadlessPush(HeadlessSection):
+    """Stands in for push2_python.Push2 when running without hardware (benchmarks, CI, development machines).
+    Only the display does real work; buttons, pads, etc. just count the messages they would have sent."""
+
+    def __init__(self, capture_dir=None):
+        super().__init__()
+        self.display = HeadlessDisplay(capture_dir=capture_dir)
+        self.buttons = HeadlessSection()
+        self.pads = HeadlessSection()
+        self.touchstrip = HeadlessSection()
+        self.encoders = HeadlessEncoders()
+        self.color_palette = {}
+        self.f_stop = threading.Event()
+
+    def midi_is_configured(self):
+        return True
@@ -0,0 +1,42 @@
+import cairo
+import definitions
+from user_interface.display_list import DisplayList
+
+
+class Palette(object):
+    """Colour table compiled once from definitions (after darker variants have been generated). Each colour gets
+    an id (its position in definitions.COLORS_NAMES) and a precomputed float RGB tuple. A cairo SolidPattern is
+    also created per colour the first time it is used, so draw code can set sources without building new lists
+    or looking colours up in module globals. Unknown colour names resolve to black, as get_color_rgb_float does."""
+
+    def __init__(self, color_names):
+        self.names = tuple(color_names)
+        self.ids = {name: color_id for color_id, name in enumerate(self.names)}
+        self.rgb_float = tuple(
+            tuple(definitions.get_color_rgb_float(name)) for name in self.names
+        )
+        self.black_id = self.ids[definitions.BLACK]
+        self.patterns = [None] * len(self.names)
+
+    def get_color_id(self, color_name):
+        return self.ids.get(color_name, self.black_id)
+
+    def get_rgb(self, color_name):
+        return self.rgb_float[self.get_color_id(color_name)]
+
+    def get_pattern(self, color_name):
+        color_id = self.get_color_id(color_name)
+        pattern = self.patterns[color_id]
+        if pattern is None:
+            pattern = cairo.SolidPattern(*self.rgb_float[color_id])
+            self.patterns[color_id] = pattern
+        return pattern
+
+    def set_source(self, ctx, color_name):
+        if isinstance(ctx, DisplayList):
+            ctx.record(self.set_source, (color_name,), {})  # Pattern is looked up when the frame is drawn
+            return
+        ctx.set_source(self.get_pattern(color_name))
+
+
+palette = Palette(definitions.COLORS_NAMES)
@@ -0,0 +1,150 @@
+import threading
+import time
+import traceback
+from collections import namedtuple
+
+import push2_python
+
+from user_interface.display_renderer import KEEPALIVE_INTERVAL
+
+# What the main loop decides about a frame before the modes draw it: which modes are drawn and what notification
+# is shown
+RenderRequest = namedtuple(
+    "RenderRequest", ["active_modes", "notification_text", "notification_opacity"]
+)
+
+
+class RenderWorker(threading.Thread):
+    """Renders display frames outside the asyncio loop. The main loop has the modes draw into a DisplayList (a
+    snapshot of the labels, values and shapes of the frame, see user_interface.display_list) and submits it, the
+    worker replays it into a FrameRing slot. Only the most recent display list is kept if the worker falls
+    behind. The worker never reads mode state, so the loop keeps changing it while a frame is rasterised, and all
+    cairo work (text and sprite tiles included) happens in this thread."""
+
+    def __init__(self, frame_ring):
+        super().__init__(name="pysha-render-worker", daemon=True)
+        self.frame_ring = frame_ring
+        self.condition = threading.Condition()
+        self.pending_request = None
+        self.running = True
+
+        # Counters
+        self.requests_dropped = 0  # Display lists replaced by a newer one before being rendered
+        self.render_errors = 0
+        self.frames_rendered = 0
+        self.last_render_time = 0.0  # Seconds spent rasterising the last frame
+        self.total_render_time = 0.0
+
+    def submit(self, display_list):
+        with self.condition:
+            if self.pending_request is not None:
+                self.requests_dropped += 1
+            self.pending_request = display_list
+            self.condition.notify()
+
+    def stop(self):
+        with self.condition:
+            self.running = False
+            self.condition.notify()
+
+    def run(self):
+        while True:
+            with self.condition:
+                while self.running and self.pending_request is None:
+                    self.condition.wait()
+                if not self.running:
+                    return
+                display_list = self.pending_request
+                self.pending_request = None
+
+            try:
+                self.render(display_list)
+            except Exception:
+                # A drawing helper failed, this frame is skipped
+                self.render_errors += 1
+                traceback.print_exc()
+
+    def render(self, display_list):
+        start = time.perf_counter()
+        idx, frame_buffer = self.frame_ring.acquire_for_writing()
+        ctx = frame_buffer.begin()
+        try:
+            display_list.replay(ctx)
+        finally:
+            frame_buffer.end()
+        self.frame_ring.publish(idx)
+        self.last_render_time = time.perf_counter() - start
+        self.total_render_time += self.last_render_time
+        self.frames_rendered += 1
+
+    def get_stats(self):
+        return {
+            "frames_rendered": self.frames_rendered,
+            "requests_dropped": self.requests_dropped,
+            "render_errors": self.render_errors,
+            "last_render_time": self.last_render_time,
+            "average_render_time": self.total_render_time / self.frames_rendered if self.frames_rendered else 0.0,
+        }
+
+
+class DisplaySender(threading.Thread):
+    """Sends the latest frame published in a FrameRing to the Push display. If no new frames are published, the
+    last one is resent every KEEPALIVE_INTERVAL seconds so the display does not go blank."""
+
+    def __init__(self, app, frame_ring):
+        super().__init__(name="pysha-display-sender", daemon=True)
+        self.app = app
+        self.frame_ring = frame_ring
+        self.running = True
+        self.last_sequence = 0
+        self.last_prepared_frame = None
+
+        # Counters
+        self.frames_sent = 0
+        self.frames_resent = 0  # Keepalive sends of the last prepared frame
+        self.last_send_time = 0.0
+
+    def stop(self):
+        self.running = False
+
+    def run(self):
+        while self.running:
+            frame_buffer, sequence = self.frame_ring.acquire_latest(
+                self.last_sequence, timeout=KEEPALIVE_INTERVAL
+            )
+            if not self.app.use_push2_display:
+                if frame_buffer is not None:
+                    self.frame_ring.release()
+                    self.last_sequence = sequence
+                continue
+
+            try:
+                if frame_buffer is not None:
+                    self.last_sequence = sequence
+                    try:
+                        prepared_frame = self.app.push.display.prepare_frame(
+                            frame_buffer.frame,
+                            input_format=push2_python.constants.FRAME_FORMAT_RGB565,
+                        )
+                    finally:
+                        self.frame_ring.release()
+                    self.send(prepared_frame)
+                    self.last_prepared_frame = prepared_frame
+                elif self.last_prepared_frame is not None:
+                    self.send(self.last_prepared_frame)
+                    self.frames_resent += 1
+            except Exception:
+                traceback.print_exc()
+
+    def send(self, prepared_frame):
+        start = time.time()
+        self.app.push.display.send_to_display(prepared_frame)
+        self.last_send_time = time.time() - start
+        self.frames_sent += 1
+
+    def get_stats(self):
+        return {
+            "frames_sent": self.frames_sent,
+            "frames_resent": self.frames_resent,
+            "last_send_time": self.last_send_time,
+        }
@@ -0,0 +1,78 @@
+import cairo
+import math
+from collections import OrderedDict
+
+DEFAULT_MAX_TILES = 256
+
+
+class Tile(object):
+    """Pre-rasterised text or widget graphics with the offset at which it has to be blitted
+    relative to the position it was originally laid out at."""
+
+    def __init__(self, surface, offset_x, offset_y):
+        self.surface = surface
+        self.offset_x = offset_x
+        self.offset_y = offset_y
+        self.w = surface.get_width()
+        self.h = surface.get_height()
+
+    def blit(self, ctx, x, y):
+        x = x + self.offset_x
+        y = y + self.offset_y
+        ctx.save()
+        ctx.set_source_surface(self.surface, x, y)
+        ctx.rectangle(x, y, self.w, self.h)
+        ctx.fill()
+        ctx.restore()
+
+
+class TileCache(object):
+    """LRU cache of Tile objects. Tiles are created with the draw function passed to get_tile, which
+    receives a context and must draw relative to (0, 0). The bounds function must return the (x0, y0, x1, y1)
+    rectangle (relative to (0, 0)) the drawing will cover, and receives a context that can be used to measure
+    text."""
+
+    def __init__(self, max_tiles=DEFAULT_MAX_TILES):
+        self.max_tiles = max_tiles
+        self.tiles = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+        # Context used only for measuring text before creating a tile
+        self.measure_surface = cairo.ImageSurface(cairo.FORMAT_ARGB32, 1, 1)
+        self.measure_ctx = cairo.Context(self.measure_surface)
+
+    def get_tile(self, key, bounds_func, draw_func):
+        tile = self.tiles.get(key, None)
+        if tile is not None:
+            self.tiles.move_to_end(key)
+            self.hits += 1
+            return tile
+
+        self.misses += 1
+        self.measure_ctx.save()
+        x0, y0, x1, y1 = bounds_func(self.measure_ctx)
+        self.measure_ctx.restore()
+
+        # Add a pixel around the bounds to leave room for antialiasing
+        x0 = int(math.floor(x0)) - 1
+        y0 = int(math.floor(y0)) - 1
+        w = max(1, int(math.ceil(x1)) + 1 - x0)
+        h = max(1, int(math.ceil(y1)) + 1 - y0)
+        surface = cairo.ImageSurface(cairo.FORMAT_ARGB32, w, h)
+        ctx = cairo.Context(surface)
+        ctx.translate(-x0, -y0)
+        draw_func(ctx)
+        surface.flush()
+
+        tile = Tile(surface, x0, y0)
+        self.tiles[key] = tile
+        if len(self.tiles) > self.max_tiles:
+            self.tiles.popitem(last=False)
+        return tile
+
+    def clear(self):
+        self.tiles.clear()
+
+    def get_stats(self):
+        return {"tiles": len(self.tiles), "hits": self.hits, "misses": self.misses}
@@ -0,0 +1,75 @@
+import definitions
+from user_interface.display_list import recorded
+from user_interface.palette import palette
+from user_interface.tile_cache import TileCache
+
+SLIDER_LENGTH = 80
+SLIDER_TRIANGLE_PADDING = 3
+SLIDER_TRIANGLE_SIZE = 6
+
+# Slider positions are quantised to whole pixels, so for a given colour there are only a few dozen
+# different sprites, each rendered once and then composited at the position of the control
+slider_atlas = TileCache(max_tiles=1024)
+
+
+def get_slider_pixel_positions(value, max_value, bipolar=False):
+    # Returns start and end of the outer (value) line and position of the triangle indicator,
+    # in pixels from the start of the slider
+    fraction = value / max_value
+    if bipolar:
+        bipolar_value = fraction - 0.5 * max_value
+        start = 0.5 * SLIDER_LENGTH
+        end = start + bipolar_value * SLIDER_LENGTH
+    else:
+        start = 0
+        end = SLIDER_LENGTH * fraction
+    return int(round(start)), int(round(end)), int(round(SLIDER_LENGTH * fraction))
+
+
+@recorded
+def draw_slider(ctx, xc, yc, value, max_value, color, bipolar=False):
+    """Draws a slider (inner line, outer value line and triangle indicator) starting at (xc, yc)"""
+    start, end, triangle_x = get_slider_pixel_positions(value, max_value, bipolar=bipolar)
+    tile = slider_atlas.get_tile(
+        (color, start, end, triangle_x),
+        lambda _: _slider_bounds(start, end, triangle_x),
+        lambda tile_ctx: _draw_slider_sprite(tile_ctx, start, end, triangle_x, color),
+    )
+    tile.blit(ctx, xc, yc)
+
+
+def _slider_bounds(start, end, triangle_x):
+    x0 = min(0, start, end, triangle_x - SLIDER_TRIANGLE_SIZE) - 2
+    x1 = max(SLIDER_LENGTH, start, end, triangle_x + SLIDER_TRIANGLE_SIZE) + 2
+    y0 = -SLIDER_TRIANGLE_PADDING - 2 * SLIDER_TRIANGLE_SIZE - 1
+    y1 = 2
+    return (x0, y0, x1, y1)
+
+
+def _draw_slider_sprite(ctx, start, end, triangle_x, color):
+    # Inner line
+    ctx.move_to(0, 0)
+    ctx.line_to(SLIDER_LENGTH, 0)
+    palette.set_source(ctx, definitions.GRAY_LIGHT)
+    ctx.set_line_width(1)
+    ctx.stroke()
+
+    # Outer line
+    ctx.move_to(start, 0)
+    ctx.line_to(end, 0)
+    palette.set_source(ctx, color)
+    ctx.set_line_width(3)
+    ctx.stroke()
+
+    # Triangle indicator
+    ctx.move_to(triangle_x, -SLIDER_TRIANGLE_PADDING)
+    ctx.line_to(
+        triangle_x - SLIDER_TRIANGLE_SIZE,
+        -SLIDER_TRIANGLE_PADDING - 2 * SLIDER_TRIANGLE_SIZE,
+    )
+    ctx.line_to(
+        triangle_x + SLIDER_TRIANGLE_SIZE,
+        -SLIDER_TRIANGLE_PADDING - 2 * SLIDER_TRIANGLE_SIZE,
+    )
+    ctx.close_path()
+    ctx.fill()